@@ -1,12 +1,15 @@
+import asyncio
 import base64
 import json
 import re
 import logging
+from typing import List, Optional, Tuple
 
+from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.messages import HumanMessage
-from langchain_google_genai import ChatGoogleGenerativeAI
 
-from app.core.config import settings
+from app.agent.image_preprocess import prepare_image
+from app.agent.llm_registry import llm_registry
 
 logger = logging.getLogger(__name__)
 
@@ -33,58 +36,63 @@ def normalize_key(key: str) -> str:
     key = key.strip().lower()
     return FIELD_ALIASES.get(key, key)
 
-# === OCR Extractor Function ===
+# === Prompt ===
+
+OCR_PROMPT = (
+    "You are an expert at extracting structured data from business cards. "
+    "Return only a JSON object with the following fields:\n"
+    "- name\n- company\n- job_title\n- address\n- website\n- email\n- phone\n"
+    "Any extra unknown information should go under 'custom_fields' as key-value pairs.\n\n"
+    "If a field is missing, use an empty string. Always return this format:\n"
+    "{\n"
+    '  "name": "",\n'
+    '  "company": "",\n'
+    '  "job_title": "",\n'
+    '  "address": "",\n'
+    '  "website": "",\n'
+    '  "email": "",\n'
+    '  "phone": "",\n'
+    '  "custom_fields": {"...": "..."}\n'
+    "}\n\n"
+    "If the image contains no text or no card, respond with:\n"
+    '{"message": "No card or text detected"}\n\n'
+    "Return only valid JSON. No markdown. No explanation."
+)
+
+
+def build_batch_ocr_prompt(count: int) -> str:
+    return (
+        f"You will receive {count} business card images, each preceded by a label 'Card <n>:'. "
+        "Apply the instructions below to every card independently.\n\n"
+        f"{OCR_PROMPT}\n\n"
+        f"Instead of a single object, return a JSON array with exactly {count} elements, "
+        "where element n is the JSON object for Card n, in the same order as the images. "
+        "Return only the JSON array. No markdown. No explanation."
+    )
 
-def extract_card_data(image_bytes: bytes, mime_type: str) -> dict:
-    base64_image = base64.b64encode(image_bytes).decode("utf-8")
 
-    llm = ChatGoogleGenerativeAI(
-        model="gemini-2.5-flash",
-        google_api_key=settings.gemini_api_key,
-    )
+def get_ocr_llm() -> BaseChatModel:
+    return llm_registry.get("ocr")
 
-    prompt = (
-        "You are an expert at extracting structured data from business cards. "
-        "Return only a JSON object with the following fields:\n"
-        "- name\n- company\n- job_title\n- address\n- website\n- email\n- phone\n"
-        "Any extra unknown information should go under 'custom_fields' as key-value pairs.\n\n"
-        "If a field is missing, use an empty string. Always return this format:\n"
-        "{\n"
-        '  "name": "",\n'
-        '  "company": "",\n'
-        '  "job_title": "",\n'
-        '  "address": "",\n'
-        '  "website": "",\n'
-        '  "email": "",\n'
-        '  "phone": "",\n'
-        '  "custom_fields": {"...": "..."}\n'
-        "}\n\n"
-        "If the image contains no text or no card, respond with:\n"
-        '{"message": "No card or text detected"}\n\n'
-        "Return only valid JSON. No markdown. No explanation."
-    )
 
-    response = llm.invoke([
-        HumanMessage(content=[
-            {"type": "text", "text": prompt},
-            {"type": "image_url", "image_url": {"url": f"data:{mime_type};base64,{base64_image}"}}
-        ])
+def build_ocr_message(image_bytes: bytes, mime_type: str) -> HumanMessage:
+    base64_image = base64.b64encode(image_bytes).decode("utf-8")
+    return HumanMessage(content=[
+        {"type": "text", "text": OCR_PROMPT},
+        {"type": "image_url", "image_url": {"url": f"data:{mime_type};base64,{base64_image}"}}
     ])
 
-    raw_output = response.content.strip()
-    cleaned = re.sub(r"^```json|^```|```$", "", raw_output, flags=re.MULTILINE).strip()
+def build_batch_ocr_message(images: List[Tuple[bytes, str]]) -> HumanMessage:
+    content = [{"type": "text", "text": build_batch_ocr_prompt(len(images))}]
+    for index, (image_bytes, mime_type) in enumerate(images, start=1):
+        base64_image = base64.b64encode(image_bytes).decode("utf-8")
+        content.append({"type": "text", "text": f"Card {index}:"})
+        content.append({"type": "image_url", "image_url": {"url": f"data:{mime_type};base64,{base64_image}"}})
+    return HumanMessage(content=content)
 
-    # Try to isolate the first valid JSON object
-    match = re.search(r'\{[\s\S]*\}', cleaned)
-    if match:
-        cleaned = match.group(0)
-
-    try:
-        parsed = json.loads(cleaned)
-    except Exception as e:
-        logger.warning("OCR response not valid JSON: %s", e)
-        return {"message": "Invalid JSON from OCR agent", "raw_result": cleaned}
+# === Response Parsing ===
 
+def normalize_card_fields(parsed: dict) -> dict:
     # Ensure base structure
     output = {field: "" for field in CORE_FIELDS}
     output["custom_fields"] = {}
@@ -106,3 +114,134 @@ def extract_card_data(image_bytes: bytes, mime_type: str) -> dict:
         output["custom_fields"] = {}
 
     return output
+
+
+def parse_ocr_response(raw_output: str) -> dict:
+    raw_output = raw_output.strip()
+    cleaned = re.sub(r"^```json|^```|```$", "", raw_output, flags=re.MULTILINE).strip()
+
+    # Try to isolate the first valid JSON object
+    match = re.search(r'\{[\s\S]*\}', cleaned)
+    if match:
+        cleaned = match.group(0)
+
+    try:
+        parsed = json.loads(cleaned)
+    except Exception as e:
+        logger.warning("OCR response not valid JSON: %s", e)
+        return {"message": "Invalid JSON from OCR agent", "raw_result": cleaned}
+
+    if "message" in parsed:
+        return parsed
+
+    return normalize_card_fields(parsed)
+
+def parse_batch_ocr_response(raw_output: str, count: int) -> Optional[List[dict]]:
+    """Returns one result per card, or None if the reply can't be matched to the images."""
+    cleaned = re.sub(r"^```json|^```|```$", "", raw_output.strip(), flags=re.MULTILINE).strip()
+
+    match = re.search(r'\[[\s\S]*\]', cleaned)
+    if match:
+        cleaned = match.group(0)
+
+    try:
+        parsed = json.loads(cleaned)
+    except Exception as e:
+        logger.warning("Batch OCR response not valid JSON: %s", e)
+        return None
+
+    if not isinstance(parsed, list) or len(parsed) != count:
+        logger.warning("Batch OCR returned %s results for %s cards", len(parsed) if isinstance(parsed, list) else "non-list", count)
+        return None
+
+    results = []
+    for item in parsed:
+        if not isinstance(item, dict):
+            results.append({"message": "Invalid JSON from OCR agent", "raw_result": item})
+        elif "message" in item:
+            results.append(item)
+        else:
+            results.append(normalize_card_fields(item))
+    return results
+
+# === OCR Extractor Functions ===
+
+async def aextract_card_data(image_bytes: bytes, mime_type: str) -> dict:
+    response = await get_ocr_llm().ainvoke([build_ocr_message(image_bytes, mime_type)])
+    return parse_ocr_response(response.content)
+
+async def aextract_cards_batch(images: List[Tuple[bytes, str]]) -> Optional[List[dict]]:
+    response = await get_ocr_llm().ainvoke([build_batch_ocr_message(images)])
+    return parse_batch_ocr_response(response.content, len(images))
+
+# === Async Extraction Engine ===
+
+class OcrEngine:
+    """
+    Runs card OCR calls and counts their outcomes per worker.
+    Concurrency, rate and priority are left to the LLM governor that the OCR client
+    goes through; a second limit here would only queue calls in front of it.
+    """
+
+    def __init__(self):
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._batch_fallbacks = 0
+
+    async def _run(self, extract_fn, *args):
+        self._in_flight += 1
+        try:
+            result = await extract_fn(*args)
+            self._completed += 1
+            return result
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            self._in_flight -= 1
+
+    async def extract(self, image_bytes: bytes, mime_type: str) -> dict:
+        # Preprocess first so image work doesn't hold a governor slot
+        image_bytes, mime_type = await prepare_image(image_bytes, mime_type)
+        return await self._run(aextract_card_data, image_bytes, mime_type)
+
+    async def extract_batch(self, images: List[Tuple[bytes, str]]) -> List[dict]:
+        """
+        Extracts several cards with one multimodal call, holding a single governor slot.
+        Falls back to per-card calls if the batched reply can't be aligned with the images.
+        A card that fails in the fallback gets its own {"message": ...} error entry.
+        """
+        if len(images) == 1:
+            return [await self.extract(*images[0])]
+
+        prepared = list(await asyncio.gather(*(prepare_image(image_bytes, mime_type) for image_bytes, mime_type in images)))
+        results = await self._run(aextract_cards_batch, prepared)
+        if results is not None:
+            return results
+
+        self._batch_fallbacks += 1
+        outcomes = await asyncio.gather(
+            *(self._run(aextract_card_data, image_bytes, mime_type) for image_bytes, mime_type in prepared),
+            return_exceptions=True,
+        )
+        results = []
+        for outcome in outcomes:
+            if isinstance(outcome, Exception):
+                # One failed card must not take down the others in the batch
+                logger.error("OCR failed for one card in batch fallback: %s", outcome)
+                results.append({"message": f"OCR processing failed: {outcome}"})
+            else:
+                results.append(outcome)
+        return results
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self._in_flight,
+            "completed": self._completed,
+            "failed": self._failed,
+            "batch_fallbacks": self._batch_fallbacks,
+        }
+
+
+ocr_engine = OcrEngine()
@@ -0,0 +1,118 @@
+import asyncio
+import io
+import logging
+from typing import Optional, Tuple
+
+from PIL import Image, ImageFilter, ImageOps, UnidentifiedImageError
+from pydantic import BaseModel
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# === Preprocessing Profiles ===
+
+class PreprocessProfile(BaseModel):
+    max_side: int
+    autocrop: bool
+    grayscale: bool
+    format: str
+    quality: int
+
+
+PREPROCESS_PROFILES = {
+    "light": PreprocessProfile(max_side=2048, autocrop=False, grayscale=False, format="JPEG", quality=85),
+    "standard": PreprocessProfile(max_side=1600, autocrop=True, grayscale=True, format="JPEG", quality=80),
+    "aggressive": PreprocessProfile(max_side=1024, autocrop=True, grayscale=True, format="WEBP", quality=70),
+}
+
+FORMAT_MIME_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp"}
+
+# Edge-detection settings for locating the card inside the photo
+CROP_PROBE_SIZE = 256
+CROP_EDGE_THRESHOLD = 40
+CROP_MARGIN = 0.03
+CROP_MIN_AREA = 0.15
+
+
+def get_profile(level: Optional[str] = None) -> Optional[PreprocessProfile]:
+    level = (level or settings.ocr_image_preprocess).lower()
+    if level == "off":
+        return None
+    if level not in PREPROCESS_PROFILES:
+        logger.warning("Unknown OCR_IMAGE_PREPROCESS level %r, skipping preprocessing", level)
+        return None
+    return PREPROCESS_PROFILES[level]
+
+# === Image Operations ===
+
+def autocrop_card(image: Image.Image) -> Image.Image:
+    """
+    Crops to the bounding box of strong edges, found on a small probe copy.
+    Leaves the image untouched when the box is implausibly small or covers the whole frame.
+    """
+    probe = ImageOps.grayscale(image)
+    probe.thumbnail((CROP_PROBE_SIZE, CROP_PROBE_SIZE))
+    edges = probe.filter(ImageFilter.FIND_EDGES).point(lambda p: 255 if p > CROP_EDGE_THRESHOLD else 0)
+    bbox = edges.getbbox()
+    if not bbox:
+        return image
+
+    scale_x = image.width / probe.width
+    scale_y = image.height / probe.height
+    left, top, right, bottom = bbox
+    margin_x = int(image.width * CROP_MARGIN)
+    margin_y = int(image.height * CROP_MARGIN)
+    box = (
+        max(0, int(left * scale_x) - margin_x),
+        max(0, int(top * scale_y) - margin_y),
+        min(image.width, int(right * scale_x) + margin_x),
+        min(image.height, int(bottom * scale_y) + margin_y),
+    )
+
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    if area < CROP_MIN_AREA * image.width * image.height or box == (0, 0, image.width, image.height):
+        return image
+    return image.crop(box)
+
+
+def preprocess_image(image_bytes: bytes, mime_type: str, level: Optional[str] = None) -> Tuple[bytes, str]:
+    """
+    Shrinks a card photo before it is base64-encoded for Gemini.
+    Returns the original bytes when preprocessing is off, fails, or doesn't make the image smaller.
+    """
+    profile = get_profile(level)
+    if profile is None:
+        return image_bytes, mime_type
+
+    try:
+        image = Image.open(io.BytesIO(image_bytes))
+        image = ImageOps.exif_transpose(image)
+    except (UnidentifiedImageError, OSError) as e:
+        logger.warning("Image preprocessing skipped: %s", e)
+        return image_bytes, mime_type
+
+    if profile.autocrop:
+        image = autocrop_card(image)
+
+    image.thumbnail((profile.max_side, profile.max_side), Image.Resampling.LANCZOS)
+
+    if profile.grayscale:
+        image = ImageOps.grayscale(image)
+    elif image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    buffer = io.BytesIO()
+    image.save(buffer, format=profile.format, quality=profile.quality, optimize=True)
+    processed = buffer.getvalue()
+
+    if len(processed) >= len(image_bytes):
+        return image_bytes, mime_type
+    return processed, FORMAT_MIME_TYPES[profile.format]
+
+
+async def prepare_image(image_bytes: bytes, mime_type: str) -> Tuple[bytes, str]:
+    if get_profile() is None:
+        return image_bytes, mime_type
+    # Decoding and resampling are CPU-bound; keep them off the event loop
+    return await asyncio.to_thread(preprocess_image, image_bytes, mime_type)
@@ -0,0 +1,386 @@
+"""
+Outbound governor shared by every Gemini call in the process.
+
+Calls pass, in order, through:
+- a circuit breaker that fails fast with a 503 while Gemini is down and lets a few
+  half-open probes through once the cool-down has passed;
+- an AIMD concurrency limit: +1 slot per window of successes, halved on 429/503,
+  with waiters admitted by priority (interactive before background);
+- a token bucket capping the request rate, paused entirely while a Retry-After
+  from Gemini is pending.
+Failed calls are retried with exponential backoff and jitter, or after the server's
+Retry-After when it sent one. Client errors (4xx other than 408/429) are not retried.
+
+Limits are per process; every uvicorn or OCR worker process governs its own calls.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+from collections import Counter
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, List, Optional, TypeVar
+
+import httpx
+from fastapi import HTTPException
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from pydantic import Field
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    NORMAL = 1
+    BACKGROUND = 2
+
+
+# Overrides the per-purpose default for every LLM call made in the current task
+llm_priority: ContextVar[Optional[Priority]] = ContextVar("llm_priority", default=None)
+
+
+@contextmanager
+def llm_priority_scope(priority: Priority) -> Iterator[None]:
+    """Sets `llm_priority` for the calls made inside the block only."""
+    token = llm_priority.set(priority)
+    try:
+        yield
+    finally:
+        llm_priority.reset(token)
+
+
+class LlmUnavailableError(HTTPException):
+    def __init__(self, retry_after: float):
+        super().__init__(
+            status_code=503,
+            detail="LLM temporarily unavailable, please retry shortly",
+            headers={"Retry-After": str(max(1, round(retry_after)))},
+        )
+
+
+# === Error classification ===
+
+RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+OVERLOAD_STATUSES = {429, 503}
+
+
+def error_status(error: BaseException) -> Optional[int]:
+    """HTTP status of a failed call, from google.api_core (`.code`) or httpx (`.response`) errors."""
+    while error is not None:
+        code = getattr(error, "code", None)
+        if isinstance(code, int):
+            return code
+        status = getattr(getattr(error, "response", None), "status_code", None)
+        if isinstance(status, int):
+            return status
+        # langchain_google_genai wraps some API errors; the status is on the cause
+        error = error.__cause__
+    return None
+
+
+def is_retryable(error: BaseException) -> bool:
+    status = error_status(error)
+    if status is not None:
+        return status in RETRYABLE_STATUSES
+    return isinstance(error, (asyncio.TimeoutError, httpx.TransportError, ConnectionError))
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Server-requested delay: an HTTP Retry-After header or a google.rpc.RetryInfo detail."""
+    response = getattr(error, "response", None)
+    header = getattr(response, "headers", {}).get("Retry-After") if response is not None else None
+    if header:
+        try:
+            return float(header)
+        except ValueError:
+            return None
+    try:
+        for detail in getattr(error, "details", None) or []:
+            delay = getattr(detail, "retry_delay", None)
+            if delay is not None:
+                return delay.seconds + delay.nanos / 1e9
+    except Exception:
+        pass
+    return None
+
+
+# === Governor ===
+
+class LlmGovernor:
+    # Halve the limit at most once per window so one burst of 429s counts as one signal
+    DECREASE_COOLDOWN_SECONDS = 1.0
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        min_concurrency: int = 1,
+        initial_concurrency: Optional[int] = None,
+        rate_per_second: float = 0,
+        burst: int = 1,
+        max_retries: int = 3,
+        backoff_base_seconds: float = 0.5,
+        backoff_max_seconds: float = 30.0,
+        failure_threshold: int = 5,
+        open_seconds: float = 30.0,
+        half_open_probes: int = 1,
+    ):
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.limit = float(initial_concurrency or max_concurrency)
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+
+        self.in_flight = 0
+        self._waiters: List[Any] = []
+        self._seq = itertools.count()
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+
+        self.state = "closed"
+        self._opened_at = 0.0
+        self._probes = 0
+        self._consecutive_failures = 0
+
+        self.counts: Counter = Counter()
+
+    # --- circuit breaker ---
+
+    def _admit(self) -> bool:
+        """Raise while the breaker is open; returns True if this call is a half-open probe."""
+        if self.state == "open":
+            remaining = self._opened_at + self.open_seconds - time.monotonic()
+            if remaining > 0:
+                self.counts["rejected"] += 1
+                raise LlmUnavailableError(remaining)
+            self.state = "half_open"
+        if self.state == "half_open":
+            if self._probes >= self.half_open_probes:
+                self.counts["rejected"] += 1
+                raise LlmUnavailableError(1)
+            self._probes += 1
+            return True
+        return False
+
+    def _open(self) -> None:
+        if self.state != "open":
+            logger.warning("LLM circuit opened after %s consecutive failures", self._consecutive_failures)
+            self.counts["breaker_opened"] += 1
+        self.state = "open"
+        self._opened_at = time.monotonic()
+
+    # --- concurrency ---
+
+    async def _acquire(self, priority: Priority) -> None:
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), waiter))
+        self.counts["queued"] += 1
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we were cancelled
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self.in_flight < int(self.limit):
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    # --- rate ---
+
+    async def _wait_for_rate(self) -> None:
+        while True:
+            now = time.monotonic()
+            if now < self._paused_until:
+                await asyncio.sleep(self._paused_until - now)
+                continue
+            if self.rate_per_second <= 0:
+                return
+            self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate_per_second)
+            self._last_refill = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate_per_second)
+
+    # --- outcomes ---
+
+    def record_success(self) -> None:
+        self.counts["successes"] += 1
+        self._consecutive_failures = 0
+        if self.state != "closed":
+            logger.info("LLM circuit closed")
+        self.state = "closed"
+        # Additive increase: about +1 slot once a full window of calls has succeeded.
+        # Only grow while the limit is the bottleneck, or an idle period would inflate it.
+        if self._waiters or self.in_flight >= int(self.limit) - 1:
+            self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+        self._wake()
+
+    def record_failure(self, error: BaseException) -> None:
+        status = error_status(error)
+        if not is_retryable(error):
+            # The service answered; a bad request says nothing about its health
+            self.counts["client_errors"] += 1
+            self._consecutive_failures = 0
+            if self.state == "half_open":
+                self.state = "closed"
+            return
+
+        self.counts["failures"] += 1
+        self._consecutive_failures += 1
+        now = time.monotonic()
+        if status in OVERLOAD_STATUSES:
+            self.counts["throttled"] += 1
+            if now - self._last_decrease >= self.DECREASE_COOLDOWN_SECONDS:
+                self.limit = max(self.min_concurrency, self.limit / 2)
+                self._last_decrease = now
+        retry_after = retry_after_seconds(error)
+        if retry_after:
+            self._paused_until = max(self._paused_until, now + retry_after)
+        if self.state == "half_open" or self._consecutive_failures >= self.failure_threshold:
+            self._open()
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        if retry_after:
+            return retry_after + random.uniform(0, self.backoff_base_seconds)
+        delay = min(self.backoff_max_seconds, self.backoff_base_seconds * 2 ** attempt)
+        return random.uniform(delay / 2, delay)
+
+    # --- entry points ---
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority = Priority.NORMAL) -> AsyncIterator[None]:
+        """One admitted call: breaker check, concurrency slot, then a rate token."""
+        probe = self._admit()
+        try:
+            await self._acquire(priority)
+        except BaseException:
+            if probe:
+                self._probes -= 1
+            raise
+        try:
+            await self._wait_for_rate()
+            self.counts["calls"] += 1
+            yield
+        finally:
+            if probe:
+                self._probes -= 1
+            self._release()
+
+    async def call(self, fn: Callable[[], Awaitable[T]], priority: Priority = Priority.NORMAL) -> T:
+        attempt = 0
+        while True:
+            async with self.slot(priority):
+                try:
+                    result = await fn()
+                except Exception as e:
+                    error = e
+                    self.record_failure(e)
+                else:
+                    self.record_success()
+                    return result
+
+            if not is_retryable(error) or attempt >= self.max_retries:
+                raise error
+            delay = self.backoff(attempt, retry_after_seconds(error))
+            attempt += 1
+            self.counts["retries"] += 1
+            logger.info("LLM call failed with %s, retry %s in %.1fs", error_status(error) or type(error).__name__, attempt, delay)
+            await asyncio.sleep(delay)
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "waiting": sum(1 for _, _, waiter in self._waiters if not waiter.done()),
+            "paused_for_seconds": round(max(0.0, self._paused_until - time.monotonic()), 2),
+            **self.counts,
+        }
+
+
+llm_governor = LlmGovernor(
+    max_concurrency=settings.llm_max_concurrency,
+    min_concurrency=settings.llm_min_concurrency,
+    initial_concurrency=settings.llm_initial_concurrency,
+    rate_per_second=settings.llm_rate_limit_per_second,
+    burst=settings.llm_rate_limit_burst,
+    max_retries=settings.llm_max_retries,
+    backoff_base_seconds=settings.llm_backoff_base_seconds,
+    backoff_max_seconds=settings.llm_backoff_max_seconds,
+    failure_threshold=settings.llm_breaker_failure_threshold,
+    open_seconds=settings.llm_breaker_open_seconds,
+    half_open_probes=settings.llm_breaker_half_open_probes,
+)
+
+
+# === Chat model wrapper ===
+
+class GovernedChatModel(BaseChatModel):
+    """
+    Runs every async generate/stream of `inner` through the governor, so prompt | llm
+    chains and output-fixing parsers are governed without changes at the call site.
+    Sync calls raise NotImplementedError rather than bypass the governor.
+    A stream holds its slot until it finishes and is not retried once it has started.
+    """
+
+    inner: BaseChatModel
+    governor: Any = Field(exclude=True)
+    default_priority: Priority = Priority.NORMAL
+
+    @property
+    def _llm_type(self) -> str:
+        return f"governed-{self.inner._llm_type}"
+
+    def priority(self) -> Priority:
+        priority = llm_priority.get()
+        return self.default_priority if priority is None else priority
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs) -> ChatResult:
+        # The governor's slots and rate tokens live on the event loop; a sync call would bypass them all
+        raise NotImplementedError("Governed models are async only; use ainvoke/astream")
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs) -> ChatResult:
+        return await self.governor.call(
+            lambda: self.inner._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs),
+            self.priority(),
+        )
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs) -> AsyncIterator[ChatGenerationChunk]:
+        async with self.governor.slot(self.priority()):
+            try:
+                async for chunk in self.inner._astream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                    yield chunk
+            except Exception as e:
+                self.governor.record_failure(e)
+                raise
+            self.governor.record_success()
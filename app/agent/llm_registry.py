@@ -0,0 +1,119 @@
+"""
+Shared Gemini chat clients for every agent.
+
+Each (purpose, model, temperature) gets one long-lived ChatGoogleGenerativeAI, so
+repeat calls reuse the same gRPC channel instead of rebuilding the client and
+reconnecting per request. The registry is filled in the app lifespan; anything asked
+for later (CLI scripts) is created on first use. Building a client makes no request.
+With LLM_WARMUP_ENABLED, startup also sends each client one billed "ping" completion
+so its channel is open before the first real call; it is off by default.
+Clients are handed out wrapped in GovernedChatModel so all calls share llm_governor.
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from langchain_google_genai import ChatGoogleGenerativeAI
+from pydantic import BaseModel
+
+from app.agent.llm_governor import GovernedChatModel, Priority, llm_governor
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "gemini-2.5-flash"
+
+
+class LlmSpec(BaseModel):
+    model: str = DEFAULT_MODEL
+    temperature: Optional[float] = None
+    # Default governor priority; callers can override it with llm_priority
+    priority: Priority = Priority.NORMAL
+
+
+PURPOSES: Dict[str, LlmSpec] = {
+    "ocr": LlmSpec(priority=Priority.INTERACTIVE),
+    "scoring": LlmSpec(),
+    "summary": LlmSpec(temperature=0.3),
+    "email": LlmSpec(priority=Priority.INTERACTIVE),
+}
+
+ClientKey = Tuple[str, str, Optional[float]]
+
+
+def build_chat_model(model: str, temperature: Optional[float]) -> ChatGoogleGenerativeAI:
+    kwargs = {"temperature": temperature} if temperature is not None else {}
+    return ChatGoogleGenerativeAI(
+        model=model,
+        google_api_key=settings.gemini_api_key,
+        **kwargs,
+    )
+
+
+class LlmRegistry:
+    def __init__(self):
+        self._clients: Dict[ClientKey, GovernedChatModel] = {}
+        self._warmup_ms: Dict[ClientKey, Optional[float]] = {}
+        self._lock = threading.Lock()
+
+    def key(self, purpose: str, model: Optional[str] = None, temperature: Optional[float] = None) -> ClientKey:
+        spec = PURPOSES.get(purpose, LlmSpec())
+        return (
+            purpose,
+            model or spec.model,
+            temperature if temperature is not None else spec.temperature,
+        )
+
+    def get(self, purpose: str, model: Optional[str] = None, temperature: Optional[float] = None) -> GovernedChatModel:
+        key = self.key(purpose, model, temperature)
+        client = self._clients.get(key)
+        if client is None:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None:
+                    client = GovernedChatModel(
+                        inner=build_chat_model(key[1], key[2]),
+                        governor=llm_governor,
+                        default_priority=PURPOSES.get(purpose, LlmSpec()).priority,
+                    )
+                    self._clients[key] = client
+        return client
+
+    def create_all(self, purposes: Optional[Iterable[str]] = None) -> None:
+        for purpose in purposes or PURPOSES:
+            self.get(purpose)
+
+    async def _warm(self, key: ClientKey) -> None:
+        start = time.perf_counter()
+        try:
+            # One tiny request opens the async channel and completes the TLS handshake up front.
+            await asyncio.wait_for(self._clients[key].ainvoke("ping"), settings.llm_warmup_timeout_seconds)
+            self._warmup_ms[key] = round((time.perf_counter() - start) * 1000, 1)
+        except Exception as e:
+            # A cold client still works; it just pays the connection cost on its first real call.
+            logger.warning("LLM warm-up failed for %s: %s", key, type(e).__name__)
+            self._warmup_ms[key] = None
+
+    async def warm_up(self, purposes: Optional[Iterable[str]] = None) -> None:
+        self.create_all(purposes)
+        keys = [self.key(purpose) for purpose in purposes or PURPOSES]
+        await asyncio.gather(*(self._warm(key) for key in keys))
+
+    def stats(self) -> dict:
+        return {
+            "clients": [
+                {
+                    "purpose": purpose,
+                    "model": model,
+                    "temperature": temperature,
+                    "warm": self._warmup_ms.get((purpose, model, temperature)) is not None,
+                    "warmup_ms": self._warmup_ms.get((purpose, model, temperature)),
+                }
+                for purpose, model, temperature in self._clients
+            ],
+        }
+
+
+llm_registry = LlmRegistry()
@@ -1,10 +1,11 @@
 import logging
 import re
-from typing import Optional, Dict
+from typing import AsyncIterator, Optional, Dict, List, Tuple
 
+from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.messages import HumanMessage
-from langchain_google_genai import ChatGoogleGenerativeAI
-from app.core.config import settings
+from app.agent.llm_registry import llm_registry
+from app.services.semantic_cache import fill_template, lead_substitutions, semantic_cache, templatize
 
 logger = logging.getLogger(__name__)
 
@@ -18,30 +19,27 @@ def text_to_html(text: str) -> str:
     return "<html><body>" + "\n".join(html_lines) + "</body></html>"
 
 
-# === AI Agent: Generate personalized email ===
-async def generate_email_body(
+FALLBACK_EMAIL = "Hi there,\n\nThank you for your time. We’ll follow up with more details soon.\n\nWarmly,\nThe Team"
+
+
+def get_email_llm() -> BaseChatModel:
+    return llm_registry.get("email")
+
+
+# === Prompt: shared by the blocking and streaming generators ===
+def build_email_prompt(
     name: str,
     transcript: str,
     extra_info: Optional[Dict[str, str]] = None
-) -> dict:
+) -> Optional[str]:
     """
-    Generate a personalized email using name, transcript, and optional extra info like job_title, company, etc.
-    Returns both plain text and HTML versions of the email.
-    Only return a generic fallback if ALL fields (name, transcript, extra_info) are empty or None.
+    Build the email prompt, or return None when name, transcript and extra_info are all empty
+    and the generic fallback should be used instead.
     """
-    llm = ChatGoogleGenerativeAI(
-        model="gemini-2.5-flash",
-        google_api_key=settings.gemini_api_key,
-    )
-
     extra_info = extra_info or {}
     has_extra_info = any(v for v in extra_info.values())
     if not (name or transcript or has_extra_info):
-        fallback = "Hi there,\n\nThank you for your time. We’ll follow up with more details soon.\n\nWarmly,\nThe Team"
-        return {
-            "text": fallback,
-            "html": text_to_html(fallback)
-        }
+        return None
 
     info_block = f"Name: {name}\n" if name else ""
     for key, value in extra_info.items():
@@ -49,7 +47,7 @@ async def generate_email_body(
             info_block += f"{key.replace('_', ' ').title()}: {value}\n"
 
     if transcript:
-        prompt = (
+        return (
             f"You are a helpful assistant writing personalized follow-up emails for a company.\n"
             f"Use the user's transcript and the provided information to craft a warm, thoughtful, and specific email.\n\n"
             f"Requirements:\n"
@@ -61,26 +59,80 @@ async def generate_email_body(
             f"Context:\n{info_block}\nTranscript:\n\"{transcript}\"\n\n"
             f"Return only the email body text."
         )
-    else:
-        prompt = (
-            f"You are a helpful assistant writing outreach emails for a company.\n"
-            f"The user may have shown interest in our product or service.\n\n"
-            f"Requirements:\n"
-            f"- Start with: 'Hi {name},'\n" if name else "- Start with a friendly greeting.\n"
-            f"- Write 3–5 friendly, engaging sentences as if you noticed they might be interested in our product or service, and you want to reach out.\n"
-            f"- If available, reference their company, job title, or name, but do not mention missing information.\n"
-            f"- End with a kind sign-off like 'Warmly, The Team'\n"
-            f"- Output must be plain text only. No HTML. No markdown. No subject line.\n"
-            f"- Never ask for more information, never reference missing data, and never mention the process.\n\n"
-            f"Context:\n{info_block}\n\n"
-            f"Return only the email body text."
-        )
+    return (
+        f"You are a helpful assistant writing outreach emails for a company.\n"
+        f"The user may have shown interest in our product or service.\n\n"
+        f"Requirements:\n"
+        f"- Start with: 'Hi {name},'\n" if name else "- Start with a friendly greeting.\n"
+        f"- Write 3–5 friendly, engaging sentences as if you noticed they might be interested in our product or service, and you want to reach out.\n"
+        f"- If available, reference their company, job title, or name, but do not mention missing information.\n"
+        f"- End with a kind sign-off like 'Warmly, The Team'\n"
+        f"- Output must be plain text only. No HTML. No markdown. No subject line.\n"
+        f"- Never ask for more information, never reference missing data, and never mention the process.\n\n"
+        f"Context:\n{info_block}\n\n"
+        f"Return only the email body text."
+    )
+
+
+# === Semantic cache: reuse emails written for near-identical conversations ===
+def email_cache_key(
+    name: str,
+    transcript: str,
+    extra_info: Optional[Dict[str, str]] = None
+) -> Tuple[str, str, List[Tuple[str, str]]]:
+    """
+    Lead-neutral transcript, variant and substitutions for the semantic cache.
+    The variant records which lead fields are present, since the prompt (and so the
+    email) differs by them; emails are only reused within the same variant.
+    """
+    substitutions = lead_substitutions(name, extra_info)
+    variant = "".join("1" if value.strip() else "0" for _, value in sorted(substitutions))
+    return templatize(transcript, substitutions), variant, substitutions
+
+
+async def cached_email(name: str, transcript: str, extra_info: Optional[Dict[str, str]] = None) -> Optional[str]:
+    text, variant, substitutions = email_cache_key(name, transcript, extra_info)
+    # Only a template this lead can fill counts as a hit
+    return await semantic_cache.lookup("email", text, variant, transform=lambda template: fill_template(template, substitutions))
+
+
+async def remember_email(name: str, transcript: str, extra_info: Optional[Dict[str, str]], email_text: str) -> None:
+    text, variant, substitutions = email_cache_key(name, transcript, extra_info)
+    await semantic_cache.store("email", text, templatize(email_text, substitutions), variant)
+
+
+# === AI Agent: Generate personalized email ===
+async def generate_email_body(
+    name: str,
+    transcript: str,
+    extra_info: Optional[Dict[str, str]] = None
+) -> dict:
+    """
+    Generate a personalized email using name, transcript, and optional extra info like job_title, company, etc.
+    Returns both plain text and HTML versions of the email.
+    Only return a generic fallback if ALL fields (name, transcript, extra_info) are empty or None.
+    """
+    prompt = build_email_prompt(name, transcript, extra_info)
+    if prompt is None:
+        return {
+            "text": FALLBACK_EMAIL,
+            "html": text_to_html(FALLBACK_EMAIL)
+        }
+
+    cached = await cached_email(name, transcript, extra_info)
+    if cached:
+        return {
+            "text": cached,
+            "html": text_to_html(cached)
+        }
 
     try:
-        response = await llm.ainvoke([HumanMessage(content=prompt)])
+        response = await get_email_llm().ainvoke([HumanMessage(content=prompt)])
         plain_text = response.content.strip() if response and response.content else ""
         if not plain_text:
-            plain_text = "Hi there,\n\nThank you for your time. We’ll follow up with more details soon.\n\nWarmly,\nThe Team"
+            plain_text = FALLBACK_EMAIL
+        else:
+            await remember_email(name, transcript, extra_info, plain_text)
         html_version = text_to_html(plain_text)
         return {
             "text": plain_text,
@@ -89,8 +141,45 @@ async def generate_email_body(
 
     except Exception as e:
         logger.exception("Personalized email generation failed")
-        fallback = "Hi there,\n\nThank you for your time. We’ll follow up with more details soon.\n\nWarmly,\nThe Team"
         return {
-            "text": fallback,
-            "html": text_to_html(fallback)
+            "text": FALLBACK_EMAIL,
+            "html": text_to_html(FALLBACK_EMAIL)
         }
+
+
+# === AI Agent: Stream personalized email ===
+async def stream_email_body(
+    name: str,
+    transcript: str,
+    extra_info: Optional[Dict[str, str]] = None
+) -> AsyncIterator[str]:
+    """
+    Same prompt as generate_email_body, but yields text chunks as Gemini produces them.
+    Yields the fallback email when there is nothing to personalize or the model fails before
+    producing any text; a failure mid-stream ends the stream with what was already sent.
+    """
+    prompt = build_email_prompt(name, transcript, extra_info)
+    if prompt is None:
+        yield FALLBACK_EMAIL
+        return
+
+    cached = await cached_email(name, transcript, extra_info)
+    if cached:
+        yield cached
+        return
+
+    parts = []
+    try:
+        async for chunk in get_email_llm().astream([HumanMessage(content=prompt)]):
+            text = chunk.content if isinstance(chunk.content, str) else ""
+            if text:
+                parts.append(text)
+                yield text
+    except Exception:
+        logger.exception("Personalized email streaming failed")
+    else:
+        if parts:
+            await remember_email(name, transcript, extra_info, "".join(parts).strip())
+
+    if not parts:
+        yield FALLBACK_EMAIL
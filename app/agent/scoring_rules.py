@@ -0,0 +1,103 @@
+import json
+import logging
+import re
+from functools import lru_cache
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# === Rule Schema ===
+
+class ScoringRule(BaseModel):
+    """
+    A deterministic scoring rule. Every condition that is set must match
+    (keyword lists match if any keyword appears in the field).
+    """
+    name: str
+    interest_score: float = Field(..., ge=0.0, le=1.0)
+    reason: str
+    empty_card: bool = False
+    job_title_keywords: List[str] = Field(default_factory=list)
+    company_keywords: List[str] = Field(default_factory=list)
+    email_domains: List[str] = Field(default_factory=list)
+
+
+DEFAULT_RULES = [
+    ScoringRule(
+        name="empty_card",
+        interest_score=0.0,
+        reason="No name, company, title or contact details could be read from the card.",
+        empty_card=True,
+    ),
+    ScoringRule(
+        name="student",
+        interest_score=0.1,
+        reason="Student or intern – unlikely to own a B2B gifting or marketing budget.",
+        job_title_keywords=["student", "intern", "undergraduate", "graduate assistant", "phd candidate"],
+    ),
+]
+
+# === Lead Feature Helpers ===
+
+def normalize_text(value) -> str:
+    if not value:
+        return ""
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s]", " ", str(value).lower())).strip()
+
+
+def lead_domain(lead_data: dict) -> str:
+    """Company domain from the first email, falling back to the website host."""
+    for email in lead_data.get("emails") or []:
+        if "@" in email:
+            return email.rsplit("@", 1)[1].strip().lower()
+    website = (lead_data.get("website") or "").strip().lower()
+    website = re.sub(r"^https?://", "", website).split("/", 1)[0]
+    return website[4:] if website.startswith("www.") else website
+
+
+def is_empty_card(lead_data: dict) -> bool:
+    return not any(
+        lead_data.get(field)
+        for field in ("full_name", "company", "job_title", "emails", "phones", "website")
+    )
+
+# === Rule Evaluation ===
+
+def rule_matches(rule: ScoringRule, lead_data: dict) -> bool:
+    if rule.empty_card and not is_empty_card(lead_data):
+        return False
+    if rule.job_title_keywords:
+        title = normalize_text(lead_data.get("job_title"))
+        if not any(re.search(rf"\b{re.escape(k.lower())}\b", title) for k in rule.job_title_keywords):
+            return False
+    if rule.company_keywords:
+        company = normalize_text(lead_data.get("company"))
+        if not any(re.search(rf"\b{re.escape(k.lower())}\b", company) for k in rule.company_keywords):
+            return False
+    if rule.email_domains and lead_domain(lead_data) not in {d.lower() for d in rule.email_domains}:
+        return False
+    # A rule with no conditions never matches
+    return rule.empty_card or bool(rule.job_title_keywords or rule.company_keywords or rule.email_domains)
+
+
+@lru_cache()
+def get_scoring_rules() -> List[ScoringRule]:
+    """Rules from LEAD_SCORING_RULES_PATH (a JSON list of rules) or the built-in defaults."""
+    if not settings.lead_scoring_rules_path:
+        return DEFAULT_RULES
+    with open(settings.lead_scoring_rules_path, encoding="utf-8") as f:
+        rules = [ScoringRule(**rule) for rule in json.load(f)]
+    logger.info("Loaded %s lead scoring rules from %s", len(rules), settings.lead_scoring_rules_path)
+    return rules
+
+
+def apply_scoring_rules(lead_data: dict, rules: Optional[List[ScoringRule]] = None) -> Optional[ScoringRule]:
+    """Returns the first rule that decides this lead, or None if the LLM should score it."""
+    for rule in rules if rules is not None else get_scoring_rules():
+        if rule_matches(rule, lead_data):
+            return rule
+    return None
@@ -1,14 +1,14 @@
+import asyncio
+from typing import List, Optional
+
 from langchain.prompts import ChatPromptTemplate
+from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.output_parsers import StrOutputParser
-from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+from app.agent.llm_registry import llm_registry
 from app.core.config import settings
-
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.5-flash",
-    google_api_key=settings.gemini_api_key,
-    temperature=0.3,
-)
+from app.services.semantic_cache import semantic_cache
 
 prompt = ChatPromptTemplate.from_template(
     """
@@ -18,12 +18,117 @@ prompt = ChatPromptTemplate.from_template(
     """
 )
 
+map_prompt = ChatPromptTemplate.from_template(
+    """
+    The following is part {part} of {total} of a longer conversation at a trade-show booth.
+    Summarize this part in a few sentences, keeping every detail about the user's interest in the product:
+    products or features discussed, questions, objections, budget or timeline, and requested follow-ups.
+
+    {transcript}
+    """
+)
+
+reduce_prompt = ChatPromptTemplate.from_template(
+    """
+    The following are summaries of consecutive parts of one conversation.
+    Combine them into a single paragraph focusing on the user's interest in the product:
+
+    {summaries}
+    """
+)
+
+update_prompt = ChatPromptTemplate.from_template(
+    """
+    The following is a summary, so far, of a conversation at a trade-show booth, focusing on the user's interest in the product:
+
+    {summary}
+
+    The conversation then continued:
+
+    {transcript}
+
+    Update the summary with anything new about the user's interest in the product, as a single paragraph:
+    """
+)
+
 parser = StrOutputParser()
-summarize_chain = prompt | llm | parser
+
+# Rough token estimate for English text; avoids a count_tokens round trip per transcript
+CHARS_PER_TOKEN = 4
 
 
-async def summarize_interest(transcript: str) -> str:
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN
+
+
+def split_transcript(transcript: str) -> List[str]:
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=settings.summary_chunk_tokens * CHARS_PER_TOKEN,
+        chunk_overlap=settings.summary_chunk_overlap_tokens * CHARS_PER_TOKEN,
+        separators=["\n\n", "\n", ". ", "? ", "! ", " ", ""],
+    )
+    return splitter.split_text(transcript)
+
+
+async def summarize_single(transcript: str, chat_model: Optional[BaseChatModel] = None) -> str:
+    chain = prompt | (chat_model or llm_registry.get("summary")) | parser
+    return await chain.ainvoke({"transcript": transcript})
+
+
+async def summarize_map_reduce(transcript: str, chat_model: Optional[BaseChatModel] = None) -> str:
+    """
+    Summarizes token-budgeted chunks in parallel (bounded by SUMMARY_MAX_CONCURRENCY),
+    then reduces the partial summaries. Reduces recursively if they are still too long.
+    """
+    chat_model = chat_model or llm_registry.get("summary")
+    map_chain = map_prompt | chat_model | parser
+    reduce_chain = reduce_prompt | chat_model | parser
+    semaphore = asyncio.Semaphore(settings.summary_max_concurrency)
+
+    chunks = split_transcript(transcript)
+
+    async def summarize_chunk(part: int, chunk: str) -> str:
+        async with semaphore:
+            return await map_chain.ainvoke({"part": part, "total": len(chunks), "transcript": chunk})
+
+    partials = await asyncio.gather(*(summarize_chunk(i, chunk) for i, chunk in enumerate(chunks, start=1)))
+    summaries = "\n\n".join(f"Part {i}: {summary}" for i, summary in enumerate(partials, start=1))
+
+    if len(chunks) > 1 and estimate_tokens(summaries) > settings.summary_map_reduce_threshold_tokens:
+        return await summarize_map_reduce(summaries, chat_model)
+    return await reduce_chain.ainvoke({"summaries": summaries})
+
+
+async def summarize_interest(transcript: str, chat_model: Optional[BaseChatModel] = None) -> str:
+    long_transcript = estimate_tokens(transcript) > settings.summary_map_reduce_threshold_tokens
+    # Short booth conversations repeat; long ones that need map-reduce practically never do
+    use_cache = chat_model is None and not long_transcript
+    if use_cache:
+        cached = await semantic_cache.lookup("summary", transcript)
+        if cached is not None:
+            return cached
+
+    try:
+        if long_transcript:
+            return await summarize_map_reduce(transcript, chat_model)
+        summary = await summarize_single(transcript, chat_model)
+    except Exception as e:
+        return f"Summary unavailable: {str(e)}"
+
+    if use_cache:
+        await semantic_cache.store("summary", transcript, summary)
+    return summary
+
+
+async def update_summary(summary: str, new_transcript: str, chat_model: Optional[BaseChatModel] = None) -> str:
+    """
+    Extends an existing summary with the part of the conversation that came after it,
+    so a growing transcript is never re-sent in full. Long new parts are condensed first.
+    """
     try:
-        return await summarize_chain.ainvoke({"transcript": transcript})
+        if estimate_tokens(new_transcript) > settings.summary_map_reduce_threshold_tokens:
+            new_transcript = await summarize_map_reduce(new_transcript, chat_model)
+        chain = update_prompt | (chat_model or llm_registry.get("summary")) | parser
+        return await chain.ainvoke({"summary": summary, "transcript": new_transcript})
     except Exception as e:
         return f"Summary unavailable: {str(e)}"
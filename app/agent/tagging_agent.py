@@ -1,7 +1,12 @@
+import asyncio
 import json
 import logging
-from functools import lru_cache
-from typing import Optional
+import re
+from collections import Counter
+from functools import lru_cache, partial
+from typing import List, Optional, Tuple
+
+from cachetools import TTLCache
 
 from fastapi import HTTPException
 from langchain.output_parsers import OutputFixingParser
@@ -12,7 +17,11 @@ from langchain_core.output_parsers.base import BaseOutputParser
 from langchain_google_genai import ChatGoogleGenerativeAI
 from pydantic import BaseModel
 
+from app.agent.llm_governor import LlmUnavailableError
+from app.agent.llm_registry import llm_registry
+from app.agent.scoring_rules import apply_scoring_rules, lead_domain, normalize_text
 from app.core.config import settings
+from app.services.micro_batcher import MicroBatcher
 
 logger = logging.getLogger(__name__)
 
@@ -22,14 +31,31 @@ class InterestScoreResult(BaseModel):
     interest_score: float
     reason: str
 
+class InterestScoreBatch(BaseModel):
+    results: List[InterestScoreResult]
+
+# Gemini response schemas (google.ai.generativelanguage Schema, hence `type_`)
+INTEREST_SCORE_RESPONSE_SCHEMA = {
+    "type_": "OBJECT",
+    "properties": {
+        "interest_score": {"type_": "NUMBER"},
+        "reason": {"type_": "STRING"},
+    },
+    "required": ["interest_score", "reason"],
+}
+
+INTEREST_SCORE_BATCH_RESPONSE_SCHEMA = {
+    "type_": "OBJECT",
+    "properties": {
+        "results": {"type_": "ARRAY", "items": INTEREST_SCORE_RESPONSE_SCHEMA},
+    },
+    "required": ["results"],
+}
+
 # === LLM + Parser Factories ===
 
-@lru_cache()
-def get_llm() -> ChatGoogleGenerativeAI:
-    return ChatGoogleGenerativeAI(
-        model="gemini-2.5-flash",
-        google_api_key=settings.gemini_api_key,
-    )
+def get_llm() -> BaseChatModel:
+    return llm_registry.get("scoring")
 
 @lru_cache()
 def get_interest_score_output_parser() -> OutputFixingParser:
@@ -39,9 +65,11 @@ def get_interest_score_output_parser() -> OutputFixingParser:
 
 # === Prompt ===
 
+COMPANY_CONTEXT = "You are an AI assistant for DelightLoop, a B2B growth-marketing company that blends AI automation with human curation to scale personalized physical gifting across the customer journey. DelightLoop's core product is an AI-powered gifting platform called 'Gifty' that analyzes CRM data, psychographic signals, and purchase intent to identify high-value prospects or at-risk customers. Gifty selects personalized gifts, orchestrates handwritten notes, handles procurement and international logistics from warehouses across Asia, the US, and Europe, and triggers follow-ups tied to buyer actions—all fully integrated into existing CRM and GTM tools. The goal is to amplify pipeline growth, accelerate deal closures, and reduce churn by turning gifting into a measurable, automated campaign rather than a one-off gesture."
+
 def build_prompt_for_interest_score(lead_data: dict) -> str:
     return f"""
-You are an AI assistant for DelightLoop, a B2B growth-marketing company that blends AI automation with human curation to scale personalized physical gifting across the customer journey. DelightLoop's core product is an AI-powered gifting platform called 'Gifty' that analyzes CRM data, psychographic signals, and purchase intent to identify high-value prospects or at-risk customers. Gifty selects personalized gifts, orchestrates handwritten notes, handles procurement and international logistics from warehouses across Asia, the US, and Europe, and triggers follow-ups tied to buyer actions—all fully integrated into existing CRM and GTM tools. The goal is to amplify pipeline growth, accelerate deal closures, and reduce churn by turning gifting into a measurable, automated campaign rather than a one-off gesture.
+{COMPANY_CONTEXT}
 
 Here's the lead card information in JSON:
 {json.dumps(lead_data, ensure_ascii=False, indent=2)}
@@ -59,6 +87,103 @@ Respond with only JSON in this format:
 Do not add explanations or extra output.
 """
 
+def build_prompt_for_batch_interest_score(leads: List[dict]) -> str:
+    return f"""
+{COMPANY_CONTEXT}
+
+Here are {len(leads)} lead cards as a JSON array:
+{json.dumps(leads, ensure_ascii=False, indent=2)}
+
+Score each lead independently. Return a JSON object with a "results" array containing exactly {len(leads)} objects, in the same order as the leads, each with:
+- "interest_score": float from 0.0 (no fit) to 1.0 (perfect fit)
+- "reason": short, clear justification for the score (1-2 sentences max)
+
+Respond with only JSON in this format:
+{{
+  "results": [
+    {{"interest_score": 0.85, "reason": "CTO at a SaaS company – strong fit for AI-powered gifting platform."}}
+  ]
+}}
+
+Do not add explanations or extra output.
+"""
+
+# === Tiered Output Parsing ===
+
+# How often each parsing tier produced the result: strict JSON, the local tolerant
+# parser, or the OutputFixingParser (which costs a second LLM round trip)
+parse_tier_counts: Counter = Counter()
+
+
+def _strip_to_json(text: str, opener: str, closer: str) -> str:
+    cleaned = re.sub(r"^```(?:json)?|```$", "", text.strip(), flags=re.MULTILINE).strip()
+    start, end = cleaned.find(opener), cleaned.rfind(closer)
+    return cleaned[start:end + 1] if start != -1 and end > start else cleaned
+
+
+def coerce_score(value) -> float:
+    """Accepts 0.85, "0.85", "85%", 8.5 (out of 10) or 85 (out of 100); clamps to [0, 1]."""
+    if isinstance(value, str):
+        text = value.strip()
+        percent = text.endswith("%")
+        value = float(text.rstrip("%").strip())
+        if percent:
+            value /= 100
+    value = float(value)
+    if 1.0 < value <= 10.0:
+        value /= 10
+    elif 10.0 < value <= 100.0:
+        value /= 100
+    return min(max(value, 0.0), 1.0)
+
+
+def tolerant_parse_interest_score(data) -> InterestScoreResult:
+    if isinstance(data, str):
+        data = json.loads(_strip_to_json(data, "{", "}"))
+    return InterestScoreResult(
+        interest_score=coerce_score(data["interest_score"]),
+        reason=str(data.get("reason") or "").strip(),
+    )
+
+
+def tolerant_parse_interest_score_batch(text: str) -> List[InterestScoreResult]:
+    cleaned = re.sub(r"^```(?:json)?|```$", "", text.strip(), flags=re.MULTILINE).strip()
+    if cleaned.startswith("["):
+        items = json.loads(_strip_to_json(cleaned, "[", "]"))
+    else:
+        items = json.loads(_strip_to_json(cleaned, "{", "}"))["results"]
+    return [tolerant_parse_interest_score(item) for item in items]
+
+
+async def parse_interest_score(text: str, fixer: BaseOutputParser) -> InterestScoreResult:
+    try:
+        result = InterestScoreResult.model_validate_json(text)
+        if 0.0 <= result.interest_score <= 1.0:
+            parse_tier_counts["strict"] += 1
+            return result
+    except ValueError:
+        pass
+
+    try:
+        result = tolerant_parse_interest_score(text)
+        parse_tier_counts["tolerant"] += 1
+        return result
+    except (ValueError, KeyError, TypeError):
+        pass
+
+    # Last resort: ask the LLM to repair its own output
+    result = await fixer.ainvoke(text)
+    parse_tier_counts["fixer"] += 1
+    return result
+
+
+def structured_output_kwargs(llm: BaseChatModel, schema: dict) -> dict:
+    """Asks Gemini for schema-constrained JSON; other chat models get the prompt alone."""
+    # Registry clients are governed wrappers; the generation config is for the Gemini model inside
+    if not settings.lead_score_structured_output or not isinstance(getattr(llm, "inner", llm), ChatGoogleGenerativeAI):
+        return {}
+    return {"generation_config": {"response_mime_type": "application/json", "response_schema": schema}}
+
 # === Main Agent Function ===
 
 async def score_lead_interest_with_ai(
@@ -71,10 +196,17 @@ async def score_lead_interest_with_ai(
     llm = llm or get_llm()
     parser = parser or get_interest_score_output_parser()
 
+    result = None
     try:
-        result = await llm.ainvoke([HumanMessage(content=prompt)])
-        structured_output = await parser.ainvoke(result.content)
+        result = await llm.ainvoke(
+            [HumanMessage(content=prompt)],
+            **structured_output_kwargs(llm, INTEREST_SCORE_RESPONSE_SCHEMA),
+        )
+        structured_output = await parse_interest_score(result.content, parser)
         return structured_output.dict()
+    except LlmUnavailableError:
+        # Keep the governor's 503 and Retry-After
+        raise
     except Exception as e:
         logger.exception("Error scoring lead interest")
         raise HTTPException(
@@ -85,3 +217,121 @@ async def score_lead_interest_with_ai(
                 "raw_output": getattr(result, "content", None),
             },
         )
+
+async def score_leads_batch_with_ai(
+    leads: List[dict],
+    llm: Optional[BaseChatModel] = None,
+) -> List[dict]:
+    """
+    Scores several leads with one LLM call. If the reply can't be parsed into one
+    result per lead, each lead is scored on its own instead, and a lead that still
+    fails gets its exception in place of a result.
+    """
+    if len(leads) == 1:
+        return [await score_lead_interest_with_ai(leads[0], llm=llm)]
+
+    llm = llm or get_llm()
+
+    try:
+        result = await llm.ainvoke(
+            [HumanMessage(content=build_prompt_for_batch_interest_score(leads))],
+            **structured_output_kwargs(llm, INTEREST_SCORE_BATCH_RESPONSE_SCHEMA),
+        )
+        results = tolerant_parse_interest_score_batch(result.content)
+        if len(results) != len(leads):
+            raise ValueError(f"Expected {len(leads)} scores, got {len(results)}")
+        return [item.dict() for item in results]
+    except LlmUnavailableError:
+        # Per-lead calls would only be turned away too
+        raise
+    except Exception as e:
+        logger.warning("Batched lead scoring failed (%s), scoring %s leads individually", e, len(leads))
+        scoring_path_counts["batch_fallback"] += 1
+        return list(await asyncio.gather(
+            *(score_lead_interest_with_ai(lead, llm=llm) for lead in leads),
+            return_exceptions=True,
+        ))
+
+
+# Collects concurrent LLM scoring requests into one prompt per window
+score_batcher: MicroBatcher[dict, dict] = MicroBatcher(
+    score_leads_batch_with_ai,
+    window_ms=settings.lead_score_batch_window_ms,
+    max_batch_size=settings.lead_score_batch_max_size,
+    name="lead_scoring",
+)
+
+
+async def _score_with_llm(lead_data: dict) -> dict:
+    if settings.lead_score_batch_max_size > 1:
+        return await score_batcher.submit(lead_data)
+    return await score_lead_interest_with_ai(lead_data)
+
+# === Fast Path: Rules + Score Cache ===
+
+# LRU with per-entry TTL, keyed on normalized (company, job_title, domain)
+_score_cache: TTLCache = TTLCache(maxsize=settings.lead_score_cache_size, ttl=settings.lead_score_cache_ttl_seconds)
+_inflight_scores: dict = {}
+scoring_path_counts: Counter = Counter()
+
+
+def score_cache_key(lead_data: dict) -> Optional[Tuple[str, str, str]]:
+    key = (
+        normalize_text(lead_data.get("company")),
+        normalize_text(lead_data.get("job_title")),
+        lead_domain(lead_data),
+    )
+    return key if any(key) else None
+
+
+def _store_score(key: Tuple[str, str, str], task: asyncio.Task) -> None:
+    _inflight_scores.pop(key, None)
+    if not task.cancelled() and task.exception() is None:
+        _score_cache[key] = task.result()
+
+
+async def score_lead_interest(lead_data: dict) -> dict:
+    """
+    Scores a lead through the cheapest path that can answer it: deterministic rules,
+    then the score cache (joining an identical in-flight LLM call if there is one),
+    then the LLM. The result's `source` says which path answered.
+    """
+    if settings.lead_scoring_rules_enabled:
+        rule = apply_scoring_rules(lead_data)
+        if rule:
+            scoring_path_counts["rule"] += 1
+            return {"interest_score": rule.interest_score, "reason": rule.reason, "source": f"rule:{rule.name}"}
+
+    key = score_cache_key(lead_data)
+    if key is None:
+        scoring_path_counts["llm"] += 1
+        return {**await _score_with_llm(lead_data), "source": "llm"}
+
+    cached = _score_cache.get(key)
+    if cached is not None:
+        scoring_path_counts["cache"] += 1
+        return {**cached, "source": "cache"}
+
+    task = _inflight_scores.get(key)
+    if task is None:
+        source = "llm"
+        task = asyncio.ensure_future(_score_with_llm(lead_data))
+        _inflight_scores[key] = task
+        task.add_done_callback(partial(_store_score, key))
+    else:
+        source = "inflight"
+    scoring_path_counts[source] += 1
+
+    # Shielded so one cancelled request doesn't cancel the call other requests are waiting on
+    return {**await asyncio.shield(task), "source": source}
+
+
+def scoring_stats() -> dict:
+    return {
+        "paths": dict(scoring_path_counts),
+        "cache_entries": len(_score_cache),
+        "cache_max_entries": _score_cache.maxsize,
+        "cache_ttl_seconds": _score_cache.ttl,
+        "batching": score_batcher.stats(),
+        "parse_tiers": dict(parse_tier_counts),
+    }
@@ -1,62 +1,227 @@
 import asyncio
 import json
 import logging
+import time
+from typing import Optional
+from uuid import UUID
 
 from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect
 from websockets.client import connect
 from websockets.http import Headers
 
 from app.core.config import settings
+from app.services.audio_proxy import audio_proxy_registry, is_final_result
+from app.services.live_session import LiveSession
+from app.services.transcript_fanout import TranscriptPublisher, control_message, transcript_hub
+from app.services.vad import StreamingVad
 
 router = APIRouter(tags=["/v1/audio"])
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("audio")
 
+# Deepgram closes a live stream that gets no audio for about 10 seconds
+KEEPALIVE = json.dumps({"type": "KeepAlive"})
+
 @router.websocket("/ws/client")
-async def websocket_client(websocket: WebSocket, session_id: str = Query(None)):
-    logger.info("[AUDIO] WebSocket client connected")
+async def websocket_client(
+    websocket: WebSocket,
+    session_id: str = Query(None),
+    draft_email: Optional[bool] = Query(None),
+    passthrough: Optional[bool] = Query(None),
+    vad: Optional[bool] = Query(None),
+    encoding: Optional[str] = Query(None),
+    sample_rate: Optional[int] = Query(None),
+):
     await websocket.accept()
+    passthrough = settings.audio_ws_passthrough if passthrough is None else passthrough
+    stats = audio_proxy_registry.open(session_id)
+    logger.info(f"[AUDIO] WebSocket client connected (connection {stats.connection_id}, session {session_id})")
+
+    # Build the session's transcript and summary from the live results
+    live_session = None
+    if session_id:
+        try:
+            live_session = LiveSession(UUID(session_id), draft_email=draft_email)
+            live_session.start()
+        except ValueError:
+            logger.warning(f"[AUDIO] session_id {session_id!r} is not a UUID, live results will not be saved")
+
+    # Viewers on any node follow the session through Redis
+    publisher = None
+    if session_id and settings.transcript_fanout_enabled:
+        publisher = TranscriptPublisher(session_id)
+        publisher.start()
+
+    # Bounded in both directions: a slow Deepgram stops us reading the client and
+    # a slow client stops us reading Deepgram, instead of buffering without limit.
+    # Items are (enqueued_at, payload); None marks the end of a direction.
+    upstream: asyncio.Queue = asyncio.Queue(maxsize=settings.audio_ws_queue_frames)
+    downstream: asyncio.Queue = asyncio.Queue(maxsize=settings.audio_ws_queue_frames)
+    sample_every = settings.audio_ws_log_sample_every
+
+    # Silence gating needs 16-bit mono PCM (linear16) at sample_rate. Browsers usually
+    # stream Opus/webm, so it only runs when the client asks for it with ?vad=true, or
+    # declares ?encoding=linear16 while AUDIO_WS_VAD_ENABLED is on
+    if vad is None:
+        use_vad = settings.audio_ws_vad_enabled and encoding == "linear16"
+    else:
+        use_vad = vad
+    gate = StreamingVad(sample_rate or settings.audio_vad_sample_rate) if use_vad else None
+
     try:
         logger.info(f"[AUDIO] Connecting to Deepgram at {settings.deepgram_url}")
         headers = Headers()
         headers["Authorization"] = f"Token {settings.deepgram_api_key}"
         async with connect(settings.deepgram_url, extra_headers=headers) as dg_ws:
+            if session_id and passthrough:
+                # Sent once, so Deepgram messages can be forwarded without re-serializing
+                await websocket.send_text(json.dumps({"type": "session", "session_id": session_id}))
 
-            async def send_to_deepgram():
+            async def read_client():
+                last_sent = time.monotonic()
                 try:
                     while True:
                         data = await websocket.receive_bytes()
-                        logger.info(f"[AUDIO] Received {len(data)} bytes from client, sending to Deepgram...")
-                        await dg_ws.send(data)
+                        stats.record_in(len(data))
+                        if stats.counts["frames_in"] % sample_every == 1:
+                            logger.debug(f"[AUDIO] Connection {stats.connection_id}: frame {stats.counts['frames_in']}, {len(data)} bytes")
+                        if gate:
+                            data = gate.process(data)
+                            if not data:
+                                if time.monotonic() - last_sent >= settings.audio_vad_keepalive_seconds:
+                                    last_sent = time.monotonic()
+                                    await upstream.put((last_sent, KEEPALIVE))
+                                continue
+                        last_sent = time.monotonic()
+                        await upstream.put((last_sent, data))
                 except WebSocketDisconnect:
                     logger.info("[AUDIO] Client disconnected (send loop)")
                 except Exception as e:
-                    logger.error(f"[AUDIO] Error in send_to_deepgram: {e}")
+                    logger.error(f"[AUDIO] Error reading from client: {e}")
+                finally:
+                    if gate and (tail := gate.flush()):
+                        await upstream.put((time.monotonic(), tail))
+                    await upstream.put(None)
+
+            async def send_to_deepgram():
+                deepgram_open = True
+                # Keep taking frames after a send error so read_client never blocks on a full queue
+                while (item := await upstream.get()) is not None:
+                    enqueued_at, data = item
+                    stats.record_queue_delay("upstream", enqueued_at)
+                    if deepgram_open:
+                        try:
+                            await dg_ws.send(data)
+                            if isinstance(data, bytes):
+                                stats.record_upstream(len(data))
+                        except Exception as e:
+                            logger.error(f"[AUDIO] Error in send_to_deepgram: {e}")
+                            deepgram_open = False
+                # Ask Deepgram to flush its last final results and close
+                try:
+                    await dg_ws.send(json.dumps({"type": "CloseStream"}))
+                except Exception:
+                    pass
 
             async def receive_from_deepgram():
                 try:
-                    while True:
-                        response = await dg_ws.recv()
-                        logger.info(f"[AUDIO] Deepgram response: {response}")
-                        # Optionally, add session_id to response if needed
-                        if session_id:
+                    async for response in dg_ws:
+                        if is_final_result(response):
+                            stats.counts["final_results"] += 1
+                            if live_session:
+                                live_session.add_result(json.loads(response))
+                        if publisher:
+                            publisher.publish(response)
+                        if session_id and not passthrough:
+                            # Legacy mode: add session_id to every message
                             try:
                                 response_json = json.loads(response)
                                 response_json["session_id"] = session_id
                                 response = json.dumps(response_json)
                             except Exception:
                                 pass
-                        await websocket.send_text(response)
+                        await downstream.put((time.monotonic(), response))
                 except Exception as e:
                     logger.error(f"[AUDIO] Error in receive_from_deepgram: {e}")
+                finally:
+                    await downstream.put(None)
+
+            async def send_to_client():
+                client_open = True
+                # Keep reading after the client has gone: the results flushed after CloseStream
+                # still belong to the session
+                while (item := await downstream.get()) is not None:
+                    enqueued_at, response = item
+                    stats.record_queue_delay("downstream", enqueued_at)
+                    if client_open:
+                        try:
+                            await websocket.send_text(response)
+                            stats.record_out(len(response))
+                        except Exception:
+                            client_open = False
+                # Deepgram is done; closing the client ends read_client if it is still connected
+                try:
+                    await websocket.close()
+                except Exception:
+                    pass
 
             await asyncio.gather(
+                read_client(),
                 send_to_deepgram(),
-                receive_from_deepgram()
+                receive_from_deepgram(),
+                send_to_client(),
             )
 
     except WebSocketDisconnect:
         logger.info("[AUDIO] Client disconnected (main)")
     except Exception as e:
-        logger.error(f"[AUDIO] Error: {e}")
\ No newline at end of file
+        logger.error(f"[AUDIO] Error: {e}")
+    finally:
+        audio_proxy_registry.close(stats)
+        logger.info(f"[AUDIO] Connection {stats.connection_id} closed: {stats.to_dict()}")
+        if gate:
+            gate.record()
+            logger.info(f"[AUDIO] Connection {stats.connection_id}: VAD removed {gate.removed_fraction:.1%} of the audio")
+        if publisher:
+            await publisher.close()
+        if live_session:
+            # The summary and email draft finish in the background, not in the close path
+            await live_session.close()
+
+
+@router.websocket("/ws/viewer")
+async def websocket_viewer(websocket: WebSocket, session_id: str = Query(...)):
+    """Read-only live feed of a session's Deepgram results, served by any node."""
+    await websocket.accept()
+    await websocket.send_text(control_message("session", session_id))
+
+    async def watch_client():
+        # Viewers never send anything; this only notices when they leave
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+
+    try:
+        async with transcript_hub.subscribe(session_id) as viewer:
+            async def forward():
+                async for message in viewer.messages():
+                    await websocket.send_text(message)
+
+            watcher = asyncio.create_task(watch_client())
+            forwarder = asyncio.create_task(forward())
+            done, pending = await asyncio.wait([watcher, forwarder], return_when=asyncio.FIRST_COMPLETED)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        # The forwarder also finishes when sending fails because the viewer left
+        if forwarder in done and forwarder.exception() is None:
+            if viewer.dropped:
+                logger.info(f"[AUDIO] Dropped slow viewer of session {session_id}")
+                await websocket.close(code=1013, reason="viewer too slow")
+            else:
+                await websocket.close(code=1012, reason="subscription lost")
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.error(f"[AUDIO] Viewer error: {e}")
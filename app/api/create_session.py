@@ -1,12 +1,17 @@
+import json
 from uuid import uuid4
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Query, Response
+from fastapi.responses import StreamingResponse
 
+from app.core.config import settings
 from app.schemas.session import SessionResponse
-from app.db.models.lead import Lead
+from app.db.models.session import Session
+from app.services.lead_listing import decode_cursor, encode_cursor, iter_leads, select_fields
+from app.services.session_stats import session_stats
 from uuid import UUID
 from fastapi import HTTPException
-from typing import List
+from typing import List, Optional
 
 router = APIRouter(prefix="/v1", tags=["Sessions"])
 
@@ -17,12 +22,61 @@ async def generate_session_id():
     return SessionResponse(session_id=session_id)
 
 
+@router.get("/sessions/{session_id}/stats", response_model=dict)
+async def get_session_stats(session_id: str):
+    """Lead counters for a session, maintained incrementally as cards are scanned."""
+    try:
+        session_uuid = UUID(session_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="session_id must be a valid UUID")
+    session_doc = await Session.find_one({"session_id": session_uuid})
+    return session_stats(session_uuid, session_doc)
+
+
 @router.get("/leads", response_model=List[dict])
-async def get_leads_by_session(session_id: str):
-    """Get all leads for a given session_id (as a query parameter)."""
+async def get_leads_by_session(
+    response: Response,
+    session_id: str,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    fields: Optional[str] = Query(None, description="Comma-separated lead fields to return"),
+    exclude: Optional[str] = Query(None, description="Comma-separated lead fields to leave out"),
+    stream: bool = Query(False, description="Stream the leads as NDJSON"),
+):
+    """
+    Get the leads for a given session_id (as a query parameter), oldest first.
+
+    Pages hold `limit` leads (default LEADS_PAGE_SIZE, at most LEADS_PAGE_MAX_SIZE);
+    when more remain, the X-Next-Cursor header holds the `cursor` for the next page.
+    With `stream=true` the leads are sent as NDJSON as they come off the database
+    cursor, all remaining ones unless `limit` is given; the next cursor, if any, is
+    then sent as a final `{"next_cursor": ...}` line.
+    """
     try:
         session_uuid = UUID(session_id)
     except ValueError:
         raise HTTPException(status_code=400, detail="session_id must be a valid UUID")
-    leads = await Lead.find({"session_id": session_uuid}).to_list()
-    return [lead.dict() for lead in leads]
\ No newline at end of file
+    selected = select_fields(fields, exclude)
+    # Decoded up front so a bad cursor is a 400, not an error halfway through a stream
+    after = decode_cursor(cursor) if cursor else None
+
+    if stream:
+        leads = iter_leads(session_uuid, selected, after, limit + 1 if limit else None)
+
+        async def ndjson():
+            sent, last = 0, None
+            async for lead in leads:
+                if limit and sent == limit:
+                    yield json.dumps({"next_cursor": encode_cursor(last.created_at, last.id)}) + "\n"
+                    break
+                yield lead.model_dump_json() + "\n"
+                sent, last = sent + 1, lead
+
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+    page_size = min(limit or settings.leads_page_size, settings.leads_page_max_size)
+    leads = [lead async for lead in iter_leads(session_uuid, selected, after, page_size + 1)]
+    if len(leads) > page_size:
+        leads = leads[:page_size]
+        response.headers["X-Next-Cursor"] = encode_cursor(leads[-1].created_at, leads[-1].id)
+    return [lead.model_dump() for lead in leads]
\ No newline at end of file
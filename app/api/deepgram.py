@@ -1,13 +1,18 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from uuid import UUID
+import asyncio
+from typing import AsyncIterator, Optional, Union
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Response
+from uuid import UUID, uuid4
 import httpx
 from app.core.config import settings
 from app.agent.summarize import summarize_interest
 from app.agent.personalized_email import generate_email_body
-from app.api.upload_s3 import upload_audio_to_s3
+from app.services.audio_stream import stream_audio
 from app.db.models.session import Session
-from app.db.models.lead import Lead
+from beanie.odm.operators.update.general import Set, SetOnInsert
 from app.db.models.email import PersonalizedEmail
+from app.services.lead_context import load_lead_email_context
+from app.services.pipeline import StagePipeline
+from app.services.vad import gated_transcriber
 from datetime import datetime, timezone
 
 
@@ -16,37 +21,22 @@ router = APIRouter(prefix="/v1/deepgram", tags=["Deepgram"])
 def utc_now():
     return datetime.now(timezone.utc)
 
-@router.post("/", response_model=dict)
-async def transcribe_and_summarize(
-    session_id: str = Form(...),
-    audio: UploadFile = File(...)
-):
-    try:
-        session_uuid = UUID(session_id)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="session_id must be a valid UUID")
-
-    if not audio.content_type.startswith("audio/"):
-        raise HTTPException(status_code=400, detail="File must be an audio file.")
-
-    audio_bytes = await audio.read()
-
-    # Upload to S3
-    audio_url = await upload_audio_to_s3(session_id, audio_bytes, audio.content_type)
-
+async def transcribe_audio(
+    audio: Union[bytes, AsyncIterator[bytes]], content_type: str, params: Optional[dict] = None,
+) -> str:
     # Deepgram transcription
     deepgram_url = settings.deepgram_url
     headers = {
         "Authorization": f"Token {settings.deepgram_api_key}",
-        "Content-Type": audio.content_type,
+        "Content-Type": content_type,
     }
-    params = {"punctuate": "true", "language": "en"}
+    params = {"punctuate": "true", "language": "en", **(params or {})}
     async with httpx.AsyncClient() as client:
         response = await client.post(
             deepgram_url,
             headers=headers,
             params=params,
-            content=audio_bytes,
+            content=audio,
             timeout=120.0
         )
 
@@ -54,61 +44,87 @@ async def transcribe_and_summarize(
         raise HTTPException(status_code=500, detail=f"Deepgram API error: {response.text}")
 
     dg_result = response.json()
-    transcript = dg_result.get("results", {}).get("channels", [{}])[0].get("alternatives", [{}])[0].get("transcript", "")
     # Do not raise error if transcript is empty; continue processing
-    # Summarize (allow empty transcript)
-    summary = await summarize_interest(transcript) if transcript else ""
-
-    # Update or create session doc
-    session_doc = await Session.find_one({"session_id": session_uuid})
-    if session_doc:
-        session_doc.audio_file_url = audio_url
-        session_doc.transcription = transcript
-        session_doc.summary = summary
-        await session_doc.save()
-    else:
-        session_doc = Session(
+    return dg_result.get("results", {}).get("channels", [{}])[0].get("alternatives", [{}])[0].get("transcript", "")
+
+@router.post("/", response_model=dict)
+async def transcribe_and_summarize(
+    response: Response,
+    session_id: str = Form(...),
+    audio: UploadFile = File(...)
+):
+    try:
+        session_uuid = UUID(session_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="session_id must be a valid UUID")
+
+    if not audio.content_type.startswith("audio/"):
+        raise HTTPException(status_code=400, detail="File must be an audio file.")
+
+    # Stages: (audio || lead); audio -> summary; audio + lead -> email; everything -> save.
+    # The audio stage streams the upload to S3 and Deepgram at once, in bounded chunks.
+    # LLM calls overlap and all DB writes happen together at the end.
+    pipeline = StagePipeline("deepgram")
+
+    @pipeline.stage("audio")
+    async def upload_and_transcribe():
+        # With VAD on, long silences in WAV uploads are compressed before Deepgram (S3 keeps the original)
+        transcribe = gated_transcriber(transcribe_audio) if settings.audio_vad_enabled else transcribe_audio
+        return await stream_audio(session_id, audio, transcribe=transcribe)
+
+    @pipeline.stage("lead")
+    async def lead():
+        # === QUERY lead info to enrich AI prompt ===
+        return await load_lead_email_context(session_uuid)
+
+    @pipeline.stage("summary", after=["audio"])
+    async def summary(audio_result):
+        transcript = audio_result[1]
+        # Summarize (allow empty transcript)
+        return await summarize_interest(transcript) if transcript else ""
+
+    @pipeline.stage("email", after=["audio", "lead"])
+    async def email(audio_result, lead_context):
+        transcript = audio_result[1]
+        lead_name, extra_info = lead_context
+        # Call AI agent (allow empty transcript and name)
+        return await generate_email_body(
+            name=lead_name,
+            transcript=transcript or "",
+            extra_info=extra_info
+        )
+
+    @pipeline.stage("save", after=["audio", "summary", "email"])
+    async def save(audio_result, summary, email_result):
+        audio_url, transcript = audio_result
+        email_doc = PersonalizedEmail(
             session_id=session_uuid,
-            audio_file_url=audio_url,
-            transcription=transcript,
-            summary=summary
+            subject="This is your personalized email",
+            body=email_result.get("text", ""),
+            created_at=utc_now()
         )
-        await session_doc.insert()
-
-    # === QUERY lead info to enrich AI prompt ===
-    lead_doc = await Lead.find_one({"session_id": session_uuid})
-    if not lead_doc or not lead_doc.name:
-        # If lead not found, still proceed with empty name
-        lead_name = ""
-        extra_info = {}
-    else:
-        lead_name = lead_doc.name
-        extra_info = {
-            "company": getattr(lead_doc.parsed_fields, "company", None) if lead_doc.parsed_fields else None,
-            "job_title": getattr(lead_doc.parsed_fields, "job_title", None) if lead_doc.parsed_fields else None,
-        }
-
-    # Call AI agent (allow empty transcript and name)
-    email_result = await generate_email_body(
-        name=lead_name,
-        transcript=transcript or "",
-        extra_info=extra_info
-    )
-
-    # Save personalized email to DB
-    email_doc = PersonalizedEmail(
-        session_id=session_uuid,
-        subject="This is your personalized email",
-        body=email_result.get("text", ""),
-        created_at=utc_now()
-    )
-    await email_doc.insert()
+        # Update or create session doc. A partial $set keeps the lead counters that
+        # card scans increment concurrently on the same document.
+        await asyncio.gather(
+            Session.find_one({"session_id": session_uuid}).update(
+                Set({"audio_file_url": audio_url, "transcription": transcript, "summary": summary}),
+                SetOnInsert({"_id": uuid4(), "created_at": utc_now()}),
+                upsert=True,
+            ),
+            email_doc.insert(),
+        )
+        return email_doc
+
+    results = await pipeline.run()
+    response.headers["Server-Timing"] = pipeline.server_timing()
 
+    email_doc = results["save"]
+    audio_url, transcript = results["audio"]
     return {
         "session_id": session_id or "",
         "audio_file_url": audio_url or "",
         "transcript": transcript or "",
-        "summary": summary or "",
+        "summary": results["summary"] or "",
         "email_subject": email_doc.subject or "",
         "email_body": email_doc.body or ""
     }
@@ -1,6 +1,11 @@
+import json
 from fastapi import APIRouter, Form
+from fastapi.responses import StreamingResponse
+from app.agent.personalized_email import stream_email_body, text_to_html
+from app.services.lead_context import load_lead_email_context
 from app.services.mail_service import send_email_async
 from app.db.models.email import PersonalizedEmail
+from app.db.models.session import Session
 from uuid import UUID
 from fastapi import HTTPException
 from typing import List, Optional
@@ -29,3 +34,50 @@ async def get_email_by_session(session_id: str):
     if email:
         return email.dict()
     return None
+
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.get("/stream")
+async def stream_email_by_session(session_id: str):
+    """
+    Stream a personalized email for session_id as Server-Sent Events.
+    Emits `token` events with text chunks, then saves the email and emits a final `done` event.
+    """
+    try:
+        session_uuid = UUID(session_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="session_id must be a valid UUID")
+
+    session_doc = await Session.find_one({"session_id": session_uuid})
+    transcript = session_doc.transcription if session_doc and session_doc.transcription else ""
+    lead_name, extra_info = await load_lead_email_context(session_uuid)
+
+    async def events():
+        parts = []
+        async for text in stream_email_body(name=lead_name, transcript=transcript, extra_info=extra_info):
+            parts.append(text)
+            yield sse_event("token", {"text": text})
+
+        body = "".join(parts).strip()
+        email_doc = PersonalizedEmail(
+            session_id=session_uuid,
+            subject="This is your personalized email",
+            body=body,
+        )
+        await email_doc.insert()
+        yield sse_event("done", {
+            "email_id": str(email_doc.id),
+            "session_id": session_id,
+            "email_subject": email_doc.subject,
+            "email_body": body,
+            "email_html": text_to_html(body),
+        })
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
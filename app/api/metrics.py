@@ -0,0 +1,31 @@
+from fastapi import APIRouter
+
+from app.agent.gemini_ocr import ocr_engine
+from app.agent.llm_governor import llm_governor
+from app.agent.llm_registry import llm_registry
+from app.agent.tagging_agent import scoring_stats
+from app.services.audio_proxy import audio_proxy_registry
+from app.services.ocr_cache import ocr_cache
+from app.services.ocr_jobs import queue_stats
+from app.services.semantic_cache import semantic_cache
+from app.services.transcript_fanout import transcript_hub
+from app.services.vad import vad_stats
+
+router = APIRouter(prefix="/v1", tags=["Metrics"])
+
+
+@router.get("/metrics", response_model=dict)
+async def get_metrics():
+    """Per-worker runtime counters for the card-scan and agent hot paths."""
+    return {
+        "ocr_engine": ocr_engine.stats(),
+        "ocr_cache": await ocr_cache.stats(),
+        "ocr_jobs": await queue_stats(),
+        "lead_scoring": scoring_stats(),
+        "llm_clients": llm_registry.stats(),
+        "llm_governor": llm_governor.stats(),
+        "semantic_cache": await semantic_cache.stats(),
+        "audio_ws": audio_proxy_registry.stats(),
+        "vad": vad_stats(),
+        "transcript_fanout": transcript_hub.stats(),
+    }
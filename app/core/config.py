@@ -1,4 +1,5 @@
 import os
+from typing import Literal, Optional
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -16,6 +17,84 @@ class Settings(BaseSettings):
     sendgrid_api_key: str = Field(..., alias="SENDGRID_API_KEY")
     email: str = Field(..., alias="EMAIL")
     webhook_secret: str = Field(..., alias="WEBHOOK_SECRET")
+    default_phone_region: str = Field("US", alias="DEFAULT_PHONE_REGION")
+    ocr_image_preprocess: str = Field("standard", alias="OCR_IMAGE_PREPROCESS")
+    ocr_batch_size: int = Field(5, alias="OCR_BATCH_SIZE", ge=1)
+    ocr_batch_max_files: int = Field(50, alias="OCR_BATCH_MAX_FILES", ge=1)
+    ocr_job_max_attempts: int = Field(3, alias="OCR_JOB_MAX_ATTEMPTS", ge=1)
+    ocr_job_retry_backoff_seconds: float = Field(2.0, alias="OCR_JOB_RETRY_BACKOFF_SECONDS", ge=0)
+    ocr_job_ttl_seconds: int = Field(24 * 3600, alias="OCR_JOB_TTL_SECONDS", ge=1)
+    ocr_worker_name: Optional[str] = Field(None, alias="OCR_WORKER_NAME")
+    ocr_worker_concurrency: int = Field(4, alias="OCR_WORKER_CONCURRENCY", ge=1)
+    lead_scoring_rules_enabled: bool = Field(True, alias="LEAD_SCORING_RULES_ENABLED")
+    lead_scoring_rules_path: Optional[str] = Field(None, alias="LEAD_SCORING_RULES_PATH")
+    lead_score_cache_size: int = Field(5000, alias="LEAD_SCORE_CACHE_SIZE", ge=1)
+    lead_score_cache_ttl_seconds: int = Field(24 * 3600, alias="LEAD_SCORE_CACHE_TTL_SECONDS", ge=1)
+    lead_score_structured_output: bool = Field(True, alias="LEAD_SCORE_STRUCTURED_OUTPUT")
+    lead_score_batch_window_ms: float = Field(50, alias="LEAD_SCORE_BATCH_WINDOW_MS", ge=0)
+    lead_score_batch_max_size: int = Field(8, alias="LEAD_SCORE_BATCH_MAX_SIZE", ge=1)
+    summary_map_reduce_threshold_tokens: int = Field(12000, alias="SUMMARY_MAP_REDUCE_THRESHOLD_TOKENS", ge=1)
+    summary_chunk_tokens: int = Field(3000, alias="SUMMARY_CHUNK_TOKENS", ge=100)
+    summary_chunk_overlap_tokens: int = Field(150, alias="SUMMARY_CHUNK_OVERLAP_TOKENS", ge=0)
+    summary_max_concurrency: int = Field(8, alias="SUMMARY_MAX_CONCURRENCY", ge=1)
+    ocr_cache_enabled: bool = Field(True, alias="OCR_CACHE_ENABLED")
+    ocr_cache_ttl_seconds: int = Field(7 * 24 * 3600, alias="OCR_CACHE_TTL_SECONDS", ge=1)
+    ocr_cache_max_entries: int = Field(50_000, alias="OCR_CACHE_MAX_ENTRIES", ge=1)
+    semantic_cache_enabled: bool = Field(False, alias="SEMANTIC_CACHE_ENABLED")
+    semantic_cache_backend: Literal["memory", "chroma"] = Field("memory", alias="SEMANTIC_CACHE_BACKEND")
+    semantic_cache_threshold: float = Field(0.9, alias="SEMANTIC_CACHE_THRESHOLD", ge=0, le=1)
+    semantic_cache_max_entries: int = Field(5000, alias="SEMANTIC_CACHE_MAX_ENTRIES", ge=1)
+    semantic_cache_ttl_seconds: int = Field(7 * 24 * 3600, alias="SEMANTIC_CACHE_TTL_SECONDS", ge=1)
+    semantic_cache_collection: str = Field("semantic_cache", alias="SEMANTIC_CACHE_COLLECTION")
+    chroma_host: str = Field("chromadb", alias="CHROMA_HOST")
+    chroma_port: int = Field(8000, alias="CHROMA_PORT")
+    audio_max_upload_bytes: int = Field(200 * 1024 * 1024, alias="AUDIO_MAX_UPLOAD_BYTES", ge=1)
+    audio_stream_chunk_bytes: int = Field(256 * 1024, alias="AUDIO_STREAM_CHUNK_BYTES", ge=1024)
+    audio_stream_queue_chunks: int = Field(8, alias="AUDIO_STREAM_QUEUE_CHUNKS", ge=1)
+    s3_endpoint_url: Optional[str] = Field(None, alias="S3_ENDPOINT_URL")
+    s3_max_pool_connections: int = Field(50, alias="S3_MAX_POOL_CONNECTIONS", ge=1)
+    s3_connect_timeout_seconds: float = Field(5.0, alias="S3_CONNECT_TIMEOUT_SECONDS", gt=0)
+    s3_read_timeout_seconds: float = Field(60.0, alias="S3_READ_TIMEOUT_SECONDS", gt=0)
+    s3_max_attempts: int = Field(3, alias="S3_MAX_ATTEMPTS", ge=1)
+    s3_multipart_threshold_bytes: int = Field(16 * 1024 * 1024, alias="S3_MULTIPART_THRESHOLD_BYTES", ge=5 * 1024 * 1024)
+    # S3 requires every multipart part except the last to be at least 5 MiB
+    s3_multipart_part_bytes: int = Field(8 * 1024 * 1024, alias="S3_MULTIPART_PART_BYTES", ge=5 * 1024 * 1024)
+    live_session_save_interval_seconds: float = Field(5.0, alias="LIVE_SESSION_SAVE_INTERVAL_SECONDS", gt=0)
+    live_summary_interval_seconds: float = Field(30.0, alias="LIVE_SUMMARY_INTERVAL_SECONDS", ge=0)
+    live_summary_min_new_words: int = Field(40, alias="LIVE_SUMMARY_MIN_NEW_WORDS", ge=1)
+    live_session_email_draft: bool = Field(False, alias="LIVE_SESSION_EMAIL_DRAFT")
+    live_session_finalize_drain_seconds: float = Field(30.0, alias="LIVE_SESSION_FINALIZE_DRAIN_SECONDS", ge=0)
+    audio_ws_passthrough: bool = Field(True, alias="AUDIO_WS_PASSTHROUGH")
+    audio_ws_queue_frames: int = Field(32, alias="AUDIO_WS_QUEUE_FRAMES", ge=1)
+    audio_ws_log_sample_every: int = Field(100, alias="AUDIO_WS_LOG_SAMPLE_EVERY", ge=1)
+    audio_vad_enabled: bool = Field(False, alias="AUDIO_VAD_ENABLED")
+    audio_ws_vad_enabled: bool = Field(False, alias="AUDIO_WS_VAD_ENABLED")
+    audio_vad_sample_rate: int = Field(16000, alias="AUDIO_VAD_SAMPLE_RATE", ge=8000)
+    audio_vad_frame_ms: int = Field(20, alias="AUDIO_VAD_FRAME_MS", ge=10, le=100)
+    audio_vad_threshold_db: float = Field(-50.0, alias="AUDIO_VAD_THRESHOLD_DB", le=0)
+    audio_vad_margin_db: float = Field(10.0, alias="AUDIO_VAD_MARGIN_DB", ge=0)
+    audio_vad_hangover_ms: int = Field(300, alias="AUDIO_VAD_HANGOVER_MS", ge=0)
+    audio_vad_padding_ms: int = Field(200, alias="AUDIO_VAD_PADDING_MS", ge=0)
+    audio_vad_keepalive_seconds: float = Field(5.0, alias="AUDIO_VAD_KEEPALIVE_SECONDS", gt=0)
+    transcript_fanout_enabled: bool = Field(True, alias="TRANSCRIPT_FANOUT_ENABLED")
+    transcript_fanout_publish_queue: int = Field(256, alias="TRANSCRIPT_FANOUT_PUBLISH_QUEUE", ge=1)
+    transcript_fanout_viewer_queue: int = Field(64, alias="TRANSCRIPT_FANOUT_VIEWER_QUEUE", ge=1)
+    leads_page_size: int = Field(500, alias="LEADS_PAGE_SIZE", ge=1)
+    leads_page_max_size: int = Field(5000, alias="LEADS_PAGE_MAX_SIZE", ge=1)
+    # Opt-in: warm-up sends one billed "ping" completion per client at every startup
+    llm_warmup_enabled: bool = Field(False, alias="LLM_WARMUP_ENABLED")
+    llm_warmup_timeout_seconds: float = Field(10.0, alias="LLM_WARMUP_TIMEOUT_SECONDS", gt=0)
+    llm_max_concurrency: int = Field(32, alias="LLM_MAX_CONCURRENCY", ge=1)
+    llm_min_concurrency: int = Field(1, alias="LLM_MIN_CONCURRENCY", ge=1)
+    llm_initial_concurrency: int = Field(8, alias="LLM_INITIAL_CONCURRENCY", ge=1)
+    llm_rate_limit_per_second: float = Field(0, alias="LLM_RATE_LIMIT_PER_SECOND", ge=0)
+    llm_rate_limit_burst: int = Field(10, alias="LLM_RATE_LIMIT_BURST", ge=1)
+    llm_max_retries: int = Field(3, alias="LLM_MAX_RETRIES", ge=0)
+    llm_backoff_base_seconds: float = Field(0.5, alias="LLM_BACKOFF_BASE_SECONDS", gt=0)
+    llm_backoff_max_seconds: float = Field(30.0, alias="LLM_BACKOFF_MAX_SECONDS", gt=0)
+    llm_breaker_failure_threshold: int = Field(5, alias="LLM_BREAKER_FAILURE_THRESHOLD", ge=1)
+    llm_breaker_open_seconds: float = Field(30.0, alias="LLM_BREAKER_OPEN_SECONDS", gt=0)
+    llm_breaker_half_open_probes: int = Field(1, alias="LLM_BREAKER_HALF_OPEN_PROBES", ge=1)
 
     model_config = SettingsConfigDict(
         env_file=os.path.join(os.path.dirname(__file__), "../../.env"),
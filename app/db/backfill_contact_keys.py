@@ -0,0 +1,54 @@
+"""
+Populates `contact_keys` on leads saved before the field existed.
+
+    python -m app.db.backfill_contact_keys [--batch-size 500]
+
+Safe to re-run: only leads without the field are touched.
+"""
+import argparse
+import asyncio
+import logging
+
+from pymongo import UpdateOne
+
+from app.db.init_db import init_db
+from app.db.models.lead import Lead
+from app.services.contact_keys import build_contact_keys
+
+logger = logging.getLogger(__name__)
+
+
+async def backfill(batch_size: int) -> int:
+    collection = Lead.get_pymongo_collection()
+    cursor = collection.find({"contact_keys": {"$exists": False}}, {"emails": 1, "phones": 1})
+
+    updated = 0
+    ops = []
+    async for doc in cursor:
+        keys = build_contact_keys(doc.get("emails") or [], doc.get("phones") or [])
+        ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"contact_keys": keys}}))
+        if len(ops) >= batch_size:
+            result = await collection.bulk_write(ops, ordered=False)
+            updated += result.modified_count
+            logger.info("Backfilled %s leads", updated)
+            ops = []
+
+    if ops:
+        result = await collection.bulk_write(ops, ordered=False)
+        updated += result.modified_count
+    return updated
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Backfill Lead.contact_keys")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    await init_db()
+    updated = await backfill(args.batch_size)
+    logger.info("Done: %s leads updated", updated)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,54 @@
+"""
+Recomputes the per-session lead counters from the lead collection.
+
+    python -m app.db.backfill_session_stats
+
+Run once after deploying incremental counters, or to repair drift. Scans every
+lead, so run it off-peak.
+"""
+import asyncio
+import logging
+from uuid import uuid4
+
+from pymongo import UpdateOne
+
+from app.db.init_db import init_db
+from app.db.models.lead import Lead
+from app.db.models.session import Session, utc_now
+
+logger = logging.getLogger(__name__)
+
+STATS_PIPELINE = [
+    {"$group": {
+        "_id": "$session_id",
+        "lead_count": {"$sum": 1},
+        "existing_customer_count": {"$sum": {"$cond": ["$existing_customer", 1, 0]}},
+        "scored_lead_count": {"$sum": {"$cond": [{"$ne": [{"$ifNull": ["$interest_score", None]}, None]}, 1, 0]}},
+        "interest_score_sum": {"$sum": {"$ifNull": ["$interest_score", 0]}},
+    }},
+]
+
+
+async def backfill() -> int:
+    ops = []
+    async for row in Lead.aggregate(STATS_PIPELINE):
+        session_id = row.pop("_id")
+        ops.append(UpdateOne(
+            {"session_id": session_id},
+            {"$set": row, "$setOnInsert": {"_id": uuid4(), "created_at": utc_now()}},
+            upsert=True,
+        ))
+    if ops:
+        await Session.get_pymongo_collection().bulk_write(ops, ordered=False)
+    return len(ops)
+
+
+async def main():
+    await init_db()
+    sessions = await backfill()
+    logger.info("Recomputed lead counters for %s sessions", sessions)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
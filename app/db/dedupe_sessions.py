@@ -0,0 +1,92 @@
+"""
+Merges session documents that share a session_id, so the `session_id_unique` index
+can be built.
+
+    python -m app.db.dedupe_sessions [--dry-run]
+
+Sessions used to be created with a find_one followed by an insert, so two concurrent
+requests could both insert one. For each duplicated session_id the oldest document is
+kept. Its summary, audio URL and transcription are taken from the newest document
+that has them, and the lead counters are summed, since every increment went to
+exactly one of the copies. The other copies are then deleted.
+
+This script talks to MongoDB without init_beanie, because init_beanie refuses to
+start while the duplicates exist. Safe to re-run: it does nothing once the
+session_ids are unique.
+"""
+import argparse
+import asyncio
+import logging
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.core.config import settings
+from app.db.models.session import Session
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_SESSIONS_PIPELINE = [
+    {"$group": {"_id": "$session_id", "copies": {"$sum": 1}}},
+    {"$match": {"copies": {"$gt": 1}}},
+]
+LATEST_FIELDS = ("summary", "audio_file_url", "transcription")
+COUNTER_FIELDS = ("lead_count", "existing_customer_count", "scored_lead_count", "interest_score_sum")
+
+
+def session_collection(db):
+    return db[Session.Settings.collection]
+
+
+async def check_unique_session_ids(db) -> None:
+    """
+    Raise with instructions if `session_id_unique` can't be built yet. Only checked
+    while the index is missing, so it costs one aggregation on the first startup.
+    """
+    collection = session_collection(db)
+    if "session_id_unique" in await collection.index_information():
+        return
+    duplicates = await collection.aggregate(DUPLICATE_SESSIONS_PIPELINE + [{"$limit": 1}]).to_list(length=1)
+    if duplicates:
+        raise RuntimeError(
+            "The session collection has duplicate session_ids, so the session_id_unique index "
+            "cannot be built. Run `python -m app.db.dedupe_sessions` once, then restart."
+        )
+
+
+def merge_sessions(docs: list) -> dict:
+    """The $set for the kept (oldest) copy, given all copies oldest first."""
+    merged = {field: sum(doc.get(field) or 0 for doc in docs) for field in COUNTER_FIELDS}
+    for field in LATEST_FIELDS:
+        values = [doc[field] for doc in docs if doc.get(field)]
+        if values:
+            merged[field] = values[-1]
+    return merged
+
+
+async def dedupe(db, dry_run: bool = False) -> int:
+    collection = session_collection(db)
+    merged_count = 0
+    async for row in collection.aggregate(DUPLICATE_SESSIONS_PIPELINE):
+        docs = await collection.find({"session_id": row["_id"]}).sort([("created_at", 1), ("_id", 1)]).to_list(length=None)
+        keep, extra = docs[0], [doc["_id"] for doc in docs[1:]]
+        logger.info("Session %s: keeping %s, removing %s copies", row["_id"], keep["_id"], len(extra))
+        if not dry_run:
+            await collection.update_one({"_id": keep["_id"]}, {"$set": merge_sessions(docs)})
+            await collection.delete_many({"_id": {"$in": extra}})
+        merged_count += 1
+    return merged_count
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Merge duplicate session documents")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be merged")
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(settings.mongo_url)
+    sessions = await dedupe(client.get_default_database(), args.dry_run)
+    logger.info("Done: %s duplicated session_ids %s", sessions, "found" if args.dry_run else "merged")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
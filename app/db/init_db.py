@@ -2,6 +2,7 @@ from beanie import init_beanie
 from motor.motor_asyncio import AsyncIOMotorClient
 
 from app.core.config import settings
+from app.db.dedupe_sessions import check_unique_session_ids
 from app.db.models.lead import Lead
 from app.db.models.session import Session
 from app.db.models.email import PersonalizedEmail
@@ -9,4 +10,7 @@ from app.db.models.email import PersonalizedEmail
 async def init_db():
     client = AsyncIOMotorClient(settings.mongo_url)
     db = client.get_default_database()
+    # Fail with instructions rather than on the unique index build
+    await check_unique_session_ids(db)
+    # Creates any missing indexes declared in each model's Settings.indexes
     await init_beanie(database=db, document_models=[Lead, Session, PersonalizedEmail])
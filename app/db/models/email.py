@@ -1,4 +1,5 @@
 from beanie import Document
+from pymongo import ASCENDING, DESCENDING, IndexModel
 from pydantic import Field, ConfigDict
 from uuid import UUID, uuid4
 from datetime import datetime, timezone
@@ -8,7 +9,7 @@ def utc_now():
 
 class PersonalizedEmail(Document):
     id: UUID = Field(default_factory=uuid4, alias="_id")
-    session_id: UUID = Field(..., index=True)
+    session_id: UUID = Field(...)
     subject: str = Field(default="This is your personalized mail")
     body: str = Field(...)
     email: str = Field(default="amityadav23461@email.com")
@@ -18,3 +19,6 @@ class PersonalizedEmail(Document):
 
     class Settings:
         collection = "personalized_email"
+        indexes = [
+            IndexModel([("session_id", ASCENDING), ("created_at", DESCENDING)], name="session_id_created_at"),
+        ]
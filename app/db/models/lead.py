@@ -1,4 +1,5 @@
 from beanie import Document
+from pymongo import ASCENDING, IndexModel
 from pydantic import BaseModel, Field, EmailStr, ConfigDict
 from uuid import UUID, uuid4
 from datetime import datetime, timezone
@@ -13,11 +14,12 @@ class ParsedFields(BaseModel):
 
 class Lead(Document):
     id: UUID = Field(default_factory=uuid4, alias="_id")
-    session_id: UUID = Field(..., index=True)
+    session_id: UUID = Field(...)
     name: Optional[str] = Field(None)
     image_url: str = Field(...)
     emails: List[EmailStr] = Field(default_factory=list)
     phones: List[str] = Field(default_factory=list)
+    contact_keys: List[str] = Field(default_factory=list, description="Canonical email/phone keys used for dedup")
     interest_score: Optional[float] = Field(default=None, ge=0.0, le=1.0)
     interest_reason: Optional[str] = Field(default=None, description="Reason behind the interest score")
     existing_customer: bool = Field(default=False)
@@ -28,3 +30,12 @@ class Lead(Document):
 
     class Settings:
         collection = "lead"
+        indexes = [
+            # Leads by session, in scan order; _id breaks created_at ties for cursor pagination
+            IndexModel(
+                [("session_id", ASCENDING), ("created_at", ASCENDING), ("_id", ASCENDING)],
+                name="session_id_created_at_id",
+            ),
+            # Existing-customer lookup
+            IndexModel([("contact_keys", ASCENDING)], name="contact_keys"),
+        ]
@@ -1,4 +1,5 @@
 from beanie import Document
+from pymongo import ASCENDING, IndexModel
 from pydantic import Field, ConfigDict
 from uuid import UUID, uuid4
 from datetime import datetime, timezone
@@ -13,14 +14,21 @@ class Session(Document):
     Represents a scanning session (can have multiple leads).
     """
     id: UUID = Field(default_factory=uuid4, alias="_id")
-    session_id: UUID = Field(default_factory=uuid4, unique=True, index=True)
+    session_id: UUID = Field(default_factory=uuid4)
     summary: Optional[str] = Field(None, description="Summary of the session")
     audio_file_url: Optional[str] = Field(None, description="URL to the audio file")
     transcription: Optional[str] = Field(None, description="Transcription text from audio")
+    lead_count: int = Field(default=0, description="Leads scanned in this session")
+    existing_customer_count: int = Field(default=0, description="Leads matched to an existing customer")
+    scored_lead_count: int = Field(default=0, description="Leads with an interest score")
+    interest_score_sum: float = Field(default=0.0, description="Sum of interest scores, for the running mean")
     created_at: datetime = Field(default_factory=utc_now)
 
     model_config = ConfigDict(populate_by_name=True)
 
     class Settings:
         collection = "session"
+        indexes = [
+            IndexModel([("session_id", ASCENDING)], name="session_id_unique", unique=True),
+        ]
 
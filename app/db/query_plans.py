@@ -0,0 +1,98 @@
+"""
+Checks that every hot query is served by an index.
+
+    python -m app.db.query_plans
+
+Runs `explain()` for each query in HOT_QUERIES against the configured database and
+exits non-zero if any winning plan contains a COLLSCAN stage.
+"""
+import asyncio
+import logging
+import sys
+from typing import Any, Dict, List, Optional, Type
+from uuid import uuid4
+
+from beanie import Document
+from pydantic import BaseModel
+
+from app.db.init_db import init_db
+from app.db.models.email import PersonalizedEmail
+from app.db.models.lead import Lead
+from app.db.models.session import Session
+
+logger = logging.getLogger(__name__)
+
+
+class HotQuery(BaseModel):
+    name: str
+    model: Type[Document]
+    filter: Dict[str, Any]
+    sort: Optional[List[tuple]] = None
+
+
+_sample_session = uuid4()
+
+HOT_QUERIES = [
+    HotQuery(
+        name="leads by session",
+        model=Lead,
+        filter={"session_id": _sample_session},
+        sort=[("created_at", 1), ("_id", 1)],
+    ),
+    HotQuery(name="first lead of session", model=Lead, filter={"session_id": _sample_session}),
+    HotQuery(
+        name="existing customer lookup",
+        model=Lead,
+        filter={"contact_keys": {"$in": ["email:jane@example.com", "phone:+14155550100"]}},
+    ),
+    HotQuery(name="session by session_id", model=Session, filter={"session_id": _sample_session}),
+    HotQuery(name="email by session", model=PersonalizedEmail, filter={"session_id": _sample_session}),
+]
+
+
+def plan_stages(plan: Any) -> List[str]:
+    """Collects every `stage` name in an explain plan tree."""
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(plan_stages(item))
+    return stages
+
+
+async def explain_query(query: HotQuery) -> dict:
+    cursor = query.model.get_pymongo_collection().find(query.filter)
+    if query.sort:
+        cursor = cursor.sort(query.sort)
+    return await cursor.explain()
+
+
+async def find_collection_scans() -> List[str]:
+    """Returns the names of hot queries whose winning plan scans the whole collection."""
+    offenders = []
+    for query in HOT_QUERIES:
+        explanation = await explain_query(query)
+        stages = plan_stages(explanation["queryPlanner"]["winningPlan"])
+        logger.info("%s: %s", query.name, " <- ".join(stages))
+        if "COLLSCAN" in stages:
+            offenders.append(query.name)
+    return offenders
+
+
+async def main() -> int:
+    await init_db()
+    offenders = await find_collection_scans()
+    if offenders:
+        logger.error("COLLSCAN in hot queries: %s", ", ".join(offenders))
+        return 1
+    logger.info("All %s hot queries use an index", len(HOT_QUERIES))
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(main()))
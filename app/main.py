@@ -1,22 +1,34 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.agent.llm_registry import llm_registry
 from app.api.audio import router as audio_router
 from app.api.create_session import router as session_router
 from app.api.email import router as email_router
+from app.api.metrics import router as metrics_router
 from app.api.ocr import router as card_router
 from app.api.summary import router as summary_router
 from app.api.upload_s3 import router as upload_s3_router
 from app.api.deepgram import router as deepgram_router
+from app.core.config import settings
 from app.db.init_db import init_db
+from app.services.live_session import drain_finalizing
+from app.services.s3 import s3_clients
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    await init_db()
+    llm_registry.create_all()
+    if settings.llm_warmup_enabled:
+        await asyncio.gather(init_db(), s3_clients.start(), llm_registry.warm_up())
+    else:
+        await asyncio.gather(init_db(), s3_clients.start())
     yield
+    await drain_finalizing(settings.live_session_finalize_drain_seconds)
+    await s3_clients.close()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -38,3 +50,4 @@ app.include_router(summary_router)
 app.include_router(email_router)
 app.include_router(upload_s3_router)
 app.include_router(deepgram_router)
+app.include_router(metrics_router)
@@ -0,0 +1,44 @@
+"""
+Background worker for asynchronous card OCR jobs.
+
+    python -m app.ocr_worker
+
+Run as many processes as needed; each one consumes the shared Redis queue.
+"""
+import asyncio
+import logging
+import signal
+
+from app.agent.llm_governor import Priority, llm_priority
+from app.agent.llm_registry import llm_registry
+from app.core.config import settings
+from app.db.init_db import init_db
+from app.services.ocr_jobs import OcrJobWorker
+from app.services.s3 import s3_clients
+
+logging.basicConfig(level=logging.INFO)
+
+
+async def main():
+    # Card scans use the OCR and lead-scoring clients only
+    llm_registry.create_all(["ocr", "scoring"])
+    if settings.llm_warmup_enabled:
+        await asyncio.gather(init_db(), s3_clients.start(), llm_registry.warm_up(["ocr", "scoring"]))
+    else:
+        await asyncio.gather(init_db(), s3_clients.start())
+    # Queued scans are not waited on interactively
+    llm_priority.set(Priority.BACKGROUND)
+    worker = OcrJobWorker(name=settings.ocr_worker_name, concurrency=settings.ocr_worker_concurrency)
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+
+    try:
+        await worker.run()
+    finally:
+        await s3_clients.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,93 @@
+"""
+Per-connection bookkeeping for the live audio websocket proxy.
+
+Each connection counts frames and bytes in both directions and how long items
+waited in its bounded queues; totals across this worker's connections are exposed
+on /v1/metrics. Per-frame logging is sampled: one line per
+`AUDIO_WS_LOG_SAMPLE_EVERY` frames at DEBUG, plus one INFO summary per connection.
+"""
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+# Deepgram sends compact JSON; the spaced form is accepted in case that ever changes
+FINAL_MARKERS = ('"is_final":true', '"is_final": true')
+
+
+def is_final_result(raw: str) -> bool:
+    """Cheap substring test so only final results are parsed as JSON."""
+    return any(marker in raw for marker in FINAL_MARKERS)
+
+
+class ConnectionStats:
+    def __init__(self, connection_id: int, session_id: Optional[str]):
+        self.connection_id = connection_id
+        self.session_id = session_id
+        self.opened_at = time.monotonic()
+        self.first_result_at: Optional[float] = None
+        self.counts: Counter = Counter()
+        self.max_queue_delay_ms = {"upstream": 0.0, "downstream": 0.0}
+
+    def record_in(self, nbytes: int) -> None:
+        self.counts["frames_in"] += 1
+        self.counts["bytes_in"] += nbytes
+
+    def record_upstream(self, nbytes: int) -> None:
+        self.counts["bytes_to_deepgram"] += nbytes
+
+    def record_out(self, nbytes: int) -> None:
+        self.counts["messages_out"] += 1
+        self.counts["bytes_out"] += nbytes
+        if self.first_result_at is None:
+            self.first_result_at = time.monotonic()
+
+    def record_queue_delay(self, direction: str, enqueued_at: float) -> None:
+        delay_ms = (time.monotonic() - enqueued_at) * 1000
+        self.counts[f"{direction}_queue_delay_ms_total"] += delay_ms
+        if delay_ms > self.max_queue_delay_ms[direction]:
+            self.max_queue_delay_ms[direction] = delay_ms
+
+    def to_dict(self) -> dict:
+        frames, messages = self.counts["frames_in"], self.counts["messages_out"]
+        return {
+            "connection_id": self.connection_id,
+            "session_id": self.session_id,
+            "duration_s": round(time.monotonic() - self.opened_at, 2),
+            "frames_in": frames,
+            "bytes_in": self.counts["bytes_in"],
+            "bytes_to_deepgram": self.counts["bytes_to_deepgram"],
+            "messages_out": messages,
+            "bytes_out": self.counts["bytes_out"],
+            "final_results": self.counts["final_results"],
+            "first_result_ms": round((self.first_result_at - self.opened_at) * 1000, 1) if self.first_result_at else None,
+            "upstream_queue_delay_ms_avg": round(self.counts["upstream_queue_delay_ms_total"] / frames, 2) if frames else None,
+            "downstream_queue_delay_ms_avg": round(self.counts["downstream_queue_delay_ms_total"] / messages, 2) if messages else None,
+            "upstream_queue_delay_ms_max": round(self.max_queue_delay_ms["upstream"], 2),
+            "downstream_queue_delay_ms_max": round(self.max_queue_delay_ms["downstream"], 2),
+        }
+
+
+class ProxyRegistry:
+    def __init__(self):
+        self.active: Dict[int, ConnectionStats] = {}
+        self.totals: Counter = Counter()
+        self._next_id = 0
+
+    def open(self, session_id: Optional[str]) -> ConnectionStats:
+        self._next_id += 1
+        stats = ConnectionStats(self._next_id, session_id)
+        self.active[stats.connection_id] = stats
+        self.totals["connections_opened"] += 1
+        return stats
+
+    def close(self, stats: ConnectionStats) -> None:
+        self.active.pop(stats.connection_id, None)
+        self.totals["connections_closed"] += 1
+        for key in ("frames_in", "bytes_in", "bytes_to_deepgram", "messages_out", "bytes_out", "final_results"):
+            self.totals[key] += stats.counts[key]
+
+    def stats(self) -> dict:
+        return {"active_connections": len(self.active), **self.totals}
+
+
+audio_proxy_registry = ProxyRegistry()
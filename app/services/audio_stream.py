@@ -0,0 +1,108 @@
+"""
+Streams an uploaded recording to S3 and Deepgram without holding it in memory.
+
+The upload is read in `AUDIO_STREAM_CHUNK_BYTES` chunks and each chunk is put on one
+bounded queue per consumer: an S3 multipart upload and a chunked (Transfer-Encoding:
+chunked) Deepgram request, which run concurrently. A full queue pauses the reader, so
+a request holds at most the queued chunks plus one multipart part, whatever the
+recording length. Uploads over `AUDIO_MAX_UPLOAD_BYTES` are rejected with 413. S3
+writes use the shared pooled client from app.services.s3.
+"""
+import asyncio
+import logging
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Tuple, TypeVar
+
+from fastapi import HTTPException, UploadFile
+
+from app.core.config import settings
+from app.services.s3 import object_url, s3_clients, s3_multipart_upload
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+S3_AUDIO_PREFIX = "audio/"
+# Queue sentinel marking the end of the upload
+END_OF_STREAM = b""
+
+
+def audio_key(session_id: str) -> str:
+    return f"{S3_AUDIO_PREFIX}{session_id}"
+
+
+async def read_chunks(upload: UploadFile) -> AsyncIterator[bytes]:
+    total = 0
+    while chunk := await upload.read(settings.audio_stream_chunk_bytes):
+        total += len(chunk)
+        if total > settings.audio_max_upload_bytes:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Audio file exceeds {settings.audio_max_upload_bytes // (1024 * 1024)} MB limit.",
+            )
+        yield chunk
+
+
+class ChunkQueue(asyncio.Queue):
+    """Bounded chunk queue for one consumer; `chunks()` stops at the end-of-stream sentinel."""
+
+    finished = False
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        while not self.finished:
+            chunk = await self.get()
+            if chunk == END_OF_STREAM:
+                self.finished = True
+                return
+            yield chunk
+
+
+async def consume(queue: ChunkQueue, consumer: Callable[[AsyncIterator[bytes]], Awaitable[T]]) -> T:
+    result = await consumer(queue.chunks())
+    # A consumer that returns before reading everything must not leave the reader blocked
+    async for _ in queue.chunks():
+        pass
+    return result
+
+
+async def tee_upload(upload: UploadFile, queues: List[ChunkQueue]) -> int:
+    """Copy the upload into every queue, waiting on the slowest consumer. Returns the byte count."""
+    total = 0
+    async for chunk in read_chunks(upload):
+        total += len(chunk)
+        for queue in queues:
+            await queue.put(chunk)
+    for queue in queues:
+        await queue.put(END_OF_STREAM)
+    return total
+
+
+async def stream_audio(
+    session_id: str,
+    upload: UploadFile,
+    transcribe: Optional[Callable[[AsyncIterator[bytes], str], Awaitable[str]]] = None,
+) -> Tuple[str, Optional[str]]:
+    """
+    Upload the recording to S3 and, if `transcribe` is given, feed it to Deepgram at
+    the same time. `transcribe(chunks, content_type)` receives an async iterator of
+    chunks. Returns the S3 URL and the transcript (None when not transcribing).
+    """
+    key = audio_key(session_id)
+    content_type = upload.content_type
+    s3_queue = ChunkQueue(maxsize=settings.audio_stream_queue_chunks)
+    dg_queue = ChunkQueue(maxsize=settings.audio_stream_queue_chunks)
+    queues = [s3_queue, dg_queue] if transcribe else [s3_queue]
+
+    s3_client = await s3_clients.get()
+    try:
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(tee_upload(upload, queues))
+            tg.create_task(consume(s3_queue, lambda chunks: s3_multipart_upload(s3_client, key, content_type, chunks)))
+            transcript_task = (
+                tg.create_task(consume(dg_queue, lambda chunks: transcribe(chunks, content_type)))
+                if transcribe else None
+            )
+    except ExceptionGroup as group:
+        # Surface one root cause, preferring a 413 or Deepgram error, instead of the group
+        raise next((e for e in group.exceptions if isinstance(e, HTTPException)), group.exceptions[0])
+
+    return object_url(key), transcript_task.result() if transcript_task else None
@@ -0,0 +1,357 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, Union
+from uuid import UUID
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from app.agent.gemini_ocr import ocr_engine
+from app.agent.tagging_agent import score_lead_interest
+from app.core.config import settings
+from app.db.models.lead import Lead, ParsedFields as LeadParsedFields
+from app.services.contact_keys import build_contact_keys
+from app.services.ocr_cache import ocr_cache
+from app.services.pipeline import StagePipeline
+from app.services.s3 import upload_bytes
+from app.services.session_stats import record_leads, session_lead_count
+
+logger = logging.getLogger(__name__)
+
+FIELD_ALIASES = {
+    "full_name": "name",
+    "name": "name",
+    "emails": "email",
+    "email address": "email",
+    "mob": "phone",
+    "mobile": "phone",
+    "designation": "job_title",
+    "org": "company",
+    "organization": "company",
+    "site": "website",
+    "location": "address",
+}
+
+KNOWN_LEAD_FIELDS = {"emails", "phones", "name", "image_url", "interest_score", "existing_customer", "session_id", "created_at"}
+
+PARSED_FIELDS = {"company", "job_title", "address", "website"}
+
+S3_IMAGE_PREFIX = "images/"
+
+async def upload_to_s3(filename, file_bytes, content_type):
+    return await upload_bytes(f"{S3_IMAGE_PREFIX}{filename}", file_bytes, content_type)
+
+def normalize_key(key: str) -> str:
+    return FIELD_ALIASES.get(key.strip().lower(), key.strip().lower())
+
+def normalize_extracted(extracted: dict) -> tuple[dict, dict]:
+    """Split an OCR extraction into Lead core fields and parsed_fields."""
+    normalized = {}
+    parsed_fields = {}
+
+    for raw_key, value in extracted.items():
+        if not value:
+            continue
+        key = normalize_key(raw_key)
+
+        if key == "email":
+            if isinstance(value, str):
+                normalized["emails"] = [e.strip().lower() for e in value.split(",") if "@" in e]
+            elif isinstance(value, list):
+                normalized["emails"] = [e.strip().lower() for e in value if "@" in e]
+
+        elif key == "phone":
+            if isinstance(value, str):
+                normalized["phones"] = [p.strip() for p in value.split(",") if p.strip()]
+            elif isinstance(value, list):
+                normalized["phones"] = [p.strip() for p in value if p.strip()]
+
+        elif key == "name":
+            normalized["name"] = value.strip()
+
+        elif key in PARSED_FIELDS:
+            parsed_fields[key] = value
+
+        elif key == "custom_fields" and isinstance(value, dict):
+            parsed_fields["custom_fields"] = value
+
+    normalized.setdefault("emails", [])
+    normalized.setdefault("phones", [])
+    normalized.setdefault("name", "")
+
+    return normalized, parsed_fields
+
+def scan_from_extraction(extracted: dict) -> tuple[dict, dict]:
+    """Normalized fields and parsed_fields of a card, or a 422 if OCR found no card."""
+    if "message" in extracted:
+        raise HTTPException(status_code=422, detail=extracted["message"])
+    return normalize_extracted(extracted)
+
+async def cache_scan(image_digest: str, image_url: str, scan: tuple[dict, dict]) -> None:
+    normalized, parsed_fields = scan
+    await ocr_cache.set(image_digest, {
+        "image_url": image_url,
+        "normalized": normalized,
+        "parsed_fields": parsed_fields,
+    })
+
+async def find_existing_customer(normalized: dict) -> bool:
+    keys = build_contact_keys(normalized["emails"], normalized["phones"])
+    if not keys:
+        return False
+    existing = await Lead.find_one({"contact_keys": {"$in": keys}})
+    return bool(existing)
+
+def build_lead_ai_data(normalized: dict, parsed_fields: dict) -> dict:
+    return {
+        "full_name": normalized["name"],
+        "emails": normalized["emails"],
+        "phones": normalized["phones"],
+        **parsed_fields.get("custom_fields", {}),
+        **{k: v for k, v in parsed_fields.items() if k != "custom_fields"}
+    }
+
+async def score_and_check_existing(normalized: dict, parsed_fields: dict) -> tuple[dict, bool]:
+    # AI score + reason, and the existing-customer lookup, are independent of each other
+    score_result, existing_customer = await asyncio.gather(
+        score_lead_interest(build_lead_ai_data(normalized, parsed_fields)),
+        find_existing_customer(normalized),
+    )
+    return score_result, existing_customer
+
+def build_lead(session_uuid: UUID, image_url: str, normalized: dict, parsed_fields: dict, score_result: dict, existing_customer: bool) -> Lead:
+    return Lead(
+        session_id=session_uuid,
+        image_url=image_url,
+        emails=normalized["emails"],
+        phones=normalized["phones"],
+        contact_keys=build_contact_keys(normalized["emails"], normalized["phones"]),
+        name=normalized["name"],
+        interest_score=score_result.get("interest_score", 0.0),
+        interest_reason=score_result.get("reason", ""),
+        existing_customer=existing_customer,
+        parsed_fields=LeadParsedFields(**parsed_fields) if parsed_fields else None,
+        created_at=datetime.now(timezone.utc)
+    )
+
+def lead_response(lead: Lead, normalized: dict, parsed_fields: dict, scoring_source: Optional[str] = None) -> dict:
+    return {
+        "lead_id": str(lead.id),
+        "status": "lead saved",
+        "emails": normalized["emails"],
+        "phones": normalized["phones"],
+        "name": normalized["name"],
+        "interest_score": lead.interest_score,
+        "interest_reason": lead.interest_reason,
+        "existing_customer": lead.existing_customer,
+        "parsed_fields": parsed_fields,
+        "scoring_source": scoring_source,
+    }
+
+# === Card Scan Pipeline ===
+
+def build_scan_pipeline(
+    session_uuid: UUID,
+    filename: str,
+    image_bytes: bytes,
+    content_type: str,
+    lead_id: Optional[UUID] = None,
+    counted: bool = False,
+    on_counted: Optional[Callable[[], Awaitable[None]]] = None,
+) -> StagePipeline:
+    image_digest = ocr_cache.image_digest(image_bytes)
+
+    # Stages: cache -> (upload || ocr); ocr -> (dedup || score); all four -> insert -> count
+    pipeline = StagePipeline("card_scan")
+
+    @pipeline.stage("cache")
+    async def cache_lookup():
+        cached = await ocr_cache.get(image_digest)
+        if cached:
+            logger.info("OCR cache hit for %s", image_digest)
+        return cached
+
+    @pipeline.stage("upload", after=["cache"])
+    async def upload(cached):
+        if cached:
+            return cached["image_url"]
+        return await upload_to_s3(filename, image_bytes, content_type)
+
+    @pipeline.stage("ocr", after=["cache"])
+    async def ocr(cached):
+        if cached:
+            return cached["normalized"], cached["parsed_fields"]
+        extracted = await ocr_engine.extract(image_bytes, content_type)
+        logger.info("OCR Output: %s", extracted)
+        return scan_from_extraction(extracted)
+
+    @pipeline.stage("dedup", after=["ocr"])
+    async def dedup(scan):
+        normalized, _ = scan
+        return await find_existing_customer(normalized)
+
+    @pipeline.stage("score", after=["ocr"])
+    async def score(scan):
+        # Score + reason, from rules, cache or the LLM
+        score_result = await score_lead_interest(build_lead_ai_data(*scan))
+        logger.info("Lead scored via %s", score_result["source"])
+        return score_result
+
+    @pipeline.stage("cache_store", after=["cache", "upload", "ocr"])
+    async def cache_store(cached, image_url, scan):
+        if not cached:
+            await cache_scan(image_digest, image_url, scan)
+
+    @pipeline.stage("insert", after=["upload", "ocr", "score", "dedup"])
+    async def insert(image_url, scan, score_result, existing_customer):
+        lead = build_lead(session_uuid, image_url, *scan, score_result, existing_customer)
+        if lead_id is None:
+            await lead.insert()
+            return lead
+        lead.id = lead_id
+        try:
+            await lead.insert()
+        except DuplicateKeyError:
+            # A retry whose earlier attempt already inserted this lead: keep that one
+            logger.info("Lead %s already inserted by an earlier attempt", lead_id)
+            return await Lead.get(lead_id)
+        return lead
+
+    @pipeline.stage("count", after=["insert"])
+    async def count_leads(lead):
+        if counted:
+            return await session_lead_count(session_uuid)
+        # Bump the per-session counters; the updated total is this session's lead count
+        session = await record_leads(session_uuid, [lead])
+        if on_counted:
+            await on_counted()
+        return session.lead_count
+
+    return pipeline
+
+async def scan_card(
+    session_uuid: UUID,
+    filename: str,
+    image_bytes: bytes,
+    content_type: str,
+    lead_id: Optional[UUID] = None,
+    counted: bool = False,
+    on_counted: Optional[Callable[[], Awaitable[None]]] = None,
+) -> tuple[dict, StagePipeline]:
+    """
+    Runs the full card-scan chain (S3, OCR, dedup, scoring, insert, count) for one image.
+    Shared by the synchronous endpoint and the background OCR worker.
+
+    Retried callers make the writes idempotent: with a fixed `lead_id` an earlier
+    attempt's lead is reused instead of inserting a duplicate, and `counted` skips the
+    session counters once `on_counted` has reported them bumped. OCR and scoring
+    results of an earlier attempt come back from their caches.
+    """
+    pipeline = build_scan_pipeline(session_uuid, filename, image_bytes, content_type, lead_id, counted, on_counted)
+    results = await pipeline.run()
+
+    normalized, parsed_fields = results["ocr"]
+    response = lead_response(results["insert"], normalized, parsed_fields, results["score"].get("source"))
+    return {**response, "count": results["count"]}, pipeline
+
+
+# === Batch Scans ===
+
+Card = Tuple[str, bytes, str]
+
+
+async def extract_cards(cards: List[Card]) -> List[Union[dict, Exception]]:
+    """OCR, `OCR_BATCH_SIZE` cards per Gemini call; a failed call fails only its own cards."""
+    size = settings.ocr_batch_size
+    chunks = [cards[n:n + size] for n in range(0, len(cards), size)]
+    outcomes = await asyncio.gather(
+        *(ocr_engine.extract_batch([(image_bytes, content_type) for _, image_bytes, content_type in chunk]) for chunk in chunks),
+        return_exceptions=True,
+    )
+    extracted: List[Union[dict, Exception]] = []
+    for chunk, outcome in zip(chunks, outcomes):
+        extracted.extend([outcome] * len(chunk) if isinstance(outcome, Exception) else outcome)
+    return extracted
+
+async def insert_leads(leads: List[Lead]) -> Dict[int, str]:
+    """Unordered bulk insert: every lead that can be written is. Returns the errors by position."""
+    if not leads:
+        return {}
+    try:
+        await Lead.insert_many(leads, ordered=False)
+    except BulkWriteError as e:
+        return {error["index"]: error["errmsg"] for error in e.details.get("writeErrors", [])}
+    return {}
+
+async def scan_card_batch(session_uuid: UUID, cards: List[Card]) -> tuple[List[dict], int, int]:
+    """
+    Runs the card-scan stages for a stack of (filename, image_bytes, content_type):
+    S3 uploads in parallel, several cards per OCR call, and one unordered bulk insert.
+    A card failing at any stage gets its own error and the rest are still saved.
+    Returns the per-card results in input order, how many leads were saved, and the
+    session's lead count.
+    """
+    results: List[dict] = [{"filename": filename} for filename, _, _ in cards]
+
+    def fail(i: int, error: str) -> None:
+        logger.error("Card scan failed for %s: %s", cards[i][0], error)
+        results[i].update(status="failed", error=error)
+
+    digests = [ocr_cache.image_digest(image_bytes) for _, image_bytes, _ in cards]
+    cached = await asyncio.gather(*(ocr_cache.get(digest) for digest in digests))
+
+    # Card index -> (image_url, (normalized, parsed_fields))
+    scans: Dict[int, tuple[str, tuple[dict, dict]]] = {
+        i: (hit["image_url"], (hit["normalized"], hit["parsed_fields"])) for i, hit in enumerate(cached) if hit
+    }
+
+    misses = [i for i, hit in enumerate(cached) if not hit]
+    if misses:
+        image_urls, extractions = await asyncio.gather(
+            asyncio.gather(*(upload_to_s3(*cards[i]) for i in misses), return_exceptions=True),
+            extract_cards([cards[i] for i in misses]),
+        )
+        for i, image_url, extracted in zip(misses, image_urls, extractions):
+            if isinstance(image_url, Exception):
+                fail(i, f"Upload failed: {image_url}")
+            elif isinstance(extracted, Exception):
+                fail(i, f"OCR processing failed: {extracted}")
+            else:
+                try:
+                    scans[i] = (image_url, scan_from_extraction(extracted))
+                except HTTPException as e:
+                    fail(i, e.detail)
+        await asyncio.gather(*(cache_scan(digests[i], *scans[i]) for i in misses if i in scans))
+
+    order = sorted(scans)
+    scored = await asyncio.gather(
+        *(score_and_check_existing(*scans[i][1]) for i in order),
+        return_exceptions=True,
+    )
+
+    built: List[tuple[int, Lead, Optional[str]]] = []
+    for i, outcome in zip(order, scored):
+        if isinstance(outcome, Exception):
+            fail(i, f"Lead scoring failed: {getattr(outcome, 'detail', outcome)}")
+            continue
+        image_url, scan = scans[i]
+        try:
+            lead = build_lead(session_uuid, image_url, *scan, *outcome)
+        except ValidationError as ve:
+            fail(i, str(ve))
+            continue
+        built.append((i, lead, outcome[0].get("source")))
+
+    insert_errors = await insert_leads([lead for _, lead, _ in built])
+    saved: List[Lead] = []
+    for n, (i, lead, scoring_source) in enumerate(built):
+        if n in insert_errors:
+            fail(i, f"Insert failed: {insert_errors[n]}")
+            continue
+        results[i].update(lead_response(lead, *scans[i][1], scoring_source))
+        saved.append(lead)
+
+    count = (await record_leads(session_uuid, saved)).lead_count if saved else await session_lead_count(session_uuid)
+    return results, len(saved), count
@@ -0,0 +1,43 @@
+from typing import Iterable, List, Optional
+
+import phonenumbers
+
+from app.core.config import settings
+
+EMAIL_KEY_PREFIX = "email:"
+PHONE_KEY_PREFIX = "phone:"
+
+
+def normalize_email(email: str) -> Optional[str]:
+    """Lowercases and strips sub-addressing: 'Jane.Doe+expo@Acme.com' -> 'jane.doe@acme.com'."""
+    email = email.strip().lower()
+    local, sep, domain = email.rpartition("@")
+    if not sep or not local or not domain:
+        return None
+    local = local.split("+", 1)[0]
+    return f"{local}@{domain}" if local else None
+
+
+def normalize_phone(phone: str, region: Optional[str] = None) -> Optional[str]:
+    """E.164 form of a phone number, e.g. '(415) 555-0100' -> '+14155550100'."""
+    try:
+        number = phonenumbers.parse(phone, region or settings.default_phone_region)
+    except phonenumbers.NumberParseException:
+        return None
+    if not phonenumbers.is_possible_number(number):
+        return None
+    return phonenumbers.format_number(number, phonenumbers.PhoneNumberFormat.E164)
+
+
+def build_contact_keys(emails: Iterable[str], phones: Iterable[str]) -> List[str]:
+    """Canonical, prefixed identity keys stored on a Lead for the existing-customer lookup."""
+    keys = set()
+    for email in emails:
+        normalized = normalize_email(email)
+        if normalized:
+            keys.add(EMAIL_KEY_PREFIX + normalized)
+    for phone in phones:
+        normalized = normalize_phone(phone)
+        if normalized:
+            keys.add(PHONE_KEY_PREFIX + normalized)
+    return sorted(keys)
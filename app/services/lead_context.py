@@ -0,0 +1,16 @@
+from typing import Dict, Optional, Tuple
+from uuid import UUID
+
+from app.db.models.lead import Lead
+
+
+async def load_lead_email_context(session_uuid: UUID) -> Tuple[str, Dict[str, Optional[str]]]:
+    """Name plus company/job title of the session's lead, used to personalize emails."""
+    lead_doc = await Lead.find_one({"session_id": session_uuid})
+    if not lead_doc or not lead_doc.name:
+        # If lead not found, still proceed with empty name
+        return "", {}
+    return lead_doc.name, {
+        "company": getattr(lead_doc.parsed_fields, "company", None) if lead_doc.parsed_fields else None,
+        "job_title": getattr(lead_doc.parsed_fields, "job_title", None) if lead_doc.parsed_fields else None,
+    }
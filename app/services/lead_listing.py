@@ -0,0 +1,87 @@
+"""
+Paged, projected reads of a session's leads for GET /v1/leads.
+
+Leads are ordered by (created_at, _id), which the `session_id_created_at_id` index
+serves without an in-memory sort. A page cursor is the (created_at, _id) of the last
+lead returned, base64-encoded, so each page is an index seek instead of a skip.
+
+Projections are pydantic models built from a subset of Lead's fields and cached per
+field set; Beanie turns them into a Mongo projection, so excluded fields never leave
+the database. `id` and `created_at` are always included because the cursor needs them.
+"""
+import base64
+import json
+from datetime import datetime
+from functools import lru_cache
+from typing import AsyncIterator, FrozenSet, Iterable, Optional, Tuple, Type
+from uuid import UUID
+
+from fastapi import HTTPException
+from pydantic import BaseModel, ConfigDict, create_model
+
+from app.db.models.lead import Lead
+
+CURSOR_FIELDS = frozenset({"id", "created_at"})
+LEAD_FIELDS = frozenset(name for name, field in Lead.model_fields.items() if not field.exclude)
+
+
+# === Cursors ===
+
+def encode_cursor(created_at: datetime, lead_id: UUID) -> str:
+    raw = json.dumps({"created_at": created_at.isoformat(), "id": str(lead_id)})
+    return base64.urlsafe_b64encode(raw.encode()).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(raw["created_at"]), UUID(raw["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+# === Projection ===
+
+def parse_field_list(value: Optional[str]) -> FrozenSet[str]:
+    fields = frozenset(name.strip() for name in (value or "").split(",") if name.strip())
+    unknown = fields - LEAD_FIELDS
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown lead fields: {', '.join(sorted(unknown))}")
+    return fields
+
+
+def select_fields(fields: Optional[str], exclude: Optional[str]) -> FrozenSet[str]:
+    selected = parse_field_list(fields) or LEAD_FIELDS
+    return (selected - parse_field_list(exclude)) | CURSOR_FIELDS
+
+
+@lru_cache(maxsize=64)
+def lead_projection(fields: FrozenSet[str]) -> Type[BaseModel]:
+    # In Lead's own field order, so responses keep a stable key order
+    definitions = {name: (field.annotation, field) for name, field in Lead.model_fields.items() if name in fields}
+    return create_model("LeadProjection", __config__=ConfigDict(populate_by_name=True), **definitions)
+
+
+# === Query ===
+
+async def iter_leads(
+    session_uuid: UUID,
+    fields: Iterable[str],
+    after: Optional[Tuple[datetime, UUID]] = None,
+    limit: Optional[int] = None,
+) -> AsyncIterator[BaseModel]:
+    """Leads of the session after the decoded cursor `after`, in (created_at, _id) order, straight off the Motor cursor."""
+    query = {"session_id": session_uuid}
+    if after:
+        created_at, lead_id = after
+        query["$or"] = [
+            {"created_at": {"$gt": created_at}},
+            {"created_at": created_at, "_id": {"$gt": lead_id}},
+        ]
+    find = Lead.find(query, projection_model=lead_projection(frozenset(fields))).sort(
+        [("created_at", 1), ("_id", 1)]
+    )
+    if limit is not None:
+        find = find.limit(limit)
+    async for lead in find:
+        yield lead
@@ -0,0 +1,174 @@
+"""
+Builds a session's transcript, summary and (optionally) email draft from the live
+Deepgram stream, so nothing has to be re-uploaded or re-transcribed afterwards.
+
+Final results are appended as they arrive. A background loop saves the transcript
+to `Session` every `LIVE_SESSION_SAVE_INTERVAL_SECONDS` and extends a rolling
+summary once `LIVE_SUMMARY_MIN_NEW_WORDS` new words have accumulated, at most every
+`LIVE_SUMMARY_INTERVAL_SECONDS`. Each pass sends the LLM the previous summary plus
+only the segments said since, never the whole transcript, so the cost grows with
+the conversation rather than with its square.
+
+When the socket closes, `close` stops the loop and saves the transcript, then hands
+the final summary and email draft to a background task so the close is not held up
+by the LLM. Those tasks are tracked, and `drain_finalizing` waits for them on shutdown.
+"""
+import asyncio
+import logging
+import time
+from contextlib import suppress
+from datetime import datetime, timezone
+from typing import List, Optional
+from uuid import UUID, uuid4
+
+from beanie.odm.operators.update.general import Set, SetOnInsert
+
+from app.agent.personalized_email import generate_email_body
+from app.agent.summarize import summarize_interest, update_summary
+from app.core.config import settings
+from app.db.models.email import PersonalizedEmail
+from app.db.models.session import Session
+from app.services.lead_context import load_lead_email_context
+
+logger = logging.getLogger(__name__)
+
+# Closed sessions whose final summary or email draft is still being written
+_finalizing: set[asyncio.Task] = set()
+
+
+def utc_now():
+    return datetime.now(timezone.utc)
+
+
+def final_transcript(message: dict) -> Optional[str]:
+    """Transcript text of a Deepgram live `Results` message, or None unless it is final."""
+    if not message.get("is_final"):
+        return None
+    alternatives = message.get("channel", {}).get("alternatives") or [{}]
+    text = (alternatives[0].get("transcript") or "").strip()
+    return text or None
+
+
+async def drain_finalizing(timeout: float) -> None:
+    """Give closed sessions up to `timeout` seconds to finish finalizing, e.g. on shutdown."""
+    if _finalizing:
+        logger.info("Waiting for %s live sessions to finalize", len(_finalizing))
+        await asyncio.wait(set(_finalizing), timeout=timeout)
+
+
+class LiveSession:
+    def __init__(self, session_uuid: UUID, draft_email: Optional[bool] = None):
+        self.session_uuid = session_uuid
+        self.draft_email = settings.live_session_email_draft if draft_email is None else draft_email
+        self.segments: List[str] = []
+        self.word_count = 0
+        self.summary = ""
+        self.summarized_words = 0
+        self.summarized_segments = 0
+        self._saved_words = 0
+        self._summary_saved = ""
+        self._last_summary_at = 0.0
+        self._summary_task: Optional[asyncio.Task] = None
+        self._loop_task: Optional[asyncio.Task] = None
+
+    @property
+    def transcript(self) -> str:
+        return " ".join(self.segments)
+
+    def add_result(self, message: dict) -> None:
+        text = final_transcript(message)
+        if text:
+            self.segments.append(text)
+            self.word_count += len(text.split())
+
+    def start(self) -> None:
+        self._loop_task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.live_session_save_interval_seconds)
+            try:
+                await self.save()
+            except Exception:
+                logger.exception("Live session save failed for %s", self.session_uuid)
+            if self._summary_due():
+                self._summary_task = asyncio.create_task(self._summarize())
+
+    def _summary_due(self) -> bool:
+        return (
+            (self._summary_task is None or self._summary_task.done())
+            and self.word_count - self.summarized_words >= settings.live_summary_min_new_words
+            and time.monotonic() - self._last_summary_at >= settings.live_summary_interval_seconds
+        )
+
+    async def _summarize(self) -> None:
+        words, segments = self.word_count, len(self.segments)
+        new_part = " ".join(self.segments[self.summarized_segments:segments])
+        self._last_summary_at = time.monotonic()
+        if self.summary:
+            summary = await update_summary(self.summary, new_part)
+        else:
+            summary = await summarize_interest(new_part)
+        if summary.startswith("Summary unavailable"):
+            logger.warning("Rolling summary failed for %s: %s", self.session_uuid, summary)
+            return
+        self.summary, self.summarized_words, self.summarized_segments = summary, words, segments
+
+    async def save(self) -> None:
+        """Write the transcript and summary if either changed since the last save."""
+        if self.word_count == self._saved_words and self.summary == self._summary_saved:
+            return
+        words, summary = self.word_count, self.summary
+        # Partial $set so lead counters updated concurrently by card scans are kept
+        await Session.find_one({"session_id": self.session_uuid}).update(
+            Set({"transcription": self.transcript, "summary": summary}),
+            SetOnInsert({"_id": uuid4(), "created_at": utc_now()}),
+            upsert=True,
+        )
+        self._saved_words, self._summary_saved = words, summary
+
+    async def stop(self) -> None:
+        """Stop the background loop and wait until it has, so it can't write alongside finalize."""
+        if self._loop_task:
+            self._loop_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._loop_task
+            self._loop_task = None
+
+    async def close(self) -> asyncio.Task:
+        """Stop the loop and save the transcript now; finalize in a tracked background task."""
+        await self.stop()
+        try:
+            await self.save()
+        except Exception:
+            logger.exception("Live session save failed for %s", self.session_uuid)
+        task = asyncio.create_task(self._finalize_logged())
+        _finalizing.add(task)
+        task.add_done_callback(_finalizing.discard)
+        return task
+
+    async def _finalize_logged(self) -> None:
+        try:
+            await self.finalize()
+        except Exception:
+            logger.exception("Failed to finalize live session %s", self.session_uuid)
+
+    async def finalize(self) -> None:
+        """Stop the loop, fold the last segments into the summary, draft the email if enabled, and save."""
+        await self.stop()
+        if self._summary_task and not self._summary_task.done():
+            await asyncio.wait([self._summary_task])
+        if self.word_count > self.summarized_words:
+            await self._summarize()
+        await self.save()
+
+        if self.draft_email and self.segments:
+            lead_name, extra_info = await load_lead_email_context(self.session_uuid)
+            email_result = await generate_email_body(name=lead_name, transcript=self.transcript, extra_info=extra_info)
+            await PersonalizedEmail(
+                session_id=self.session_uuid,
+                subject="This is your personalized email",
+                body=email_result.get("text", ""),
+                created_at=utc_now(),
+            ).insert()
+        logger.info("Live session %s finalized: %s words", self.session_uuid, self.word_count)
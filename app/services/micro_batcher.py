@@ -0,0 +1,86 @@
+import asyncio
+import logging
+from collections import Counter
+from typing import Awaitable, Callable, Generic, List, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    Collects concurrent `submit` calls for up to `window_ms` (or until `max_batch_size`
+    items are waiting) and hands them to `handler` as one list. The handler must return
+    one result per item, in order; each caller receives its own result or the batch's error.
+    """
+
+    def __init__(self, handler: Callable[[List[T]], Awaitable[List[R]]], window_ms: float, max_batch_size: int, name: str = "batch"):
+        self.handler = handler
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self.name = name
+        self._pending: List[Tuple[T, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+        self._batches = 0
+        self._items = 0
+        self._flush_reasons: Counter = Counter()
+        self._sizes: Counter = Counter()
+
+    async def submit(self, item: T) -> R:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush("full")
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush, "window")
+        return await future
+
+    def _flush(self, reason: str):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        self._batches += 1
+        self._items += len(batch)
+        self._flush_reasons[reason] += 1
+        self._sizes[len(batch)] += 1
+        task = asyncio.create_task(self._run(batch))
+        # Keep a reference so the task isn't garbage-collected mid-flight
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[T, asyncio.Future]]):
+        items = [item for item, _ in batch]
+        try:
+            results = await self.handler(items)
+            if len(results) != len(items):
+                raise ValueError(f"{self.name} handler returned {len(results)} results for {len(items)} items")
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "window_ms": self.window * 1000,
+            "max_batch_size": self.max_batch_size,
+            "batches": self._batches,
+            "items": self._items,
+            "mean_batch_size": round(self._items / self._batches, 2) if self._batches else 0.0,
+            "fill_rate": round(self._items / (self._batches * self.max_batch_size), 4) if self._batches else 0.0,
+            "flush_reasons": dict(self._flush_reasons),
+            "batch_sizes": dict(sorted(self._sizes.items())),
+        }
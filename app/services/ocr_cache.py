@@ -0,0 +1,109 @@
+import hashlib
+import json
+import logging
+import time
+from typing import Optional
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.redis import redis
+
+logger = logging.getLogger(__name__)
+
+
+class OcrResultCache:
+    """
+    Read-through cache for card scans, keyed by the SHA-256 of the raw image bytes.
+
+    Each entry holds the normalized extraction and the S3 URL of the first upload.
+    Entries expire after `ttl_seconds`; a sorted set of last-access times keeps the
+    entry count under `max_entries` by evicting the least recently used digests.
+    Redis failures are logged and treated as misses so scans never depend on the cache.
+    """
+
+    def __init__(self, client: Redis, ttl_seconds: int, max_entries: int, enabled: bool = True, prefix: str = "ocr:card"):
+        self.client = client
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.prefix = prefix
+        self._lru_key = f"{prefix}:lru"
+        self._stats_key = f"{prefix}:stats"
+
+    @staticmethod
+    def image_digest(image_bytes: bytes) -> str:
+        return hashlib.sha256(image_bytes).hexdigest()
+
+    def _entry_key(self, digest: str) -> str:
+        return f"{self.prefix}:{digest}"
+
+    async def get(self, digest: str) -> Optional[dict]:
+        if not self.enabled:
+            return None
+        try:
+            raw = await self.client.get(self._entry_key(digest))
+            async with self.client.pipeline(transaction=False) as pipe:
+                pipe.hincrby(self._stats_key, "hits" if raw else "misses", 1)
+                if raw:
+                    pipe.zadd(self._lru_key, {digest: time.time()})
+                await pipe.execute()
+        except RedisError as e:
+            logger.warning("OCR cache lookup failed: %s", e)
+            return None
+        return json.loads(raw) if raw else None
+
+    async def set(self, digest: str, value: dict) -> None:
+        if not self.enabled:
+            return
+        now = time.time()
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                pipe.set(self._entry_key(digest), json.dumps(value), ex=self.ttl_seconds)
+                pipe.zadd(self._lru_key, {digest: now})
+                # Drop index entries whose value has already expired
+                pipe.zremrangebyscore(self._lru_key, "-inf", now - self.ttl_seconds)
+                pipe.zcard(self._lru_key)
+                *_, size = await pipe.execute()
+
+            overflow = size - self.max_entries
+            if overflow > 0:
+                evicted = [member for member, _ in await self.client.zpopmin(self._lru_key, overflow)]
+                if evicted:
+                    async with self.client.pipeline(transaction=False) as pipe:
+                        pipe.delete(*(self._entry_key(d) for d in evicted))
+                        pipe.hincrby(self._stats_key, "evictions", len(evicted))
+                        await pipe.execute()
+        except RedisError as e:
+            logger.warning("OCR cache store failed: %s", e)
+
+    async def stats(self) -> dict:
+        if not self.enabled:
+            return {"enabled": False}
+        try:
+            counters = await self.client.hgetall(self._stats_key)
+            size = await self.client.zcard(self._lru_key)
+        except RedisError as e:
+            return {"enabled": True, "error": str(e)}
+        hits = int(counters.get("hits", 0))
+        misses = int(counters.get("misses", 0))
+        lookups = hits + misses
+        return {
+            "enabled": True,
+            "entries": size,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": hits,
+            "misses": misses,
+            "evictions": int(counters.get("evictions", 0)),
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+ocr_cache = OcrResultCache(
+    redis,
+    ttl_seconds=settings.ocr_cache_ttl_seconds,
+    max_entries=settings.ocr_cache_max_entries,
+    enabled=settings.ocr_cache_enabled,
+)
@@ -0,0 +1,262 @@
+import asyncio
+import base64
+import json
+import logging
+import socket
+import time
+from typing import Optional
+from uuid import UUID, uuid4
+
+from fastapi import HTTPException
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.redis import redis
+from app.services.card_scan import scan_card
+
+logger = logging.getLogger(__name__)
+
+QUEUE_KEY = "ocr:jobs:queue"
+DELAYED_KEY = "ocr:jobs:delayed"
+DEAD_LETTER_KEY = "ocr:jobs:dead"
+PROCESSING_KEY_PREFIX = "ocr:jobs:processing"
+WORKERS_KEY = "ocr:jobs:workers"
+HEARTBEAT_KEY_PREFIX = "ocr:jobs:heartbeat"
+
+# A worker whose heartbeat is older than the TTL is gone, and its jobs are requeued
+WORKER_HEARTBEAT_SECONDS = 10
+WORKER_HEARTBEAT_TTL_SECONDS = 60
+
+# Backoff while Redis itself is unreachable
+REDIS_RETRY_BASE_SECONDS = 0.5
+REDIS_RETRY_MAX_SECONDS = 30.0
+
+
+def job_key(job_id: str) -> str:
+    return f"ocr:job:{job_id}"
+
+
+def image_key(job_id: str) -> str:
+    return f"ocr:job:{job_id}:image"
+
+
+def processing_key(worker_name: str) -> str:
+    return f"{PROCESSING_KEY_PREFIX}:{worker_name}"
+
+
+def heartbeat_key(worker_name: str) -> str:
+    return f"{HEARTBEAT_KEY_PREFIX}:{worker_name}"
+
+# === Producer API (web process) ===
+
+async def enqueue_card_scan(session_uuid: UUID, filename: str, image_bytes: bytes, content_type: str, client: Redis = redis) -> str:
+    job_id = str(uuid4())
+    now = time.time()
+    async with client.pipeline(transaction=True) as pipe:
+        pipe.hset(job_key(job_id), mapping={
+            "status": "queued",
+            "attempts": 0,
+            "session_id": str(session_uuid),
+            "filename": filename or "",
+            "content_type": content_type,
+            "created_at": now,
+            "updated_at": now,
+        })
+        pipe.expire(job_key(job_id), settings.ocr_job_ttl_seconds)
+        # The client decodes responses as text, so image bytes travel base64-encoded
+        pipe.set(image_key(job_id), base64.b64encode(image_bytes).decode("ascii"), ex=settings.ocr_job_ttl_seconds)
+        pipe.lpush(QUEUE_KEY, job_id)
+        await pipe.execute()
+    return job_id
+
+
+async def get_job(job_id: str, client: Redis = redis) -> Optional[dict]:
+    job = await client.hgetall(job_key(job_id))
+    if not job:
+        return None
+    return {
+        "job_id": job_id,
+        "status": job["status"],
+        "attempts": int(job.get("attempts", 0)),
+        "session_id": job.get("session_id"),
+        "result": json.loads(job["result"]) if job.get("result") else None,
+        "error": job.get("error"),
+        "created_at": float(job["created_at"]),
+        "updated_at": float(job["updated_at"]),
+    }
+
+
+async def queue_stats(client: Redis = redis) -> dict:
+    try:
+        async with client.pipeline(transaction=False) as pipe:
+            pipe.llen(QUEUE_KEY)
+            pipe.zcard(DELAYED_KEY)
+            pipe.llen(DEAD_LETTER_KEY)
+            queued, delayed, dead = await pipe.execute()
+    except RedisError as e:
+        return {"error": str(e)}
+    return {"queued": queued, "retry_scheduled": delayed, "dead_letter": dead}
+
+# === Worker ===
+
+class OcrJobWorker:
+    """
+    Consumes card-scan jobs from Redis and runs them through `scan_card`.
+
+    Jobs are moved atomically onto a per-worker processing list while they run. A
+    worker requeues its own list when it restarts under the same name, and every
+    worker requeues the lists of workers whose heartbeat has expired, so jobs of a
+    container that was replaced or scaled away (and so renamed) are not lost.
+    Transient failures are retried with exponential backoff via a delayed sorted set;
+    jobs that exhaust their attempts are pushed onto the dead-letter list. Retries are
+    idempotent: the lead's _id is the job id, and the job records once the session
+    counters include it, so a retry never inserts or counts the lead twice.
+    """
+
+    def __init__(self, client: Redis = redis, name: Optional[str] = None, concurrency: int = 1):
+        self.client = client
+        self.name = name or socket.gethostname()
+        self.concurrency = concurrency
+        self.processing_key = processing_key(self.name)
+        self._stopping = asyncio.Event()
+
+    def stop(self):
+        self._stopping.set()
+
+    async def recover(self):
+        """Requeue jobs left on this worker's processing list by a previous run."""
+        while job_id := await self.client.lmove(self.processing_key, QUEUE_KEY, "RIGHT", "LEFT"):
+            logger.warning("[OCR worker] Requeued interrupted job %s", job_id)
+
+    async def heartbeat(self):
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.sadd(WORKERS_KEY, self.name)
+            pipe.set(heartbeat_key(self.name), time.time(), ex=WORKER_HEARTBEAT_TTL_SECONDS)
+            await pipe.execute()
+
+    async def reclaim_orphaned_jobs(self):
+        """Requeue jobs on the processing lists of workers whose heartbeat has expired."""
+        for name in await self.client.smembers(WORKERS_KEY):
+            if name == self.name or await self.client.exists(heartbeat_key(name)):
+                continue
+            # lmove is atomic, so workers sweeping the same list never requeue a job twice
+            while job_id := await self.client.lmove(processing_key(name), QUEUE_KEY, "RIGHT", "LEFT"):
+                logger.warning("[OCR worker] Requeued job %s of departed worker %s", job_id, name)
+            await self.client.srem(WORKERS_KEY, name)
+
+    async def promote_due_retries(self):
+        due = await self.client.zrangebyscore(DELAYED_KEY, "-inf", time.time())
+        for job_id in due:
+            # zrem guards against two workers promoting the same job
+            if await self.client.zrem(DELAYED_KEY, job_id):
+                await self.client.lpush(QUEUE_KEY, job_id)
+
+    async def _set_status(self, job_id: str, **fields):
+        await self.client.hset(job_key(job_id), mapping={**fields, "updated_at": time.time()})
+
+    async def process(self, job_id: str):
+        job = await self.client.hgetall(job_key(job_id))
+        encoded_image = await self.client.get(image_key(job_id))
+        if not job or encoded_image is None:
+            logger.error("[OCR worker] Job %s expired before processing", job_id)
+            return
+
+        attempts = int(job.get("attempts", 0)) + 1
+        await self._set_status(job_id, status="processing", attempts=attempts)
+
+        async def mark_counted():
+            try:
+                await self.client.hset(job_key(job_id), "lead_counted", 1)
+            except RedisError as e:
+                logger.warning("[OCR worker] Could not record counters for job %s: %s", job_id, e)
+
+        try:
+            result, pipeline = await scan_card(
+                UUID(job["session_id"]),
+                job["filename"],
+                base64.b64decode(encoded_image),
+                job["content_type"],
+                lead_id=UUID(job_id),
+                counted=job.get("lead_counted") == "1",
+                on_counted=mark_counted,
+            )
+        except HTTPException as e:
+            if e.status_code < 500:
+                # Client-side problems (e.g. no card in the image) won't improve on retry
+                await self._set_status(job_id, status="failed", error=json.dumps(e.detail))
+                await self.client.delete(image_key(job_id))
+                return
+            await self._retry_or_dead_letter(job_id, attempts, str(e.detail))
+            return
+        except Exception as e:
+            logger.exception("[OCR worker] Job %s failed", job_id)
+            await self._retry_or_dead_letter(job_id, attempts, str(e))
+            return
+
+        await self._set_status(job_id, status="done", result=json.dumps(result), error="")
+        await self.client.delete(image_key(job_id))
+        logger.info("[OCR worker] Job %s done in %s", job_id, pipeline.server_timing())
+
+    async def _retry_or_dead_letter(self, job_id: str, attempts: int, error: str):
+        if attempts < settings.ocr_job_max_attempts:
+            delay = settings.ocr_job_retry_backoff_seconds * 2 ** (attempts - 1)
+            await self._set_status(job_id, status="retrying", error=error)
+            await self.client.zadd(DELAYED_KEY, {job_id: time.time() + delay})
+            logger.warning("[OCR worker] Job %s attempt %s failed, retrying in %.1fs", job_id, attempts, delay)
+        else:
+            await self._set_status(job_id, status="dead", error=error)
+            await self.client.lpush(DEAD_LETTER_KEY, job_id)
+            logger.error("[OCR worker] Job %s moved to dead-letter after %s attempts", job_id, attempts)
+
+    async def _consume(self):
+        backoff = REDIS_RETRY_BASE_SECONDS
+        while not self._stopping.is_set():
+            try:
+                await self.promote_due_retries()
+                job_id = await self.client.blmove(QUEUE_KEY, self.processing_key, timeout=1, src="RIGHT", dest="LEFT")
+                if job_id:
+                    await self._handle(job_id)
+                backoff = REDIS_RETRY_BASE_SECONDS
+            except RedisError as e:
+                # Keep the worker alive through Redis outages
+                logger.error("[OCR worker] Redis error, retrying in %.1fs: %s", backoff, e)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, REDIS_RETRY_MAX_SECONDS)
+
+    async def _handle(self, job_id: str):
+        try:
+            await self.process(job_id)
+        except RedisError:
+            # Job state could not be read or written: hand the job back to the queue.
+            # If Redis is still down, it stays on the processing list for recover()
+            async with self.client.pipeline(transaction=True) as pipe:
+                pipe.lrem(self.processing_key, 1, job_id)
+                pipe.rpush(QUEUE_KEY, job_id)
+                await pipe.execute()
+            raise
+        await self.client.lrem(self.processing_key, 1, job_id)
+
+    async def _keep_alive(self):
+        while not self._stopping.is_set():
+            try:
+                await self.heartbeat()
+                await self.reclaim_orphaned_jobs()
+            except RedisError as e:
+                logger.error("[OCR worker] Heartbeat failed: %s", e)
+            try:
+                await asyncio.wait_for(self._stopping.wait(), WORKER_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run(self):
+        # Heartbeat first, so no other worker reclaims the jobs this one is about to take
+        await self.heartbeat()
+        await self.recover()
+        logger.info("[OCR worker] %s consuming %s with concurrency %s", self.name, QUEUE_KEY, self.concurrency)
+        await asyncio.gather(self._keep_alive(), *(self._consume() for _ in range(self.concurrency)))
+        try:
+            # Stopped cleanly with an empty processing list: let the next sweep drop this worker
+            await self.client.delete(heartbeat_key(self.name))
+        except RedisError as e:
+            logger.warning("[OCR worker] Could not clear heartbeat: %s", e)
@@ -0,0 +1,139 @@
+"""
+One long-lived, pooled S3 client shared by every upload path.
+
+Creating an aiobotocore client per upload repeats credential resolution, endpoint
+setup and the TLS handshake for every card and recording. `s3_clients` holds a
+single client per process instead, with a connection pool of
+`S3_MAX_POOL_CONNECTIONS` kept alive between requests. It is opened in the app
+lifespan and closed on shutdown; anything that runs without the lifespan (the OCR
+worker, scripts) gets it opened on first use.
+
+`upload_bytes` sends small bodies with one put_object and bodies over
+`S3_MULTIPART_THRESHOLD_BYTES` as a multipart upload, which `s3_multipart_upload`
+also does for streamed audio.
+"""
+import asyncio
+import logging
+from contextlib import AsyncExitStack
+from typing import AsyncIterator, List, Optional
+
+import aiobotocore.session
+from aiobotocore.config import AioConfig
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def object_url(key: str) -> str:
+    return f"https://{settings.bucket_name}.s3.{settings.aws_origin}.amazonaws.com/{key}"
+
+
+def create_s3_client():
+    """A new client context; prefer `s3_clients.get()`, which is pooled and shared."""
+    session = aiobotocore.session.get_session()
+    return session.create_client(
+        's3',
+        region_name=settings.aws_origin,
+        aws_secret_access_key=settings.aws_secret_access_key,
+        aws_access_key_id=settings.aws_access_key,
+        endpoint_url=settings.s3_endpoint_url,
+        config=AioConfig(
+            max_pool_connections=settings.s3_max_pool_connections,
+            connect_timeout=settings.s3_connect_timeout_seconds,
+            read_timeout=settings.s3_read_timeout_seconds,
+            retries={"max_attempts": settings.s3_max_attempts, "mode": "standard"},
+            tcp_keepalive=True,
+        ),
+    )
+
+
+class S3ClientPool:
+    def __init__(self):
+        self._client = None
+        self._stack: Optional[AsyncExitStack] = None
+        self._lock = asyncio.Lock()
+
+    async def start(self):
+        async with self._lock:
+            if self._client is None:
+                self._stack = AsyncExitStack()
+                self._client = await self._stack.enter_async_context(create_s3_client())
+                logger.info("S3 client opened (pool of %d connections)", settings.s3_max_pool_connections)
+        return self._client
+
+    async def get(self):
+        return self._client or await self.start()
+
+    async def close(self) -> None:
+        async with self._lock:
+            if self._stack is not None:
+                await self._stack.aclose()
+            self._client, self._stack = None, None
+
+
+s3_clients = S3ClientPool()
+
+
+# === Uploads ===
+
+async def s3_multipart_upload(s3_client, key: str, content_type: str, chunks: AsyncIterator[bytes]) -> None:
+    """
+    Upload `chunks` as S3 multipart parts of at least `S3_MULTIPART_PART_BYTES`.
+    A body shorter than one part is sent with a single put_object instead.
+    The multipart upload is aborted on any error so no orphaned parts are billed.
+    """
+    part_size = settings.s3_multipart_part_bytes
+    buffer = bytearray()
+    upload_id: Optional[str] = None
+    parts: List[dict] = []
+
+    async def flush():
+        nonlocal upload_id
+        if upload_id is None:
+            created = await s3_client.create_multipart_upload(Bucket=settings.bucket_name, Key=key, ContentType=content_type)
+            upload_id = created["UploadId"]
+        part_number = len(parts) + 1
+        uploaded = await s3_client.upload_part(
+            Bucket=settings.bucket_name, Key=key, UploadId=upload_id, PartNumber=part_number, Body=bytes(buffer),
+        )
+        parts.append({"ETag": uploaded["ETag"], "PartNumber": part_number})
+        buffer.clear()
+
+    try:
+        async for chunk in chunks:
+            buffer.extend(chunk)
+            if len(buffer) >= part_size:
+                await flush()
+
+        if upload_id is None:
+            await s3_client.put_object(Bucket=settings.bucket_name, Key=key, Body=bytes(buffer), ContentType=content_type)
+            return
+        if buffer:
+            await flush()
+        await s3_client.complete_multipart_upload(
+            Bucket=settings.bucket_name, Key=key, UploadId=upload_id, MultipartUpload={"Parts": parts},
+        )
+    except BaseException:
+        if upload_id is not None:
+            try:
+                await asyncio.shield(s3_client.abort_multipart_upload(Bucket=settings.bucket_name, Key=key, UploadId=upload_id))
+            except Exception:
+                logger.warning("Failed to abort multipart upload %s for %s", upload_id, key, exc_info=True)
+        raise
+
+
+async def iter_parts(body: bytes) -> AsyncIterator[bytes]:
+    view = memoryview(body)
+    for start in range(0, len(body), settings.s3_multipart_part_bytes):
+        yield view[start:start + settings.s3_multipart_part_bytes]
+
+
+async def upload_bytes(key: str, body: bytes, content_type: str) -> str:
+    """Upload `body` under `key` with the shared client and return its public URL."""
+    s3_client = await s3_clients.get()
+    if len(body) > settings.s3_multipart_threshold_bytes:
+        await s3_multipart_upload(s3_client, key, content_type, iter_parts(body))
+    else:
+        await s3_client.put_object(Bucket=settings.bucket_name, Key=key, Body=body, ContentType=content_type)
+    return object_url(key)
@@ -0,0 +1,317 @@
+import logging
+import re
+import time
+import zlib
+from collections import Counter, OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# (similarity, cached output, metadata)
+Match = Tuple[float, str, dict]
+
+
+# === Embedding ===
+
+# Filler words carry no intent; dropping them lets "can you send me the deck" match "send me a deck"
+STOPWORDS = frozenset(
+    "a an the and or to of for in on at is are was were be can could would you your me my i we our us "
+    "please just so um uh like".split()
+)
+
+class HashingEmbedder:
+    """
+    Local, deterministic text embedding: word unigrams, word bigrams and character
+    trigrams (stopwords removed) hashed into a fixed-size signed vector, then L2-normalized.
+
+    It captures surface similarity ("tell me about pricing" vs "tell me about your
+    pricing"), which is what repeated booth conversations share. It needs no model
+    download and hashes with crc32, so vectors are stable across processes and can
+    be stored in Chroma.
+    """
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+
+    @staticmethod
+    def features(text: str) -> List[str]:
+        words = [w for w in re.findall(r"[a-z0-9']+", text.lower()) if w not in STOPWORDS]
+        features = [f"w:{w}" for w in words]
+        features += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+        for word in words:
+            padded = f"#{word}#"
+            features += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+        return features
+
+    def embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature, count in Counter(self.features(text)).items():
+            h = zlib.crc32(feature.encode("utf-8"))
+            vector[h % self.dim] += count if (h >> 31) & 1 else -count
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+
+# === Vector indexes ===
+
+class InMemoryVectorIndex:
+    """
+    Per-process nearest-neighbour index with cosine similarity over normalized vectors.
+    Holds at most `max_entries` across all namespaces, evicting the least recently hit;
+    entries older than `ttl_seconds` are ignored and dropped on lookup.
+    """
+
+    backend = "memory"
+
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[str, np.ndarray, str, dict, float]]" = OrderedDict()
+        self._matrices: Dict[str, Tuple[List[str], np.ndarray]] = {}
+        self.evictions = 0
+
+    def _matrix(self, namespace: str) -> Tuple[List[str], np.ndarray]:
+        if namespace not in self._matrices:
+            ids = [key for key, entry in self._entries.items() if entry[0] == namespace]
+            vectors = np.stack([self._entries[key][1] for key in ids]) if ids else np.empty((0, 0), dtype=np.float32)
+            self._matrices[namespace] = (ids, vectors)
+        return self._matrices[namespace]
+
+    def _remove(self, key: str) -> None:
+        namespace = self._entries.pop(key)[0]
+        self._matrices.pop(namespace, None)
+
+    async def query(self, namespace: str, vector: np.ndarray) -> Optional[Match]:
+        ids, vectors = self._matrix(namespace)
+        if not ids:
+            return None
+        scores = vectors @ vector
+        best = int(np.argmax(scores))
+        key = ids[best]
+        _, _, document, metadata, created_at = self._entries[key]
+        if time.time() - created_at > self.ttl_seconds:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return float(scores[best]), document, metadata
+
+    async def add(self, namespace: str, vector: np.ndarray, document: str, metadata: dict) -> None:
+        self._entries[uuid4().hex] = (namespace, vector, document, metadata, time.time())
+        self._matrices.pop(namespace, None)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    async def stats(self) -> dict:
+        return {"entries": len(self._entries), "evictions": self.evictions}
+
+
+class ChromaVectorIndex:
+    """
+    Shared index in the docker-compose `chromadb` service, one collection for all
+    namespaces (filtered by metadata). Chroma has no LRU, so entries expire by age:
+    lookups skip anything older than `ttl_seconds` and every `sweep_every` inserts
+    delete the expired ones.
+    """
+
+    backend = "chroma"
+
+    def __init__(self, host: str, port: int, collection: str, ttl_seconds: int, sweep_every: int = 100):
+        self.host = host
+        self.port = port
+        self.collection_name = collection
+        self.ttl_seconds = ttl_seconds
+        self.sweep_every = sweep_every
+        self._collection = None
+        self._inserts = 0
+        self.evictions = 0
+
+    async def collection(self):
+        if self._collection is None:
+            # Imported lazily: the client is only needed when this backend is configured
+            import chromadb
+
+            client = await chromadb.AsyncHttpClient(host=self.host, port=self.port)
+            self._collection = await client.get_or_create_collection(
+                self.collection_name,
+                metadata={"hnsw:space": "cosine"},
+                embedding_function=None,
+            )
+        return self._collection
+
+    async def query(self, namespace: str, vector: np.ndarray) -> Optional[Match]:
+        collection = await self.collection()
+        result = await collection.query(
+            query_embeddings=[vector.tolist()],
+            n_results=1,
+            where={"$and": [
+                {"namespace": namespace},
+                {"created_at": {"$gte": time.time() - self.ttl_seconds}},
+            ]},
+            include=["documents", "metadatas", "distances"],
+        )
+        if not result["ids"] or not result["ids"][0]:
+            return None
+        # Cosine distance in Chroma is 1 - cosine similarity
+        return 1.0 - result["distances"][0][0], result["documents"][0][0], result["metadatas"][0][0] or {}
+
+    async def add(self, namespace: str, vector: np.ndarray, document: str, metadata: dict) -> None:
+        collection = await self.collection()
+        await collection.add(
+            ids=[uuid4().hex],
+            embeddings=[vector.tolist()],
+            documents=[document],
+            metadatas=[{**metadata, "namespace": namespace, "created_at": time.time()}],
+        )
+        self._inserts += 1
+        if self._inserts % self.sweep_every == 0:
+            result = await collection.delete(where={"created_at": {"$lt": time.time() - self.ttl_seconds}})
+            self.evictions += (result or {}).get("deleted", 0)
+
+    async def stats(self) -> dict:
+        try:
+            entries = await (await self.collection()).count()
+        except Exception:
+            entries = None
+        return {"entries": entries, "evictions": self.evictions}
+
+
+# === Cache ===
+
+class SemanticCache:
+    """
+    Opt-in cache in front of LLM calls whose inputs repeat with small variations.
+
+    Inputs are embedded and matched against earlier inputs of the same kind and
+    variant; a neighbour with cosine similarity >= `threshold` returns its stored
+    output instead of calling the model. Backend errors are logged and treated as
+    misses, so the LLM path never depends on the cache.
+    """
+
+    def __init__(self, index, embedder: HashingEmbedder, threshold: float, enabled: bool = True):
+        self.index = index
+        self.embedder = embedder
+        self.threshold = threshold
+        self.enabled = enabled
+        self.counts: Counter = Counter()
+
+    async def lookup(
+        self,
+        kind: str,
+        text: str,
+        variant: str = "",
+        transform: Optional[Callable[[str], Optional[str]]] = None,
+    ) -> Optional[str]:
+        """
+        The cached output for the nearest earlier input, or None on a miss. `transform`
+        adapts a match before it is returned; a match it turns into None counts as a miss.
+        """
+        if not self.enabled or not text.strip():
+            return None
+        try:
+            match = await self.index.query(f"{kind}:{variant}", self.embedder.embed(text))
+        except Exception as e:
+            logger.warning("Semantic cache lookup failed: %s", e)
+            self.counts[f"{kind}_errors"] += 1
+            return None
+        if match and match[0] >= self.threshold:
+            output = transform(match[1]) if transform else match[1]
+            if output is not None:
+                self.counts[f"{kind}_hits"] += 1
+                return output
+        self.counts[f"{kind}_misses"] += 1
+        return None
+
+    async def store(self, kind: str, text: str, output: str, variant: str = "") -> None:
+        if not self.enabled or not text.strip() or not output:
+            return
+        try:
+            await self.index.add(f"{kind}:{variant}", self.embedder.embed(text), output, {"kind": kind})
+            self.counts[f"{kind}_stores"] += 1
+        except Exception as e:
+            logger.warning("Semantic cache store failed: %s", e)
+            self.counts[f"{kind}_errors"] += 1
+
+    async def stats(self) -> dict:
+        kinds = sorted({key.rsplit("_", 1)[0] for key in self.counts})
+        per_kind = {}
+        for kind in kinds:
+            hits, misses = self.counts[f"{kind}_hits"], self.counts[f"{kind}_misses"]
+            per_kind[kind] = {
+                "hits": hits,
+                "misses": misses,
+                "stores": self.counts[f"{kind}_stores"],
+                "errors": self.counts[f"{kind}_errors"],
+                "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+            }
+        stats = {"enabled": self.enabled, "backend": self.index.backend, "threshold": self.threshold, "kinds": per_kind}
+        if self.enabled:
+            try:
+                stats.update(await self.index.stats())
+            except Exception as e:
+                logger.warning("Semantic cache stats failed: %s", e)
+        return stats
+
+
+# === Templating: reuse outputs across leads ===
+
+PLACEHOLDERS = ("<<NAME>>", "<<FIRST_NAME>>", "<<COMPANY>>", "<<JOB_TITLE>>")
+
+
+def lead_substitutions(name: str, extra_info: Optional[Dict[str, str]] = None) -> List[Tuple[str, str]]:
+    """(placeholder, value) pairs, longest value first so a full name wins over the first name."""
+    extra_info = extra_info or {}
+    first_name = name.split()[0] if name and name.split() else ""
+    pairs = [
+        ("<<NAME>>", name or ""),
+        ("<<FIRST_NAME>>", first_name if first_name != name else ""),
+        ("<<COMPANY>>", extra_info.get("company") or ""),
+        ("<<JOB_TITLE>>", extra_info.get("job_title") or ""),
+    ]
+    return sorted(pairs, key=lambda pair: len(pair[1]), reverse=True)
+
+
+def templatize(text: str, substitutions: List[Tuple[str, str]]) -> str:
+    for placeholder, value in substitutions:
+        if value.strip():
+            text = re.sub(rf"\b{re.escape(value.strip())}\b", placeholder, text)
+    return text
+
+
+def fill_template(text: str, substitutions: List[Tuple[str, str]]) -> Optional[str]:
+    """Put the current lead's values back; None if the template needs a value this lead lacks."""
+    for placeholder, value in substitutions:
+        if placeholder in text:
+            if not value.strip():
+                return None
+            text = text.replace(placeholder, value.strip())
+    return text
+
+
+def build_semantic_cache() -> SemanticCache:
+    if settings.semantic_cache_backend == "chroma":
+        index = ChromaVectorIndex(
+            host=settings.chroma_host,
+            port=settings.chroma_port,
+            collection=settings.semantic_cache_collection,
+            ttl_seconds=settings.semantic_cache_ttl_seconds,
+        )
+    else:
+        index = InMemoryVectorIndex(
+            max_entries=settings.semantic_cache_max_entries,
+            ttl_seconds=settings.semantic_cache_ttl_seconds,
+        )
+    return SemanticCache(
+        index,
+        HashingEmbedder(),
+        threshold=settings.semantic_cache_threshold,
+        enabled=settings.semantic_cache_enabled,
+    )
+
+
+semantic_cache = build_semantic_cache()
@@ -0,0 +1,51 @@
+from typing import List, Optional
+from uuid import UUID, uuid4
+
+from beanie import UpdateResponse
+from beanie.odm.operators.update.general import Inc, SetOnInsert
+
+from app.db.models.lead import Lead
+from app.db.models.session import Session, utc_now
+
+
+def lead_increments(leads: List[Lead]) -> dict:
+    scores = [lead.interest_score for lead in leads if lead.interest_score is not None]
+    return {
+        "lead_count": len(leads),
+        "existing_customer_count": sum(1 for lead in leads if lead.existing_customer),
+        "scored_lead_count": len(scores),
+        "interest_score_sum": float(sum(scores)),
+    }
+
+
+async def record_leads(session_uuid: UUID, leads: List[Lead]) -> Session:
+    """
+    Atomically adds newly inserted leads to the per-session counters, creating the
+    Session document on first use. Returns the session with the updated totals.
+    """
+    return await Session.find_one({"session_id": session_uuid}).update(
+        Inc(lead_increments(leads)),
+        SetOnInsert({"_id": uuid4(), "created_at": utc_now()}),
+        upsert=True,
+        response_type=UpdateResponse.NEW_DOCUMENT,
+    )
+
+
+async def session_lead_count(session_uuid: UUID) -> int:
+    session = await Session.find_one({"session_id": session_uuid})
+    return session.lead_count if session else 0
+
+
+def session_stats(session_uuid: UUID, session: Optional[Session]) -> dict:
+    lead_count = session.lead_count if session else 0
+    existing_customer_count = session.existing_customer_count if session else 0
+    scored_lead_count = session.scored_lead_count if session else 0
+    interest_score_sum = session.interest_score_sum if session else 0.0
+    return {
+        "session_id": str(session_uuid),
+        "lead_count": lead_count,
+        "existing_customer_count": existing_customer_count,
+        "scored_lead_count": scored_lead_count,
+        "interest_score_sum": interest_score_sum,
+        "interest_score_mean": interest_score_sum / scored_lead_count if scored_lead_count else None,
+    }
@@ -0,0 +1,200 @@
+"""
+Cross-node fan-out of live transcripts over Redis pub/sub.
+
+The node proxying a recording (`/ws/client`) publishes every Deepgram message, as
+received, to `transcript:{session_id}`. Any node can serve viewers (`/ws/viewer`):
+each node holds one pub/sub connection, subscribes to a session's channel while it
+has local viewers, and copies every message into each viewer's bounded queue.
+
+Neither side can stall the other. The publisher queues messages locally and sends
+them to Redis in pipelined batches from a background task, dropping messages if
+Redis falls behind instead of slowing the audio proxy. A viewer whose queue fills
+(`TRANSCRIPT_FANOUT_VIEWER_QUEUE`) is dropped and its websocket closed with 1013, so
+one slow dashboard never holds up the others.
+"""
+import asyncio
+import json
+import logging
+from collections import Counter, defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Set
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.redis import redis
+
+logger = logging.getLogger(__name__)
+
+# Totals for this worker, exposed on /v1/metrics
+fanout_totals: Counter = Counter()
+
+
+def transcript_channel(session_id: str) -> str:
+    return f"transcript:{session_id}"
+
+
+def control_message(event: str, session_id: str) -> str:
+    return json.dumps({"type": event, "session_id": session_id})
+
+
+# === Publisher (recording node) ===
+
+class TranscriptPublisher:
+    def __init__(self, session_id: str, client: Redis = redis):
+        self.session_id = session_id
+        self.channel = transcript_channel(session_id)
+        self.client = client
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.transcript_fanout_publish_queue)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+        self.publish(control_message("session_started", self.session_id))
+
+    def publish(self, message: str) -> None:
+        """Never blocks: if Redis has fallen this far behind, the message is dropped."""
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            fanout_totals["publish_dropped"] += 1
+
+    async def _run(self) -> None:
+        while True:
+            batch = [await self.queue.get()]
+            while not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            finished = batch[-1] is None
+            messages = [message for message in batch if message is not None]
+            try:
+                async with self.client.pipeline(transaction=False) as pipe:
+                    for message in messages:
+                        pipe.publish(self.channel, message)
+                    await pipe.execute()
+                fanout_totals["published"] += len(messages)
+            except RedisError as e:
+                fanout_totals["publish_failed"] += len(messages)
+                logger.warning("Transcript publish to %s failed: %s", self.channel, e)
+            if finished:
+                return
+
+    async def close(self, timeout: float = 5.0) -> None:
+        """Publish `session_ended`, then flush what is queued for up to `timeout` seconds."""
+        if self._task is None:
+            return
+        self.publish(control_message("session_ended", self.session_id))
+        try:
+            await asyncio.wait_for(self.queue.put(None), timeout)
+            await asyncio.wait_for(self._task, timeout)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+            logger.warning("Gave up flushing transcript events for %s", self.channel)
+
+
+# === Subscribers (any node) ===
+
+class Viewer:
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.transcript_fanout_viewer_queue)
+        self.ended = False
+        self.dropped = False
+
+    def offer(self, message: str) -> None:
+        if self.ended:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.dropped = True
+            fanout_totals["viewers_dropped"] += 1
+            self.end()
+
+    def end(self) -> None:
+        """Stop delivery; pending messages are discarded so the end marker always fits."""
+        if self.ended:
+            return
+        self.ended = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+    async def messages(self) -> AsyncIterator[str]:
+        while (message := await self.queue.get()) is not None:
+            fanout_totals["delivered"] += 1
+            yield message
+
+
+class TranscriptHub:
+    def __init__(self, client: Redis = redis):
+        self.client = client
+        self.pubsub = None
+        self.viewers: Dict[str, Set[Viewer]] = defaultdict(set)
+        self._reader: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    @asynccontextmanager
+    async def subscribe(self, session_id: str) -> AsyncIterator[Viewer]:
+        viewer = Viewer(session_id)
+        channel = transcript_channel(session_id)
+        async with self._lock:
+            if self.pubsub is None:
+                self.pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            if not self.viewers[channel]:
+                await self.pubsub.subscribe(channel)
+            self.viewers[channel].add(viewer)
+            if self._reader is None or self._reader.done():
+                self._reader = asyncio.create_task(self._read())
+        fanout_totals["viewers_opened"] += 1
+        try:
+            yield viewer
+        finally:
+            viewer.end()
+            async with self._lock:
+                viewers = self.viewers.get(channel)
+                if viewers is not None:
+                    viewers.discard(viewer)
+                    if not viewers:
+                        del self.viewers[channel]
+                        await self._unsubscribe(channel)
+
+    async def _unsubscribe(self, channel: str) -> None:
+        if self.pubsub is None:
+            return
+        try:
+            await self.pubsub.unsubscribe(channel)
+        except RedisError as e:
+            logger.warning("Unsubscribe from %s failed: %s", channel, e)
+
+    async def _read(self) -> None:
+        pubsub = self.pubsub
+        try:
+            while self.viewers:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is None or message["type"] != "message":
+                    continue
+                for viewer in list(self.viewers.get(message["channel"], ())):
+                    viewer.offer(message["data"])
+        except (RedisError, ConnectionError) as e:
+            # End every viewer so dashboards reconnect, possibly to a healthy node
+            logger.warning("Transcript subscription lost: %s", e)
+            for viewers in self.viewers.values():
+                for viewer in viewers:
+                    viewer.end()
+            self.viewers.clear()
+            self.pubsub = None
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
+
+    def stats(self) -> dict:
+        return {
+            "channels": len(self.viewers),
+            "viewers": sum(len(viewers) for viewers in self.viewers.values()),
+            **fanout_totals,
+        }
+
+
+transcript_hub = TranscriptHub()
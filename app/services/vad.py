@@ -0,0 +1,200 @@
+"""
+Energy-based voice activity gating for 16-bit PCM audio sent to Deepgram.
+
+Booth recordings are mostly silence and background noise. `StreamingVad` splits the
+audio into `AUDIO_VAD_FRAME_MS` frames and measures each frame's RMS level in dBFS
+against a threshold that follows the background: the larger of
+`AUDIO_VAD_THRESHOLD_DB` and a tracked noise floor plus `AUDIO_VAD_MARGIN_DB`.
+
+Silent stretches are compressed rather than cut: after speech, frames keep flowing
+for `AUDIO_VAD_HANGOVER_MS` so trailing syllables are not clipped, and the last
+`AUDIO_VAD_PADDING_MS` of silence before speech is replayed when speech starts. A
+gap shorter than hangover plus padding is kept whole; a longer one shrinks to that.
+
+`AUDIO_VAD_ENABLED` gates uploads, where WAV/PCM is detected from the header; live
+websockets are gated only on request (see `/ws/client`), since their format is not
+known. Only what goes to Deepgram is gated; S3 keeps the original recording. Removing
+audio shifts Deepgram's word timestamps, which nothing here relies on.
+"""
+import logging
+import struct
+from collections import Counter, deque
+from typing import AsyncIterator, Awaitable, Callable, Deque, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_WIDTH = 2
+# How fast the noise floor may rise, per frame; it drops immediately to quieter frames
+NOISE_FLOOR_RISE_DB = 0.05
+SILENCE_DB = -100.0
+# Give up looking for the WAV data chunk after this much header
+MAX_WAV_HEADER_BYTES = 64 * 1024
+
+# Totals for this worker, exposed on /v1/metrics
+vad_totals: Counter = Counter()
+
+
+def removed_fraction(bytes_in: int, bytes_out: int) -> float:
+    return round(1 - bytes_out / bytes_in, 4) if bytes_in else 0.0
+
+
+def vad_stats() -> dict:
+    return {**vad_totals, "removed_fraction": removed_fraction(vad_totals["bytes_in"], vad_totals["bytes_out"])}
+
+
+# === Streaming gate ===
+
+class StreamingVad:
+    """Gates interleaved 16-bit PCM fed in arbitrary chunks; `process` returns the audio to keep."""
+
+    def __init__(self, sample_rate: int, channels: int = 1):
+        frame_ms = settings.audio_vad_frame_ms
+        self.frame_bytes = sample_rate * frame_ms // 1000 * channels * SAMPLE_WIDTH
+        self.hangover_frames = settings.audio_vad_hangover_ms // frame_ms
+        self.padding: Deque[bytes] = deque(maxlen=max(1, settings.audio_vad_padding_ms // frame_ms))
+        self.threshold_db = settings.audio_vad_threshold_db
+        self.margin_db = settings.audio_vad_margin_db
+        self.noise_floor_db: Optional[float] = None
+        self.hangover = 0
+        self.pending = b""
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    @property
+    def removed_fraction(self) -> float:
+        return removed_fraction(self.bytes_in, self.bytes_out)
+
+    def frame_level_db(self, frame: bytes) -> float:
+        samples = np.frombuffer(frame, dtype="<i2").astype(np.float32)
+        rms = float(np.sqrt(np.mean(samples * samples)))
+        return 20 * np.log10(rms / 32768) if rms > 0 else SILENCE_DB
+
+    def is_speech(self, frame: bytes) -> bool:
+        level = self.frame_level_db(frame)
+        if self.noise_floor_db is None:
+            self.noise_floor_db = level
+        else:
+            self.noise_floor_db = min(level, self.noise_floor_db + NOISE_FLOOR_RISE_DB)
+        return level > max(self.threshold_db, self.noise_floor_db + self.margin_db)
+
+    def process(self, pcm: bytes) -> bytes:
+        self.bytes_in += len(pcm)
+        data = self.pending + pcm
+        usable = len(data) - len(data) % self.frame_bytes
+        self.pending = data[usable:]
+
+        out = bytearray()
+        for start in range(0, usable, self.frame_bytes):
+            frame = data[start:start + self.frame_bytes]
+            if self.is_speech(frame):
+                out.extend(b"".join(self.padding))
+                self.padding.clear()
+                out.extend(frame)
+                self.hangover = self.hangover_frames
+            elif self.hangover > 0:
+                out.extend(frame)
+                self.hangover -= 1
+            else:
+                # Frames pushed out of the padding buffer are the ones removed
+                self.padding.append(frame)
+
+        self.bytes_out += len(out)
+        return bytes(out)
+
+    def flush(self) -> bytes:
+        """End of stream: keep a trailing partial frame only if speech was still going."""
+        tail = self.pending if self.hangover > 0 else b""
+        tail = tail[:len(tail) - len(tail) % SAMPLE_WIDTH]
+        self.pending = b""
+        self.bytes_out += len(tail)
+        return tail
+
+    def record(self) -> None:
+        vad_totals["streams"] += 1
+        vad_totals["bytes_in"] += self.bytes_in
+        vad_totals["bytes_out"] += self.bytes_out
+
+
+async def gate_chunks(vad: StreamingVad, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    async for chunk in chunks:
+        if kept := vad.process(chunk):
+            yield kept
+    if tail := vad.flush():
+        yield tail
+
+
+# === WAV uploads ===
+
+class WavFormat(NamedTuple):
+    audio_format: int
+    channels: int
+    sample_rate: int
+    bits_per_sample: int
+
+
+def parse_wav_header(data: bytes) -> Tuple[Optional[WavFormat], Optional[int]]:
+    """
+    Returns the fmt chunk and the offset where the sample data starts, or (None, None)
+    if `data` does not hold the whole header yet. Raises ValueError if it is not a WAV.
+    """
+    if len(data) < 12:
+        return None, None
+    if data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        raise ValueError("not a RIFF/WAVE file")
+    fmt, offset = None, 12
+    while offset + 8 <= len(data):
+        chunk_id, size = data[offset:offset + 4], struct.unpack("<I", data[offset + 4:offset + 8])[0]
+        body = offset + 8
+        if chunk_id == b"data":
+            return (fmt, body) if fmt else (None, None)
+        if body + size > len(data):
+            return None, None
+        if chunk_id == b"fmt ":
+            fmt = WavFormat(*struct.unpack("<HHI6xH", data[body:body + 16]))
+        offset = body + size + size % 2
+    return None, None
+
+
+async def replay(prefix: bytes, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    if prefix:
+        yield prefix
+    async for chunk in chunks:
+        yield chunk
+
+
+TranscribeFn = Callable[..., Awaitable[str]]
+
+
+def gated_transcriber(transcribe: TranscribeFn) -> TranscribeFn:
+    """
+    Wrap `transcribe(chunks, content_type, params=None)` so 16-bit PCM WAV uploads are
+    gated and sent to Deepgram as raw linear16. Other formats pass through unchanged.
+    """
+    async def run(chunks: AsyncIterator[bytes], content_type: str) -> str:
+        header = b""
+        wav, data_offset = None, None
+        try:
+            async for chunk in chunks:
+                header += chunk
+                wav, data_offset = parse_wav_header(header)
+                if data_offset is not None or len(header) > MAX_WAV_HEADER_BYTES:
+                    break
+        except ValueError:
+            pass
+
+        if wav is None or wav.audio_format != 1 or wav.bits_per_sample != 16:
+            return await transcribe(replay(header, chunks), content_type)
+
+        vad = StreamingVad(wav.sample_rate, wav.channels)
+        params = {"encoding": "linear16", "sample_rate": wav.sample_rate, "channels": wav.channels}
+        try:
+            return await transcribe(gate_chunks(vad, replay(header[data_offset:], chunks)), "audio/l16", params=params)
+        finally:
+            vad.record()
+            logger.info("VAD removed %.1f%% of %d bytes of audio", vad.removed_fraction * 100, vad.bytes_in)
+
+    return run
@@ -0,0 +1,84 @@
+"""
+Reports bytes saved and latency for each OCR image preprocessing level.
+
+    python -m benchmarks.bench_image_preprocess photos/*.jpg
+    python -m benchmarks.bench_image_preprocess --live photos/card.jpg
+
+Without image paths a synthetic 12 MP card photo is generated. With --live each
+variant is also sent through the Gemini OCR call so the end-to-end latency
+difference can be compared (requires the usual .env settings).
+"""
+import argparse
+import asyncio
+import base64
+import io
+import mimetypes
+import random
+import statistics
+import time
+
+from PIL import Image, ImageDraw, ImageFilter
+
+from app.agent.image_preprocess import PREPROCESS_PROFILES, preprocess_image
+
+
+def synthetic_card_photo() -> bytes:
+    """A white card with text lines on a noisy desk background, like a phone photo."""
+    rng = random.Random(0)
+    photo = Image.effect_noise((4000, 3000), 40).convert("RGB")
+    draw = ImageDraw.Draw(photo)
+    draw.rectangle((900, 700, 3100, 2000), fill=(245, 245, 240))
+    for row in range(8):
+        y = 850 + row * 130
+        draw.rectangle((1050, y, 1050 + rng.randint(600, 1700), y + 60), fill=(30, 30, 30))
+    photo = photo.filter(ImageFilter.GaussianBlur(1))
+    buffer = io.BytesIO()
+    photo.save(buffer, format="JPEG", quality=95)
+    return buffer.getvalue()
+
+
+def time_preprocess(image_bytes: bytes, mime_type: str, level: str, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        processed, processed_mime = preprocess_image(image_bytes, mime_type, level=level)
+        timings.append((time.perf_counter() - start) * 1000)
+    return processed, processed_mime, statistics.median(timings)
+
+
+async def time_gemini(image_bytes: bytes, mime_type: str) -> float:
+    from app.agent.gemini_ocr import aextract_card_data
+
+    start = time.perf_counter()
+    await aextract_card_data(image_bytes, mime_type)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("images", nargs="*", help="Card photos to benchmark")
+    parser.add_argument("--levels", default="off," + ",".join(PREPROCESS_PROFILES), help="Comma-separated levels")
+    parser.add_argument("--repeat", type=int, default=5, help="Preprocessing runs per level (median is reported)")
+    parser.add_argument("--live", action="store_true", help="Also time the Gemini OCR call per level")
+    args = parser.parse_args()
+
+    if args.images:
+        samples = [(path, open(path, "rb").read(), mimetypes.guess_type(path)[0] or "image/jpeg") for path in args.images]
+    else:
+        samples = [("synthetic-12mp.jpg", synthetic_card_photo(), "image/jpeg")]
+
+    print(f"{'image':<24} {'level':<11} {'bytes':>11} {'b64 bytes':>11} {'saved':>7} {'prep ms':>9} {'gemini ms':>10}")
+    for name, image_bytes, mime_type in samples:
+        for level in args.levels.split(","):
+            processed, processed_mime, prep_ms = time_preprocess(image_bytes, mime_type, level, args.repeat)
+            encoded = len(base64.b64encode(processed))
+            saved = 1 - len(processed) / len(image_bytes)
+            gemini_ms = f"{asyncio.run(time_gemini(processed, processed_mime)):.0f}" if args.live else "-"
+            print(
+                f"{name[:24]:<24} {level:<11} {len(processed):>11,} {encoded:>11,} {saved:>6.1%} {prep_ms:>9.1f} "
+                f"{gemini_ms:>10}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Exercises the LLM governor against a local fake LLM server.
+
+    python -m benchmarks.bench_llm_governor
+    python -m benchmarks.bench_llm_governor --calls 300 --capacity 6
+
+The fake server is an ASGI app served in-process through httpx.ASGITransport. It
+answers after a fixed latency, returns 429 with Retry-After once more than
+`--capacity` requests are in flight (a quota), and can be switched into an outage
+where every request gets a 503. Three scenarios are run:
+
+- quota: a burst of calls, with and without the governor. Without it, calls over the
+  quota fail, as they do in production today; with it, AIMD settles near capacity.
+- priority: a queue of background calls, then a few interactive calls. Interactive
+  calls should overtake the backlog.
+- outage: calls keep arriving during an outage. Without the governor every call hits
+  the server; with it, the breaker fails fast and half-open probes detect recovery.
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+from typing import Any, List, Optional
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from app.agent.llm_governor import GovernedChatModel, LlmGovernor, Priority, llm_priority
+
+
+# === Fake LLM server ===
+
+class FakeLlmServer:
+    def __init__(self, capacity: int, latency_s: float):
+        self.capacity = capacity
+        self.latency_s = latency_s
+        self.in_flight = 0
+        self.down = False
+        self.requests = 0
+        self.rejected = 0
+        self.app = FastAPI()
+        self.app.post("/generate")(self.generate)
+
+    async def generate(self, payload: dict):
+        self.requests += 1
+        if self.down:
+            self.rejected += 1
+            return JSONResponse({"error": "unavailable"}, status_code=503)
+        if self.in_flight >= self.capacity:
+            self.rejected += 1
+            return JSONResponse({"error": "quota exceeded"}, status_code=429, headers={"Retry-After": "1"})
+        self.in_flight += 1
+        try:
+            await asyncio.sleep(self.latency_s)
+        finally:
+            self.in_flight -= 1
+        return {"text": f"echo: {payload['prompt'][:20]}"}
+
+
+class FakeServerChatModel(BaseChatModel):
+    client: Any
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-llm-server"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs) -> ChatResult:
+        raise NotImplementedError("async only")
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs) -> ChatResult:
+        response = await self.client.post("/generate", json={"prompt": str(messages[-1].content)})
+        response.raise_for_status()
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=response.json()["text"]))])
+
+
+def build_governor(**overrides) -> LlmGovernor:
+    options = dict(
+        max_concurrency=32,
+        initial_concurrency=32,
+        max_retries=5,
+        backoff_base_seconds=0.1,
+        failure_threshold=5,
+        open_seconds=1.0,
+    )
+    options.update(overrides)
+    return LlmGovernor(**options)
+
+
+async def run_calls(llm: BaseChatModel, count: int, priority: Priority = Priority.NORMAL) -> List[Any]:
+    async def one(i: int):
+        llm_priority.set(priority)
+        start = time.perf_counter()
+        try:
+            await llm.ainvoke(f"lead {i}")
+            return time.perf_counter() - start
+        except Exception as e:
+            return e
+
+    return await asyncio.gather(*(one(i) for i in range(count)))
+
+
+def summarize(label: str, results: List[Any], server: FakeLlmServer, elapsed: float) -> None:
+    latencies = [r for r in results if isinstance(r, float)]
+    failed = len(results) - len(latencies)
+    p50 = statistics.median(latencies) if latencies else float("nan")
+    print(
+        f"{label:<22} ok={len(latencies):>4} failed={failed:>4} server_requests={server.requests:>5} "
+        f"server_rejected={server.rejected:>5} p50={p50:>6.2f}s wall={elapsed:>6.2f}s"
+    )
+
+
+# === Scenarios ===
+
+async def quota_scenario(args) -> None:
+    print(f"\nquota: {args.calls} concurrent calls, server capacity {args.capacity}")
+    for governed in (False, True):
+        server = FakeLlmServer(args.capacity, args.latency)
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://fake-llm") as client:
+            llm: BaseChatModel = FakeServerChatModel(client=client)
+            governor = build_governor()
+            if governed:
+                llm = GovernedChatModel(inner=llm, governor=governor)
+            start = time.perf_counter()
+            results = await run_calls(llm, args.calls)
+            summarize("governed" if governed else "ungoverned", results, server, time.perf_counter() - start)
+            if governed:
+                print(f"{'':<22} final concurrency limit {governor.limit:.1f}, retries {governor.counts['retries']}")
+
+
+async def priority_scenario(args) -> None:
+    background, interactive = args.calls, max(5, args.calls // 10)
+    print(f"\npriority: {background} background calls queued, then {interactive} interactive calls")
+    server = FakeLlmServer(args.capacity, args.latency)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://fake-llm") as client:
+        governor = build_governor(max_concurrency=args.capacity, initial_concurrency=args.capacity)
+        llm = GovernedChatModel(inner=FakeServerChatModel(client=client), governor=governor)
+        backlog = asyncio.create_task(run_calls(llm, background, Priority.BACKGROUND))
+        await asyncio.sleep(args.latency)
+        start = time.perf_counter()
+        urgent = await run_calls(llm, interactive, Priority.INTERACTIVE)
+        urgent_elapsed = time.perf_counter() - start
+        backlog_results = await backlog
+        summarize("interactive", urgent, server, urgent_elapsed)
+        summarize("background", backlog_results, server, time.perf_counter() - start + args.latency)
+
+
+async def outage_scenario(args) -> None:
+    print(f"\noutage: server returns 503 for {args.outage:.0f}s while calls keep arriving")
+    for governed in (False, True):
+        server = FakeLlmServer(args.capacity, args.latency)
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://fake-llm") as client:
+            llm: BaseChatModel = FakeServerChatModel(client=client)
+            governor = build_governor(max_retries=1)
+            if governed:
+                llm = GovernedChatModel(inner=llm, governor=governor)
+
+            async def arrivals():
+                # Keep calls coming for two seconds after the server recovers
+                results = []
+                deadline = time.perf_counter() + args.outage + 2
+                while time.perf_counter() < deadline:
+                    results.extend(await run_calls(llm, 5))
+                    await asyncio.sleep(0.25)
+                return results
+
+            server.down = True
+            start = time.perf_counter()
+            task = asyncio.create_task(arrivals())
+            await asyncio.sleep(args.outage)
+            server.down = False
+            results = await task
+            summarize("governed" if governed else "ungoverned", results, server, time.perf_counter() - start)
+            if governed:
+                print(f"{'':<22} breaker opened {governor.counts['breaker_opened']}x, rejected locally {governor.counts['rejected']}, state {governor.state}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--capacity", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--outage", type=float, default=3.0)
+    args = parser.parse_args()
+    logging.getLogger("app.agent.llm_governor").setLevel(logging.ERROR)
+
+    await quota_scenario(args)
+    await priority_scenario(args)
+    await outage_scenario(args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,58 @@
+"""
+Measures the client-side cost of building a Gemini chat client per call versus
+reusing the shared one from the LLM registry.
+
+    python -m benchmarks.bench_llm_registry
+    python -m benchmarks.bench_llm_registry --iterations 500
+
+No request is sent: each iteration does what an agent call did before its request
+went out, i.e. construct ChatGoogleGenerativeAI (sync gRPC stub) and open the async
+client on the running loop. Connection and TLS setup on a fresh channel come on top
+of this in production and are also avoided by reuse, but need the network to measure.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from app.agent.llm_registry import PURPOSES, LlmRegistry, build_chat_model
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def time_calls(get_client, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        client = get_client()
+        client.async_client
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    spec = PURPOSES["email"]
+    registry = LlmRegistry()
+    registry.create_all()
+
+    fresh = await time_calls(lambda: build_chat_model(spec.model, spec.temperature), args.iterations)
+    shared = await time_calls(lambda: registry.get("email").inner, args.iterations)
+
+    print(f"{'client':>10} {'mean us':>10} {'p50 us':>10} {'p99 us':>10}")
+    for label, samples in (("per-call", fresh), ("registry", shared)):
+        print(
+            f"{label:>10} {statistics.mean(samples):>10.1f} {percentile(samples, 0.5):>10.1f} "
+            f"{percentile(samples, 0.99):>10.1f}"
+        )
+    print(f"saved per call: {statistics.mean(fresh) - statistics.mean(shared):.1f} us (before any network I/O)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
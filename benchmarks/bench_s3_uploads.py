@@ -0,0 +1,122 @@
+"""
+Compares S3 upload throughput with a client per upload (the old card and audio
+upload code) against the shared pooled client (app.services.s3).
+
+    python -m benchmarks.bench_s3_uploads
+    python -m benchmarks.bench_s3_uploads --uploads 500 --concurrency 50 --size-kb 300
+
+A moto S3 server is started in a subprocess on --port and a throwaway bucket is
+created in it. Each mode uploads --uploads card-sized bodies, --concurrency at a
+time, and reports uploads per second and latency percentiles. A final upload larger
+than S3_MULTIPART_THRESHOLD_BYTES checks the multipart path.
+
+moto speaks plain HTTP on localhost, so the per-upload TLS handshake that the
+pooled client saves against real S3 is not measured here; the numbers understate
+the difference.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from typing import Awaitable, Callable, List
+
+import aiobotocore.session
+
+from app.core.config import settings
+from app.services.s3 import s3_clients, upload_bytes
+
+
+async def start_moto(port: int) -> asyncio.subprocess.Process:
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "moto.server", "-p", str(port),
+        stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return process
+        except OSError:
+            await asyncio.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"moto did not start on port {port}")
+
+
+async def upload_with_new_client(key: str, body: bytes, content_type: str) -> str:
+    """What upload_to_s3 and upload_audio_to_s3 did before: a new client per upload."""
+    session = aiobotocore.session.get_session()
+    async with session.create_client(
+        's3',
+        region_name=settings.aws_origin,
+        aws_secret_access_key=settings.aws_secret_access_key,
+        aws_access_key_id=settings.aws_access_key,
+        endpoint_url=settings.s3_endpoint_url,
+    ) as s3_client:
+        await s3_client.put_object(Bucket=settings.bucket_name, Key=key, Body=body, ContentType=content_type)
+    return key
+
+
+async def run_uploads(
+    label: str, upload: Callable[[str, bytes, str], Awaitable[str]], count: int, concurrency: int, body: bytes,
+) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            await upload(f"bench/{label}/{i}.jpg", body, "image/jpeg")
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(count)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    print(
+        f"{label:<16} {count / elapsed:>7.1f} uploads/s  p50={statistics.median(latencies) * 1000:>6.1f}ms "
+        f"p99={latencies[int(len(latencies) * 0.99)] * 1000:>6.1f}ms  wall={elapsed:>5.2f}s"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--size-kb", type=int, default=200, help="body size, about one card photo")
+    parser.add_argument("--port", type=int, default=5056)
+    args = parser.parse_args()
+
+    moto = await start_moto(args.port)
+    try:
+        os.environ.setdefault("AWS_EC2_METADATA_DISABLED", "true")
+        settings.s3_endpoint_url = f"http://127.0.0.1:{args.port}"
+        settings.bucket_name = "bench-uploads"
+        settings.s3_max_pool_connections = max(settings.s3_max_pool_connections, args.concurrency)
+        s3_client = await s3_clients.get()
+        await s3_client.create_bucket(
+            Bucket=settings.bucket_name,
+            **({} if settings.aws_origin == "us-east-1" else {"CreateBucketConfiguration": {"LocationConstraint": settings.aws_origin}}),
+        )
+
+        body = os.urandom(args.size_kb * 1024)
+        print(f"{args.uploads} uploads of {args.size_kb} KB, {args.concurrency} at a time")
+        await run_uploads("client per call", upload_with_new_client, args.uploads, args.concurrency, body)
+        await run_uploads("pooled client", upload_bytes, args.uploads, args.concurrency, body)
+
+        large = os.urandom(settings.s3_multipart_threshold_bytes + settings.s3_multipart_part_bytes)
+        start = time.perf_counter()
+        await upload_bytes("bench/large.bin", large, "application/octet-stream")
+        head = await s3_client.head_object(Bucket=settings.bucket_name, Key="bench/large.bin")
+        size_check = "size ok" if head["ContentLength"] == len(large) else "SIZE MISMATCH"
+        print(f"multipart        {len(large) / 2 ** 20:.0f} MiB in {time.perf_counter() - start:.2f}s, ETag {head['ETag']} ({size_check})")
+    finally:
+        await s3_clients.close()
+        moto.terminate()
+        await moto.wait()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+"""
+Compares single-call and map-reduce summarization latency at several transcript lengths.
+
+    python -m benchmarks.bench_summarize
+    python -m benchmarks.bench_summarize --lengths 2000,10000,40000 --live
+
+By default the LLM is simulated: each call sleeps for a fixed overhead plus time
+proportional to input and output tokens, which is the cost shape of a hosted model.
+With --live the configured Gemini model is called instead.
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from app.agent.summarize import CHARS_PER_TOKEN, estimate_tokens, summarize_map_reduce, summarize_single
+from app.core.config import settings
+
+WORDS = (
+    "pricing demo integration salesforce hubspot gifting campaign budget quarter team onboarding "
+    "follow up deck renewal churn pipeline handwritten notes europe warehouse timeline pilot"
+).split()
+
+
+class SimulatedLatencyChatModel(BaseChatModel):
+    overhead_s: float = 0.4
+    input_tokens_per_s: float = 5000
+    output_tokens_per_s: float = 150
+    output_tokens: int = 120
+
+    @property
+    def _llm_type(self) -> str:
+        return "simulated-latency"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs) -> ChatResult:
+        raise NotImplementedError("Use the async API")
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs) -> ChatResult:
+        input_tokens = sum(len(str(m.content)) for m in messages) // CHARS_PER_TOKEN
+        await asyncio.sleep(
+            self.overhead_s
+            + input_tokens / self.input_tokens_per_s
+            + self.output_tokens / self.output_tokens_per_s
+        )
+        text = " ".join(random.choices(WORDS, k=self.output_tokens))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+
+def synthetic_transcript(tokens: int) -> str:
+    rng = random.Random(tokens)
+    sentences = []
+    while sum(len(s) for s in sentences) < tokens * CHARS_PER_TOKEN:
+        sentences.append(" ".join(rng.choices(WORDS, k=rng.randint(6, 18))).capitalize() + ".")
+    return " ".join(sentences)
+
+
+async def timed(coro) -> float:
+    start = time.perf_counter()
+    await coro
+    return time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lengths", default="1000,5000,15000,40000,80000", help="Transcript lengths in tokens")
+    parser.add_argument("--live", action="store_true", help="Call Gemini instead of the simulated model")
+    parser.add_argument("--input-tps", type=float, default=5000, help="Simulated prompt-processing tokens/s")
+    args = parser.parse_args()
+
+    chat_model = None if args.live else SimulatedLatencyChatModel(input_tokens_per_s=args.input_tps)
+    print(
+        f"threshold={settings.summary_map_reduce_threshold_tokens} chunk={settings.summary_chunk_tokens} "
+        f"concurrency={settings.summary_max_concurrency} model={'gemini' if args.live else 'simulated'}"
+    )
+    print(f"{'tokens':>8} {'single s':>9} {'map-reduce s':>13} {'speedup':>8}  default path")
+    for length in (int(n) for n in args.lengths.split(",")):
+        transcript = synthetic_transcript(length)
+        single = await timed(summarize_single(transcript, chat_model))
+        mapped = await timed(summarize_map_reduce(transcript, chat_model))
+        path = "map-reduce" if estimate_tokens(transcript) > settings.summary_map_reduce_threshold_tokens else "single"
+        print(f"{length:>8} {single:>9.2f} {mapped:>13.2f} {single / mapped:>7.2f}x  {path}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,181 @@
+"""
+Load test for the live audio websocket proxy (/ws/client).
+
+    python -m benchmarks.load_audio_ws
+    python -m benchmarks.load_audio_ws --clients 200 --duration 20
+
+A fake Deepgram websocket server runs in this process and answers every few audio
+frames with an interim result and, less often, a final one. The proxy runs in a
+uvicorn subprocess with DEEPGRAM_URL pointed at the fake, serving only the audio
+router (no lifespan, so no Mongo is needed; the session_id is not a UUID, so no live
+session is saved, and transcript fan-out is off, so no Redis is needed). Each client streams real-time PCM frames (3200 bytes every 100 ms,
+i.e. 16 kHz 16-bit mono) with its send time stamped in the first 8 bytes, which the
+fake echoes back so the client can measure round-trip latency through the proxy.
+
+The proxy process's CPU time is read from /proc and turned into sockets per core:
+how many such real-time streams one fully busy core could proxy. Passthrough and
+legacy (per-message session_id) modes are measured one after the other.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import struct
+import sys
+import time
+from typing import List, Tuple
+
+from websockets.asyncio.client import connect
+from websockets.asyncio.server import serve
+
+FRAME_BYTES = 3200
+FRAME_INTERVAL_S = 0.1
+
+
+# === Fake Deepgram ===
+
+def fake_result(sent_at: float, is_final: bool) -> str:
+    return json.dumps({
+        "type": "Results",
+        "is_final": is_final,
+        "start": sent_at,
+        "channel": {"alternatives": [{"transcript": "we would like a demo next week", "confidence": 0.98}]},
+    }, separators=(",", ":"))
+
+
+async def fake_deepgram(ws, interim_every: int, final_every: int) -> None:
+    frames = 0
+    async for message in ws:
+        if isinstance(message, str):
+            if json.loads(message).get("type") == "CloseStream":
+                break
+            continue
+        frames += 1
+        (sent_at,) = struct.unpack("d", message[:8])
+        if frames % final_every == 0:
+            await ws.send(fake_result(sent_at, True))
+        elif frames % interim_every == 0:
+            await ws.send(fake_result(sent_at, False))
+
+
+# === Proxy process ===
+
+def proxy_app():
+    from fastapi import FastAPI
+
+    from app.api import audio
+
+    # Per-connection log lines are too much output for a load test
+    logging.getLogger("audio").setLevel(logging.ERROR)
+    app = FastAPI()
+    app.include_router(audio.router)
+    return app
+
+
+async def start_proxy(port: int, deepgram_port: int) -> asyncio.subprocess.Process:
+    # An asyncio subprocess: the fake Deepgram shares this event loop, so waiting on the
+    # proxy must not block it
+    env = dict(os.environ, DEEPGRAM_URL=f"ws://127.0.0.1:{deepgram_port}", TRANSCRIPT_FANOUT_ENABLED="false")
+    return await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "uvicorn", "benchmarks.load_audio_ws:proxy_app", "--factory",
+        "--port", str(port), "--log-level", "warning",
+        env=env,
+    )
+
+
+def cpu_seconds(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    # utime and stime, fields 14 and 15 of the full line
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+async def wait_until_listening(port: int, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"proxy did not start on port {port}")
+
+
+# === Clients ===
+
+async def client(url: str, duration: float) -> Tuple[int, int, List[float]]:
+    frames, messages, latencies = 0, 0, []
+    padding = bytes(FRAME_BYTES - 8)
+    async with connect(url, max_size=None) as ws:
+        async def receive():
+            nonlocal messages
+            async for message in ws:
+                messages += 1
+                result = json.loads(message)
+                if result.get("type") == "Results":
+                    latencies.append(time.time() - result["start"])
+
+        receiver = asyncio.create_task(receive())
+        next_send = time.monotonic()
+        deadline = next_send + duration
+        while next_send < deadline:
+            await ws.send(struct.pack("d", time.time()) + padding)
+            frames += 1
+            next_send += FRAME_INTERVAL_S
+            await asyncio.sleep(max(0.0, next_send - time.monotonic()))
+        await asyncio.sleep(0.5)
+        await ws.close()
+        await receiver
+    return frames, messages, latencies
+
+
+async def run_mode(args, passthrough: bool) -> None:
+    proxy = await start_proxy(args.port, args.deepgram_port)
+    try:
+        await wait_until_listening(args.port)
+        url = f"ws://127.0.0.1:{args.port}/ws/client?session_id=load-test&passthrough={str(passthrough).lower()}"
+        cpu_before, start = cpu_seconds(proxy.pid), time.monotonic()
+        results = await asyncio.gather(*(client(url, args.duration) for _ in range(args.clients)), return_exceptions=True)
+        wall, cpu = time.monotonic() - start, cpu_seconds(proxy.pid) - cpu_before
+    finally:
+        proxy.terminate()
+        await proxy.wait()
+
+    completed = [r for r in results if isinstance(r, tuple)]
+    frames = sum(r[0] for r in completed)
+    messages = sum(r[1] for r in completed)
+    latencies = sorted(l for r in completed for l in r[2])
+    p50 = statistics.median(latencies) * 1000 if latencies else float("nan")
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000 if latencies else float("nan")
+    utilization = cpu / wall
+    print(
+        f"{'passthrough' if passthrough else 'legacy':<12} clients={len(completed):>4}/{args.clients} "
+        f"frames={frames:>7} results={messages:>6} cpu={cpu:>6.2f}s ({utilization:>5.1%} of a core) "
+        f"p50={p50:>6.1f}ms p99={p99:>6.1f}ms sockets/core={len(completed) / utilization if utilization else float('inf'):>7.0f}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--deepgram-port", type=int, default=8766)
+    parser.add_argument("--interim-every", type=int, default=3, help="frames per interim result")
+    parser.add_argument("--final-every", type=int, default=20, help="frames per final result")
+    args = parser.parse_args()
+
+    async def handler(ws):
+        await fake_deepgram(ws, args.interim_every, args.final_every)
+
+    async with serve(handler, "127.0.0.1", args.deepgram_port, max_size=None):
+        print(f"{args.clients} clients streaming {FRAME_BYTES} B every {FRAME_INTERVAL_S * 1000:.0f} ms for {args.duration:.0f}s")
+        for passthrough in (True, False):
+            await run_mode(args, passthrough)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,27 @@
+"""
+Unit tests for the deterministic parts of the app. They need no running services:
+the required settings get placeholder values here, before `app` is imported, and
+Redis-backed code runs against fakeredis.
+
+    pip install -r requirements-dev.txt
+    python -m pytest
+"""
+import os
+
+REQUIRED_SETTINGS = {
+    "GEMINI_API_KEY": "test",
+    "AWS_ACCESS_KEY": "test",
+    "AWS_SECRET_ACCESS_KEY": "test",
+    "BUCKET_NAME": "test-bucket",
+    "AWS_ORIGIN": "us-east-1",
+    "MONGO_URL": "mongodb://localhost:27017/test",
+    "DEEPGRAM_URL": "wss://deepgram.invalid/v1/listen",
+    "DEEPGRAM_API_KEY": "test",
+    "REDIS_URL": "redis://localhost:6379/0",
+    "SENDGRID_API_KEY": "test",
+    "EMAIL": "test@example.com",
+    "WEBHOOK_SECRET": "test",
+}
+
+for name, value in REQUIRED_SETTINGS.items():
+    os.environ.setdefault(name, value)
@@ -0,0 +1,40 @@
+import pytest
+
+from app.services.contact_keys import build_contact_keys, normalize_email, normalize_phone
+
+
+@pytest.mark.parametrize("email, expected", [
+    ("Jane.Doe+expo@Acme.com", "jane.doe@acme.com"),
+    ("  jane@acme.com ", "jane@acme.com"),
+    ("a+b+c@x.io", "a@x.io"),
+    ("+tag@acme.com", None),
+    ("no-at-sign", None),
+    ("@acme.com", None),
+    ("jane@", None),
+])
+def test_normalize_email(email, expected):
+    assert normalize_email(email) == expected
+
+
+@pytest.mark.parametrize("phone, region, expected", [
+    ("(415) 555-0100", "US", "+14155550100"),
+    ("415.555.0100", "US", "+14155550100"),
+    ("+44 20 7946 0958", "US", "+442079460958"),
+    ("020 7946 0958", "GB", "+442079460958"),
+    ("12", "US", None),
+    ("not a phone", "US", None),
+])
+def test_normalize_phone(phone, region, expected):
+    assert normalize_phone(phone, region) == expected
+
+
+def test_build_contact_keys_dedupes_and_sorts():
+    keys = build_contact_keys(
+        ["Jane+expo@Acme.com", "jane@acme.com", "broken"],
+        ["(415) 555-0100", "+1 415 555 0100", "12"],
+    )
+    assert keys == ["email:jane@acme.com", "phone:+14155550100"]
+
+
+def test_build_contact_keys_empty():
+    assert build_contact_keys([], []) == []
@@ -0,0 +1,69 @@
+import base64
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from app.services.lead_listing import (
+    CURSOR_FIELDS,
+    LEAD_FIELDS,
+    decode_cursor,
+    encode_cursor,
+    lead_projection,
+    select_fields,
+)
+
+
+# === Cursors ===
+
+@pytest.mark.parametrize("created_at", [
+    datetime(2025, 3, 14, 9, 26, 53, 589793),
+    datetime(2025, 3, 14, 9, 26, 53, tzinfo=timezone.utc),
+])
+def test_cursor_round_trip(created_at):
+    lead_id = uuid4()
+    cursor = encode_cursor(created_at, lead_id)
+    assert decode_cursor(cursor) == (created_at, lead_id)
+    # Safe to pass as a query parameter unescaped
+    assert "+" not in cursor and "/" not in cursor
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    base64.urlsafe_b64encode(b"not json").decode(),
+    base64.urlsafe_b64encode(b'{"created_at": "2025-03-14T09:26:53"}').decode(),
+    base64.urlsafe_b64encode(b'{"created_at": "yesterday", "id": "' + str(uuid4()).encode() + b'"}').decode(),
+    base64.urlsafe_b64encode(b'{"created_at": "2025-03-14T09:26:53", "id": "not-a-uuid"}').decode(),
+    base64.urlsafe_b64encode(b"[1, 2]").decode(),
+])
+def test_bad_cursor_is_a_400(cursor):
+    with pytest.raises(HTTPException) as raised:
+        decode_cursor(cursor)
+    assert raised.value.status_code == 400
+
+
+# === Projection ===
+
+def test_select_fields_always_includes_the_cursor_fields():
+    assert select_fields("name,emails", None) == {"name", "emails"} | CURSOR_FIELDS
+    assert select_fields(None, "id,created_at") == LEAD_FIELDS
+
+
+def test_select_fields_exclude():
+    selected = select_fields(None, "parsed_fields, emails")
+    assert selected == LEAD_FIELDS - {"parsed_fields", "emails"}
+
+
+def test_unknown_field_is_a_400():
+    with pytest.raises(HTTPException) as raised:
+        select_fields("emails,ssn", None)
+    assert raised.value.status_code == 400
+    assert "ssn" in raised.value.detail
+
+
+def test_lead_projection_is_cached_per_field_set():
+    fields = select_fields("emails", None)
+    model = lead_projection(fields)
+    assert lead_projection(frozenset(fields)) is model
+    assert set(model.model_fields) == fields
@@ -0,0 +1,224 @@
+import asyncio
+import time
+
+import pytest
+
+from app.agent.llm_governor import LlmGovernor, LlmUnavailableError, Priority, error_status, is_retryable, retry_after_seconds
+
+
+class ApiError(Exception):
+    def __init__(self, code: int):
+        super().__init__(f"HTTP {code}")
+        self.code = code
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, headers: dict):
+        self.status_code = status_code
+        self.headers = headers
+
+
+class HttpError(Exception):
+    def __init__(self, status_code: int, headers: dict = None):
+        super().__init__(f"HTTP {status_code}")
+        self.response = FakeResponse(status_code, headers or {})
+
+
+def governor(**overrides) -> LlmGovernor:
+    options = dict(max_concurrency=8, initial_concurrency=4, backoff_base_seconds=0.001, backoff_max_seconds=0.01)
+    return LlmGovernor(**{**options, **overrides})
+
+
+# === Error classification ===
+
+def test_error_status_follows_the_cause_chain():
+    try:
+        try:
+            raise ApiError(429)
+        except ApiError as e:
+            raise RuntimeError("wrapped by langchain") from e
+    except RuntimeError as wrapped:
+        assert error_status(wrapped) == 429
+        assert is_retryable(wrapped)
+
+
+@pytest.mark.parametrize("error, retryable", [
+    (ApiError(503), True),
+    (ApiError(400), False),
+    (HttpError(408), True),
+    (asyncio.TimeoutError(), True),
+    (ValueError("bad prompt"), False),
+])
+def test_is_retryable(error, retryable):
+    assert is_retryable(error) is retryable
+
+
+def test_retry_after_header():
+    assert retry_after_seconds(HttpError(429, {"Retry-After": "7"})) == 7.0
+    assert retry_after_seconds(HttpError(429, {"Retry-After": "soon"})) is None
+    assert retry_after_seconds(ApiError(429)) is None
+
+
+# === AIMD concurrency ===
+
+def test_overload_halves_the_limit_once_per_cooldown():
+    gov = governor()
+    gov.record_failure(ApiError(429))
+    assert gov.limit == 2
+    # A burst of 429s is one signal
+    gov.record_failure(ApiError(429))
+    assert gov.limit == 2
+
+    gov._last_decrease -= LlmGovernor.DECREASE_COOLDOWN_SECONDS
+    gov.record_failure(ApiError(503))
+    assert gov.limit == 1
+    gov._last_decrease -= LlmGovernor.DECREASE_COOLDOWN_SECONDS
+    gov.record_failure(ApiError(503))
+    assert gov.limit == gov.min_concurrency
+
+
+def test_success_grows_the_limit_only_while_it_is_the_bottleneck():
+    gov = governor()
+    gov.record_success()
+    assert gov.limit == 4
+
+    gov.in_flight = 3
+    gov.record_success()
+    assert gov.limit == pytest.approx(4.25)
+
+
+def test_limit_never_exceeds_max_concurrency():
+    gov = governor(initial_concurrency=8)
+    gov.in_flight = 8
+    for _ in range(20):
+        gov.record_success()
+    assert gov.limit == 8
+
+
+def test_waiters_are_admitted_by_priority():
+    gov = governor(initial_concurrency=1, max_concurrency=1)
+    order = []
+
+    async def call(name, priority):
+        async with gov.slot(priority):
+            order.append(name)
+
+    async def run():
+        async with gov.slot():
+            waiters = [
+                asyncio.create_task(call("background", Priority.BACKGROUND)),
+                asyncio.create_task(call("normal", Priority.NORMAL)),
+                asyncio.create_task(call("interactive", Priority.INTERACTIVE)),
+            ]
+            await asyncio.sleep(0)
+        await asyncio.gather(*waiters)
+
+    asyncio.run(run())
+    assert order == ["interactive", "normal", "background"]
+    assert gov.in_flight == 0
+
+
+# === Token bucket ===
+
+def test_token_bucket_allows_a_burst_then_paces():
+    gov = governor(rate_per_second=20, burst=2)
+
+    async def run():
+        start = time.monotonic()
+        for _ in range(4):
+            async with gov.slot():
+                pass
+        return time.monotonic() - start
+
+    # Two calls from the burst, then one every 50 ms
+    assert asyncio.run(run()) >= 0.09
+
+
+def test_retry_after_pauses_the_bucket():
+    gov = governor()
+    gov.record_failure(HttpError(429, {"Retry-After": "30"}))
+    assert gov.stats()["paused_for_seconds"] > 29
+
+
+# === Circuit breaker ===
+
+def open_breaker(gov: LlmGovernor) -> None:
+    for _ in range(gov.failure_threshold):
+        gov.record_failure(ApiError(500))
+
+
+def test_breaker_opens_after_consecutive_failures():
+    gov = governor(failure_threshold=3)
+    gov.record_failure(ApiError(500))
+    gov.record_failure(ApiError(500))
+    assert gov.state == "closed"
+    gov.record_failure(ApiError(500))
+    assert gov.state == "open"
+
+    with pytest.raises(LlmUnavailableError) as raised:
+        gov._admit()
+    assert raised.value.status_code == 503
+    assert int(raised.value.headers["Retry-After"]) >= 1
+
+
+def test_client_errors_do_not_trip_the_breaker():
+    gov = governor(failure_threshold=2)
+    gov.record_failure(ApiError(500))
+    gov.record_failure(ApiError(400))
+    gov.record_failure(ApiError(500))
+    assert gov.state == "closed"
+
+
+def test_half_open_probe_closes_on_success():
+    gov = governor(failure_threshold=1, half_open_probes=1)
+    open_breaker(gov)
+    gov._opened_at -= gov.open_seconds
+
+    assert gov._admit() is True
+    assert gov.state == "half_open"
+    # Only one probe at a time
+    with pytest.raises(LlmUnavailableError):
+        gov._admit()
+
+    gov.record_success()
+    assert gov.state == "closed"
+
+
+def test_half_open_probe_failure_reopens():
+    gov = governor(failure_threshold=5)
+    open_breaker(gov)
+    gov._opened_at -= gov.open_seconds
+    gov._admit()
+
+    gov.record_failure(ApiError(503))
+    assert gov.state == "open"
+
+
+# === Retries ===
+
+def test_call_retries_transient_errors():
+    gov = governor(max_retries=3)
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ApiError(503)
+        return "ok"
+
+    assert asyncio.run(gov.call(flaky)) == "ok"
+    assert len(attempts) == 3
+    assert gov.stats()["retries"] == 2
+
+
+def test_call_does_not_retry_client_errors():
+    gov = governor(max_retries=3)
+    attempts = []
+
+    async def bad_request():
+        attempts.append(1)
+        raise ApiError(400)
+
+    with pytest.raises(ApiError):
+        asyncio.run(gov.call(bad_request))
+    assert len(attempts) == 1
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from app.services.micro_batcher import MicroBatcher
+
+
+def recording_handler(batches):
+    async def handler(items):
+        batches.append(list(items))
+        return [item * 10 for item in items]
+    return handler
+
+
+def test_full_batch_flushes_without_waiting_for_the_window():
+    batches = []
+    # A window this long would time the test out if the size limit didn't flush
+    batcher = MicroBatcher(recording_handler(batches), window_ms=60_000, max_batch_size=3)
+
+    async def run():
+        return await asyncio.wait_for(asyncio.gather(*(batcher.submit(i) for i in range(3))), 1)
+
+    assert asyncio.run(run()) == [0, 10, 20]
+    assert batches == [[0, 1, 2]]
+    assert batcher.stats()["flush_reasons"] == {"full": 1}
+
+
+def test_window_flushes_a_partial_batch():
+    batches = []
+    batcher = MicroBatcher(recording_handler(batches), window_ms=10, max_batch_size=10)
+
+    async def run():
+        return await asyncio.gather(batcher.submit(1), batcher.submit(2))
+
+    assert asyncio.run(run()) == [10, 20]
+    assert batches == [[1, 2]]
+    stats = batcher.stats()
+    assert stats["flush_reasons"] == {"window": 1}
+    assert stats["fill_rate"] == 0.2
+
+
+def test_overflow_starts_a_new_batch():
+    batches = []
+    batcher = MicroBatcher(recording_handler(batches), window_ms=10, max_batch_size=2)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+
+    assert asyncio.run(run()) == [0, 10, 20, 30, 40]
+    assert batches == [[0, 1], [2, 3], [4]]
+    assert batcher.stats()["flush_reasons"] == {"full": 2, "window": 1}
+
+
+def test_handler_error_reaches_every_caller():
+    async def handler(items):
+        raise RuntimeError("model down")
+
+    batcher = MicroBatcher(handler, window_ms=10, max_batch_size=10)
+
+    async def run():
+        return await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert [str(result) for result in results] == ["model down", "model down"]
+
+
+def test_per_item_exception_fails_only_that_caller():
+    async def handler(items):
+        return [ValueError(f"bad {item}") if item == 2 else item for item in items]
+
+    batcher = MicroBatcher(handler, window_ms=10, max_batch_size=10)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(i) for i in (1, 2, 3)), return_exceptions=True)
+
+    first, second, third = asyncio.run(run())
+    assert (first, third) == (1, 3)
+    assert isinstance(second, ValueError)
+
+
+def test_wrong_result_count_fails_the_batch():
+    async def handler(items):
+        return items[:1]
+
+    batcher = MicroBatcher(handler, window_ms=10, max_batch_size=10, name="scoring")
+
+    async def run():
+        await asyncio.gather(batcher.submit(1), batcher.submit(2))
+
+    with pytest.raises(ValueError, match="scoring handler returned 1 results for 2 items"):
+        asyncio.run(run())
@@ -0,0 +1,172 @@
+import asyncio
+import time
+from uuid import UUID, uuid4
+
+import fakeredis
+import pytest
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.services import ocr_jobs
+from app.services.ocr_jobs import DEAD_LETTER_KEY, DELAYED_KEY, QUEUE_KEY, OcrJobWorker, image_key, job_key
+
+
+class FakePipeline:
+    def server_timing(self) -> str:
+        return "total;dur=1"
+
+
+@pytest.fixture
+def client():
+    return fakeredis.FakeAsyncRedis(decode_responses=True)
+
+
+@pytest.fixture
+def worker(client):
+    return OcrJobWorker(client=client, name="test-worker")
+
+
+def stub_scan(monkeypatch, outcome):
+    """Replace scan_card; `outcome` is raised if it is an exception, else returned as the result."""
+    calls = []
+
+    async def scan_card(*args, **kwargs):
+        calls.append(kwargs)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        if kwargs.get("on_counted"):
+            await kwargs["on_counted"]()
+        return outcome, FakePipeline()
+
+    monkeypatch.setattr(ocr_jobs, "scan_card", scan_card)
+    return calls
+
+
+def enqueue(client) -> str:
+    return asyncio.run(ocr_jobs.enqueue_card_scan(uuid4(), "card.jpg", b"image", "image/jpeg", client=client))
+
+
+def test_enqueue_queues_job_and_image(client):
+    job_id = enqueue(client)
+
+    job = asyncio.run(ocr_jobs.get_job(job_id, client=client))
+    assert job["status"] == "queued"
+    assert job["attempts"] == 0
+    assert asyncio.run(client.lrange(QUEUE_KEY, 0, -1)) == [job_id]
+    assert asyncio.run(client.exists(image_key(job_id)))
+
+
+def test_success_stores_result_and_drops_image(client, worker, monkeypatch):
+    calls = stub_scan(monkeypatch, {"lead_id": "x", "count": 1})
+    job_id = enqueue(client)
+
+    asyncio.run(worker.process(job_id))
+
+    job = asyncio.run(ocr_jobs.get_job(job_id, client=client))
+    assert job["status"] == "done"
+    assert job["attempts"] == 1
+    assert job["result"] == {"lead_id": "x", "count": 1}
+    assert not asyncio.run(client.exists(image_key(job_id)))
+    # The lead's _id is the job id, so a retry can't insert it twice
+    assert calls[0]["lead_id"] == UUID(job_id)
+
+
+def test_client_error_fails_without_retry(client, worker, monkeypatch):
+    stub_scan(monkeypatch, HTTPException(status_code=422, detail="No card found"))
+    job_id = enqueue(client)
+
+    asyncio.run(worker.process(job_id))
+
+    job = asyncio.run(ocr_jobs.get_job(job_id, client=client))
+    assert job["status"] == "failed"
+    assert job["error"] == '"No card found"'
+    assert asyncio.run(client.zcard(DELAYED_KEY)) == 0
+    assert not asyncio.run(client.exists(image_key(job_id)))
+
+
+def test_transient_error_schedules_retry_with_backoff(client, worker, monkeypatch):
+    stub_scan(monkeypatch, RuntimeError("Gemini timeout"))
+    job_id = enqueue(client)
+
+    before = time.time()
+    asyncio.run(worker.process(job_id))
+    asyncio.run(worker.process(job_id))
+
+    job = asyncio.run(ocr_jobs.get_job(job_id, client=client))
+    assert job["status"] == "retrying"
+    assert job["attempts"] == 2
+    assert job["error"] == "Gemini timeout"
+    # The second failure waits twice the base backoff
+    due = asyncio.run(client.zscore(DELAYED_KEY, job_id))
+    assert due >= before + 2 * settings.ocr_job_retry_backoff_seconds
+    assert asyncio.run(client.exists(image_key(job_id)))
+
+
+def test_last_attempt_goes_to_dead_letter(client, worker, monkeypatch):
+    stub_scan(monkeypatch, HTTPException(status_code=503, detail="LLM unavailable"))
+    job_id = enqueue(client)
+
+    for _ in range(settings.ocr_job_max_attempts):
+        asyncio.run(worker.process(job_id))
+
+    job = asyncio.run(ocr_jobs.get_job(job_id, client=client))
+    assert job["status"] == "dead"
+    assert job["attempts"] == settings.ocr_job_max_attempts
+    assert asyncio.run(client.lrange(DEAD_LETTER_KEY, 0, -1)) == [job_id]
+
+
+def test_expired_job_is_skipped(client, worker, monkeypatch):
+    calls = stub_scan(monkeypatch, {"lead_id": "x"})
+    job_id = enqueue(client)
+    asyncio.run(client.delete(image_key(job_id)))
+
+    asyncio.run(worker.process(job_id))
+
+    assert calls == []
+    assert asyncio.run(client.hget(job_key(job_id), "status")) == "queued"
+
+
+def test_retry_after_counting_skips_the_counters(client, worker, monkeypatch):
+    counted = []
+
+    async def scan_card(*args, **kwargs):
+        counted.append(kwargs["counted"])
+        await kwargs["on_counted"]()
+        if len(counted) == 1:
+            raise RuntimeError("failed after the counters were bumped")
+        return {"lead_id": "x"}, FakePipeline()
+
+    monkeypatch.setattr(ocr_jobs, "scan_card", scan_card)
+    job_id = enqueue(client)
+
+    asyncio.run(worker.process(job_id))
+    asyncio.run(worker.process(job_id))
+
+    assert counted == [False, True]
+    assert asyncio.run(client.hget(job_key(job_id), "status")) == "done"
+
+
+def test_promote_moves_only_due_retries(client, worker):
+    now = time.time()
+    asyncio.run(client.zadd(DELAYED_KEY, {"due": now - 1, "later": now + 60}))
+
+    asyncio.run(worker.promote_due_retries())
+
+    assert asyncio.run(client.lrange(QUEUE_KEY, 0, -1)) == ["due"]
+    assert asyncio.run(client.zrange(DELAYED_KEY, 0, -1)) == ["later"]
+
+
+def test_departed_workers_jobs_are_requeued(client, worker):
+    gone = OcrJobWorker(client=client, name="gone")
+    alive = OcrJobWorker(client=client, name="alive")
+    for other in (gone, alive):
+        asyncio.run(other.heartbeat())
+    asyncio.run(client.lpush(gone.processing_key, "orphan"))
+    asyncio.run(client.lpush(alive.processing_key, "running"))
+    asyncio.run(client.delete(ocr_jobs.heartbeat_key("gone")))
+
+    asyncio.run(worker.reclaim_orphaned_jobs())
+
+    assert asyncio.run(client.lrange(QUEUE_KEY, 0, -1)) == ["orphan"]
+    assert asyncio.run(client.lrange(alive.processing_key, 0, -1)) == ["running"]
+    assert asyncio.run(client.smembers(ocr_jobs.WORKERS_KEY)) == {"alive"}
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from app.agent.tagging_agent import (
+    InterestScoreResult,
+    coerce_score,
+    parse_interest_score,
+    parse_tier_counts,
+    tolerant_parse_interest_score,
+    tolerant_parse_interest_score_batch,
+)
+
+
+class FakeFixer:
+    """Stands in for OutputFixingParser, which would make a second LLM call."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def ainvoke(self, text):
+        self.calls.append(text)
+        return InterestScoreResult(interest_score=0.5, reason="fixed")
+
+
+@pytest.mark.parametrize("value, expected", [
+    (0.85, 0.85),
+    ("0.85", 0.85),
+    ("85%", 0.85),
+    (8.5, 0.85),
+    (85, 0.85),
+    (-0.2, 0.0),
+    (250, 1.0),
+])
+def test_coerce_score(value, expected):
+    assert coerce_score(value) == pytest.approx(expected)
+
+
+def test_tolerant_parser_handles_fences_and_prose():
+    text = 'Here you go:\n```json\n{"interest_score": "70%", "reason": " CTO, asked for pricing "}\n```'
+    result = tolerant_parse_interest_score(text)
+    assert result.interest_score == pytest.approx(0.7)
+    assert result.reason == "CTO, asked for pricing"
+
+
+def test_tolerant_batch_parser_accepts_list_or_results_object():
+    as_list = '[{"interest_score": 0.1, "reason": "a"}, {"interest_score": 9, "reason": "b"}]'
+    as_object = '```json\n{"results": ' + as_list + "}\n```"
+    for text in (as_list, as_object):
+        results = tolerant_parse_interest_score_batch(text)
+        assert [r.interest_score for r in results] == pytest.approx([0.1, 0.9])
+
+
+def parse(text):
+    fixer = FakeFixer()
+    before = dict(parse_tier_counts)
+    result = asyncio.run(parse_interest_score(text, fixer))
+    tiers = {tier for tier, count in parse_tier_counts.items() if count != before.get(tier, 0)}
+    return result, tiers, fixer.calls
+
+
+def test_strict_json_takes_the_first_tier():
+    result, tiers, fixer_calls = parse('{"interest_score": 0.9, "reason": "hot lead"}')
+    assert (result.interest_score, result.reason) == (0.9, "hot lead")
+    assert tiers == {"strict"}
+    assert fixer_calls == []
+
+
+def test_out_of_range_score_falls_to_the_tolerant_tier():
+    result, tiers, fixer_calls = parse('{"interest_score": 80, "reason": "out of 100"}')
+    assert result.interest_score == pytest.approx(0.8)
+    assert tiers == {"tolerant"}
+    assert fixer_calls == []
+
+
+def test_unparseable_output_goes_to_the_fixer():
+    result, tiers, fixer_calls = parse("The lead seems quite interested.")
+    assert result.reason == "fixed"
+    assert tiers == {"fixer"}
+    assert fixer_calls == ["The lead seems quite interested."]
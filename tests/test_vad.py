@@ -0,0 +1,145 @@
+import asyncio
+import io
+import wave
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.services.vad import StreamingVad, gated_transcriber, parse_wav_header
+
+RATE = 16000
+FRAME_BYTES = RATE * settings.audio_vad_frame_ms // 1000 * 2
+
+
+def silence(ms: int) -> bytes:
+    return bytes(RATE * ms // 1000 * 2)
+
+
+def tone(ms: int, amplitude: int = 8000) -> bytes:
+    t = np.arange(RATE * ms // 1000) / RATE
+    return (amplitude * np.sin(2 * np.pi * 440 * t)).astype("<i2").tobytes()
+
+
+def frames(ms: int) -> int:
+    return ms // settings.audio_vad_frame_ms
+
+
+def gate(*parts: bytes) -> bytes:
+    vad = StreamingVad(RATE)
+    return vad.process(b"".join(parts)) + vad.flush()
+
+
+def test_silence_is_dropped():
+    vad = StreamingVad(RATE)
+    assert vad.process(silence(1000)) == b""
+    assert vad.bytes_in == len(silence(1000))
+    assert vad.removed_fraction == 1.0
+
+
+def test_speech_keeps_padding_before_and_hangover_after():
+    out = gate(silence(1000), tone(200), silence(1000))
+    expected_frames = frames(settings.audio_vad_padding_ms) + frames(200) + frames(settings.audio_vad_hangover_ms)
+    assert len(out) == expected_frames * FRAME_BYTES
+    # The speech itself comes through untouched, right after the replayed padding
+    padding_bytes = frames(settings.audio_vad_padding_ms) * FRAME_BYTES
+    assert out[padding_bytes:padding_bytes + len(tone(200))] == tone(200)
+
+
+def test_short_pause_is_kept_whole():
+    pause_ms = settings.audio_vad_hangover_ms + settings.audio_vad_padding_ms - 100
+    speech = tone(200) + silence(pause_ms) + tone(200)
+    assert gate(silence(1000), speech) == silence(settings.audio_vad_padding_ms) + speech
+
+
+def test_long_pause_shrinks_to_hangover_plus_padding():
+    out = gate(silence(1000), tone(200), silence(3000), tone(200))
+    kept_pause = frames(settings.audio_vad_hangover_ms) + frames(settings.audio_vad_padding_ms)
+    assert len(out) == (frames(settings.audio_vad_padding_ms) + 2 * frames(200) + kept_pause) * FRAME_BYTES
+
+
+def test_chunking_does_not_change_the_output():
+    audio = silence(500) + tone(300) + silence(700) + tone(100) + silence(50)
+    whole = gate(audio)
+
+    vad = StreamingVad(RATE)
+    chunked = b"".join(vad.process(audio[i:i + 1234]) for i in range(0, len(audio), 1234)) + vad.flush()
+    assert chunked == whole
+
+
+def test_noise_floor_raises_the_threshold():
+    # Steady noise well above the absolute threshold becomes the floor and is gated out
+    noise = tone(3000, amplitude=300)
+    out = gate(noise)
+    assert len(out) < len(noise) // 2
+
+
+def test_flush_keeps_a_partial_frame_only_during_speech():
+    vad = StreamingVad(RATE)
+    vad.process(silence(1000) + tone(200) + tone(5)[:101])
+    assert len(vad.flush()) == 100
+
+    vad = StreamingVad(RATE)
+    vad.process(silence(1000) + bytes(100))
+    assert vad.flush() == b""
+
+
+# === WAV uploads ===
+
+def wav_bytes(pcm: bytes, sample_width: int = 2, rate: int = RATE) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(sample_width)
+        wav.setframerate(rate)
+        wav.writeframes(pcm)
+    return buffer.getvalue()
+
+
+def test_parse_wav_header():
+    data = wav_bytes(tone(100))
+    fmt, offset = parse_wav_header(data)
+    assert (fmt.audio_format, fmt.channels, fmt.sample_rate, fmt.bits_per_sample) == (1, 1, RATE, 16)
+    assert data[offset:] == tone(100)
+
+
+def test_parse_wav_header_needs_the_whole_header():
+    assert parse_wav_header(wav_bytes(tone(100))[:30]) == (None, None)
+
+
+def test_parse_wav_header_rejects_other_formats():
+    with pytest.raises(ValueError):
+        parse_wav_header(b"OggS" + bytes(40))
+
+
+async def chunked(data: bytes, size: int = 1000):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def capture_transcribe(calls):
+    async def transcribe(chunks, content_type, params=None):
+        calls.append((b"".join([chunk async for chunk in chunks]), content_type, params))
+        return "transcript"
+    return transcribe
+
+
+def test_gated_transcriber_sends_gated_linear16_for_pcm_wav():
+    calls = []
+    pcm = silence(1000) + tone(200) + silence(1000)
+    assert asyncio.run(gated_transcriber(capture_transcribe(calls))(chunked(wav_bytes(pcm)), "audio/wav")) == "transcript"
+
+    audio, content_type, params = calls[0]
+    assert content_type == "audio/l16"
+    assert params == {"encoding": "linear16", "sample_rate": RATE, "channels": 1}
+    assert audio == gate(pcm)
+
+
+@pytest.mark.parametrize("data, content_type", [
+    (b"\x1aE\xdf\xa3 webm bytes " * 100, "audio/webm"),
+    (wav_bytes(bytes(1600), sample_width=1), "audio/wav"),
+])
+def test_gated_transcriber_passes_other_audio_through(data, content_type):
+    calls = []
+    asyncio.run(gated_transcriber(capture_transcribe(calls))(chunked(data), content_type))
+    assert calls == [(data, content_type, None)]